@@ -1,147 +1,2424 @@
+import os
 import sys
-from typing import List, Dict, Tuple, Optional
+import time
+import heapq
+import hashlib
+import logging
+import cProfile
+import pstats
+import tracemalloc
+import mmap
+import re
+import struct
+import threading
+import argparse
+import asyncio
+import copy
+import csv
+import json
+from array import array
+from bisect import bisect_left, insort
+from contextlib import contextmanager, nullcontext
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from collections import OrderedDict
+from collections.abc import Sequence
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from typing import List, Dict, Tuple, Optional, Iterator, FrozenSet
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Archivo de tablas resueltas: encabezado, nombres de ciudades y las dos
+# matrices (distancias y siguiente) alineadas a 8 bytes para poder mapearlas
+MAGIA_TABLAS = b"HDT10FW1"
+FORMATO_TABLAS = "=8sccc5xIqq32sQ"
+
+# Archivo de la jerarquía de contracción: encabezado, nombres y los arreglos de la topología
+MAGIA_JERARQUIA = b"HDT10CH1"
+FORMATO_JERARQUIA = "=8sc3xIQ32sQ"
+
+# Centinela de "sin ruta" en tablas int32: la suma de dos sigue cabiendo en 32 bits
+INFINITO_32 = 2 ** 30 - 1
+
+CONDICIONES = ("normal", "lluvia", "nieve", "tormenta")
+
+
+class Metricas:
+    def __init__(self):
+        self.contadores: Dict[str, int] = {}
+        self.tiempos: Dict[str, float] = {}
+        # Los bloques de Floyd-Warshall se relajan desde varios hilos
+        self._candado = threading.Lock()
+    
+    def contar(self, nombre: str, cantidad: int = 1):
+        with self._candado:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+    
+    def sumar_tiempo(self, fase: str, segundos: float):
+        with self._candado:
+            self.tiempos[fase] = self.tiempos.get(fase, 0.0) + segundos
+    
+    @contextmanager
+    def fase(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar_tiempo(nombre, time.perf_counter() - inicio)
+    
+    def como_dict(self) -> dict:
+        with self._candado:
+            return {"contadores": dict(self.contadores), "tiempos": dict(self.tiempos)}
+    
+    def registrar(self, registro: Optional[logging.Logger] = None):
+        # Una línea JSON por exportación, fácil de filtrar en los registros
+        (registro or logging.getLogger("HDT10.metricas")).info(json.dumps(self.como_dict(), sort_keys=True))
+
+
+# Instrumentación opcional: con None (por defecto) cada punto de medición es una sola comparación
+_metricas: Optional[Metricas] = None
+_SIN_MEDIR = nullcontext()
+
+
+def activar_metricas(metricas: Optional[Metricas] = None) -> Metricas:
+    global _metricas
+    _metricas = metricas or Metricas()
+    return _metricas
+
+
+def desactivar_metricas() -> Optional[Metricas]:
+    global _metricas
+    metricas, _metricas = _metricas, None
+    return metricas
+
+
+def _fase(nombre: str):
+    return _SIN_MEDIR if _metricas is None else _metricas.fase(nombre)
+
+
+def _contar(nombre: str, cantidad: int = 1):
+    if _metricas is not None:
+        _metricas.contar(nombre, cantidad)
+
+
+def perfilar(modo: str, funcion, *argumentos, salida=None, lineas: int = 25):
+    # Ejecuta funcion bajo cProfile o tracemalloc y escribe el resumen en salida (stderr)
+    salida = salida or sys.stderr
+    if modo == "cprofile":
+        perfil = cProfile.Profile()
+        try:
+            return perfil.runcall(funcion, *argumentos)
+        finally:
+            pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(lineas)
+    if modo == "tracemalloc":
+        tracemalloc.start()
+        try:
+            return funcion(*argumentos)
+        finally:
+            instantanea = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Pico de memoria: {pico / 2 ** 20:.1f} MiB", file=salida)
+            for estadistica in instantanea.statistics("lineno")[:lineas]:
+                print(estadistica, file=salida)
+    raise ValueError(f"Modo de perfilado desconocido: {modo}")
+
+
+def _cambiar_cierres(cierres: Dict[int, FrozenSet[int]], pares, cerrar: bool) \
+        -> Tuple[Dict[int, FrozenSet[int]], List[Tuple[int, int]]]:
+    # Devuelve un diccionario nuevo: el anterior puede estar compartido con otra instantánea
+    nuevos = dict(cierres)
+    cambiadas = []
+    for i, j in pares:
+        if i == j or (j in nuevos.get(i, ())) == cerrar:
+            continue
+        for a, b in ((i, j), (j, i)):
+            vecinos = nuevos.get(a, frozenset())
+            vecinos = vecinos | {b} if cerrar else vecinos - {b}
+            if vecinos:
+                nuevos[a] = vecinos
+            else:
+                nuevos.pop(a, None)
+        cambiadas.append((i, j))
+    return nuevos, cambiadas
+
+
+def _aplicar_cierres(matriz: List[List[int]], cierres: Dict[int, FrozenSet[int]]) -> List[List[int]]:
+    # Matriz con las rutas cerradas en infinito; solo se copian las filas que tienen cierres
+    if not cierres:
+        return matriz
+    infinito = sys.maxsize // 2
+    matriz = list(matriz)
+    for i, cerradas in cierres.items():
+        fila = list(matriz[i])
+        for j in cerradas:
+            fila[j] = infinito
+        matriz[i] = fila
+    return matriz
+
 
 class Ruta:
-    def __init__(self, nombre: str, ciudad1: str, ciudad2: str, 
+    __slots__ = ("_nombre", "ciudad1", "ciudad2", "tiempo_normal", "tiempo_lluvia",
+                 "tiempo_nieve", "tiempo_tormenta")
+    
+    def __init__(self, nombre: Optional[str], ciudad1: str, ciudad2: str, 
                  tiempo_normal: int, tiempo_lluvia: int, 
                  tiempo_nieve: int, tiempo_tormenta: int):
-        self.nombre = nombre
+        self._nombre = nombre
         self.ciudad1 = ciudad1
         self.ciudad2 = ciudad2
         self.tiempo_normal = tiempo_normal
         self.tiempo_lluvia = tiempo_lluvia
         self.tiempo_nieve = tiempo_nieve
         self.tiempo_tormenta = tiempo_tormenta
+    
+    @property
+    def nombre(self) -> str:
+        # El nombre se arma solo si alguien lo pide
+        if self._nombre is None:
+            self._nombre = f"{self.ciudad1}To{self.ciudad2}"
+        return self._nombre
+    
+    @nombre.setter
+    def nombre(self, nombre: str):
+        self._nombre = nombre
+
+
+class RutaTabla(Sequence):
+    def __init__(self, ciudades: Optional[List[str]] = None, indice_ciudad: Optional[Dict[str, int]] = None):
+        # Columnas paralelas: la ruta k va de origen[k] a destino[k] (ids de ciudad)
+        self.ciudades = ciudades if ciudades is not None else []
+        self.indice_ciudad = indice_ciudad if indice_ciudad is not None else {}
+        self.origen = array('i')
+        self.destino = array('i')
+        self.tiempos = {condicion: array('q') for condicion in CONDICIONES}
+        # Tras copiar() las columnas se comparten hasta el próximo agregar
+        self._compartida = False
+        # Índices armados al pedirlos por primera vez: par de ciudades -> ruta, y los nombres
+        # de ciudad ordenados para buscar por prefijo (los ids siguen en indice_ciudad)
+        self._indice_rutas: Optional[Dict[Tuple[int, int], int]] = None
+        self._ciudades_ordenadas: Optional[List[str]] = None
+    
+    @classmethod
+    def desde_rutas(cls, rutas) -> "RutaTabla":
+        tabla = cls()
+        for ruta in rutas:
+            tabla.agregar(ruta)
+        return tabla
+    
+    @classmethod
+    def desde_columnas(cls, ciudades: List[str], indice_ciudad: Dict[str, int], origen: array,
+                       destino: array, tiempos: List[array]) -> "RutaTabla":
+        tabla = cls(ciudades, indice_ciudad)
+        tabla.origen = origen
+        tabla.destino = destino
+        tabla.tiempos = dict(zip(CONDICIONES, tiempos))
+        return tabla
+    
+    def _id_ciudad(self, ciudad: str) -> int:
+        if ciudad not in self.indice_ciudad:
+            self.indice_ciudad[ciudad] = len(self.ciudades)
+            self.ciudades.append(ciudad)
+            if self._ciudades_ordenadas is not None:
+                insort(self._ciudades_ordenadas, ciudad)
+        return self.indice_ciudad[ciudad]
+    
+    def agregar(self, ruta: Ruta) -> int:
+        if self._compartida:
+            self.ciudades = list(self.ciudades)
+            self.indice_ciudad = dict(self.indice_ciudad)
+            self.origen = array('i', self.origen)
+            self.destino = array('i', self.destino)
+            self.tiempos = {condicion: array('q', columna) for condicion, columna in self.tiempos.items()}
+            if self._indice_rutas is not None:
+                self._indice_rutas = dict(self._indice_rutas)
+            if self._ciudades_ordenadas is not None:
+                self._ciudades_ordenadas = list(self._ciudades_ordenadas)
+            self._compartida = False
+        i = self._id_ciudad(ruta.ciudad1)
+        j = self._id_ciudad(ruta.ciudad2)
+        self.origen.append(i)
+        self.destino.append(j)
+        for condicion, columna in self.tiempos.items():
+            columna.append(getattr(ruta, f"tiempo_{condicion}"))
+        if self._indice_rutas is not None:
+            self._indice_rutas[min(i, j), max(i, j)] = len(self.origen) - 1
+        return len(self.origen) - 1
+    
+    def indice_rutas(self) -> Dict[Tuple[int, int], int]:
+        # Como en la matriz, si un par de ciudades se repite vale la última línea
+        if self._indice_rutas is None:
+            self._indice_rutas = {(min(i, j), max(i, j)): k
+                                  for k, (i, j) in enumerate(zip(self.origen, self.destino))}
+        return self._indice_rutas
+    
+    def buscar(self, ciudad1: str, ciudad2: str) -> int:
+        # Posición de la ruta entre dos ciudades en cualquier sentido, o -1 si no hay
+        i = self.indice_ciudad.get(ciudad1)
+        j = self.indice_ciudad.get(ciudad2)
+        if i is None or j is None:
+            return -1
+        return self.indice_rutas().get((min(i, j), max(i, j)), -1)
+    
+    def ciudades_con_prefijo(self, prefijo: str, limite: Optional[int] = None) -> List[str]:
+        if self._ciudades_ordenadas is None:
+            self._ciudades_ordenadas = sorted(self.ciudades)
+        ordenadas = self._ciudades_ordenadas
+        resultado = []
+        for k in range(bisect_left(ordenadas, prefijo), len(ordenadas)):
+            if len(resultado) == limite or not ordenadas[k].startswith(prefijo):
+                break
+            resultado.append(ordenadas[k])
+        return resultado
+    
+    def __len__(self) -> int:
+        return len(self.origen)
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[k] for k in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        ciudad1 = self.ciudades[self.origen[indice]]
+        ciudad2 = self.ciudades[self.destino[indice]]
+        return Ruta(None, ciudad1, ciudad2, *(self.tiempos[c][indice] for c in CONDICIONES))
+    
+    def vista(self) -> "VistaRutas":
+        return VistaRutas(self)
+    
+    def copiar(self) -> "RutaTabla":
+        copia = copy.copy(self)
+        self._compartida = copia._compartida = True
+        return copia
+
+
+class VistaRutas(Sequence):
+    # Acceso de solo lectura a una RutaTabla, sin copiarla
+    def __init__(self, tabla: RutaTabla):
+        self._tabla = tabla
+    
+    def __len__(self) -> int:
+        return len(self._tabla)
+    
+    def __getitem__(self, indice):
+        return self._tabla[indice]
+
 
 class Grafo:
-    def __init__(self, rutas: List[Ruta]):
-        self.rutas_originales = rutas.copy()
-        self.ciudades = []
-        self.indice_ciudad = {}
+    CONDICIONES = CONDICIONES
+    
+    def __init__(self, rutas):
+        # Con una RutaTabla el grafo la adopta tal cual; una lista de Ruta se pasa a columnas
+        self.rutas_originales = rutas if isinstance(rutas, RutaTabla) else RutaTabla.desde_rutas(rutas)
+        self.ciudades = self.rutas_originales.ciudades
+        self.indice_ciudad = self.rutas_originales.indice_ciudad
         self.matriz = []
+        # Se incrementa con cada cambio para que el solver sepa si su resultado sigue vigente
+        self.version = 0
+        # Matrices por condición climática, construidas al pedirlas por primera vez
+        self.version_rutas = 0
+        self._matrices_condicion = {}
+        # Filas de la matriz propias de este grafo; las demás se comparten con una copia (None = todas)
+        self._propias = None
+        # Rutas cerradas, aparte de los pesos: ciudad -> vecinos con la ruta cerrada
+        self.cierres: Dict[int, FrozenSet[int]] = {}
+        self.version_cierres = 0
         
-        for ruta in rutas:
-            if ruta.ciudad1 not in self.indice_ciudad:
-                self.indice_ciudad[ruta.ciudad1] = len(self.ciudades)
-                self.ciudades.append(ruta.ciudad1)
-            if ruta.ciudad2 not in self.indice_ciudad:
-                self.indice_ciudad[ruta.ciudad2] = len(self.ciudades)
-                self.ciudades.append(ruta.ciudad2)
+        self.matriz = self._construir_matriz()
+    
+    def _construir_matriz(self, condicion: str = "normal") -> List[List[int]]:
+        with _fase("construir_matriz"):
+            return self._llenar_matriz(condicion)
+    
+    def _llenar_matriz(self, condicion: str) -> List[List[int]]:
+        n = len(self.ciudades)
+        infinito = sys.maxsize // 2
+        matriz = [[infinito] * n for _ in range(n)]
+        
+        for i in range(n):
+            matriz[i][i] = 0
+        
+        tabla = self.rutas_originales
+        for i, j, tiempo in zip(tabla.origen, tabla.destino, tabla.tiempos[condicion]):
+            matriz[i][j] = tiempo
+            matriz[j][i] = tiempo
+        return matriz
+    
+    def obtener_matriz(self) -> List[List[int]]:
+        return self.matriz
+    
+    def obtener_matriz_condicion(self, condicion: str) -> List[List[int]]:
+        if condicion not in self.CONDICIONES:
+            raise ValueError(f"Condición climática desconocida: {condicion}")
+        # A diferencia de obtener_matriz, refleja los tiempos de las rutas sin ediciones manuales
+        if condicion not in self._matrices_condicion:
+            self._matrices_condicion[condicion] = self._construir_matriz(condicion)
+        return self._matrices_condicion[condicion]
+    
+    def obtener_ciudades(self) -> List[str]:
+        return self.ciudades.copy()
+    
+    def obtener_rutas_originales(self) -> VistaRutas:
+        return self.rutas_originales.vista()
+    
+    def buscar_ruta(self, ciudad1: str, ciudad2: str) -> Optional[Ruta]:
+        k = self.rutas_originales.buscar(ciudad1, ciudad2)
+        return self.rutas_originales[k] if k != -1 else None
+    
+    def buscar_ciudades(self, prefijo: str, limite: Optional[int] = None) -> List[str]:
+        return self.rutas_originales.ciudades_con_prefijo(prefijo, limite)
+    
+    def _fila_propia(self, i: int) -> List[int]:
+        if self._propias is not None and i not in self._propias:
+            self.matriz[i] = self.matriz[i].copy()
+            self._propias.add(i)
+        return self.matriz[i]
+    
+    def actualizar_ruta(self, ciudad1: str, ciudad2: str, tiempo: int):
+        i = self.indice_ciudad[ciudad1]
+        j = self.indice_ciudad[ciudad2]
+        self._fila_propia(i)[j] = tiempo
+        self._fila_propia(j)[i] = tiempo
+        self.version += 1
+    
+    def obtener_peso(self, ciudad1: str, ciudad2: str) -> int:
+        i = self.indice_ciudad[ciudad1]
+        j = self.indice_ciudad[ciudad2]
+        return self.matriz[i][j]
+    
+    def copiar(self) -> "Grafo":
+        # Copia barata: comparte las filas de la matriz hasta que alguno de los dos las modifique
+        copia = copy.copy(self)
+        copia.rutas_originales = self.rutas_originales.copiar()
+        copia.matriz = list(self.matriz)
+        copia._matrices_condicion = dict(self._matrices_condicion)
+        self._propias = set()
+        copia._propias = set()
+        return copia
+    
+    def esta_cerrada(self, ciudad1: str, ciudad2: str) -> bool:
+        return self.indice_ciudad[ciudad2] in self.cierres.get(self.indice_ciudad[ciudad1], ())
+    
+    def cerrar_rutas(self, pares: List[Tuple[str, str]]) -> List[Tuple[int, int]]:
+        return self._cambiar_cierres(pares, True)
+    
+    def abrir_rutas(self, pares: List[Tuple[str, str]]) -> List[Tuple[int, int]]:
+        return self._cambiar_cierres(pares, False)
+    
+    def _cambiar_cierres(self, pares: List[Tuple[str, str]], cerrar: bool) -> List[Tuple[int, int]]:
+        indices = [(self.indice_ciudad[c1], self.indice_ciudad[c2]) for c1, c2 in pares]
+        self.cierres, cambiadas = _cambiar_cierres(self.cierres, indices, cerrar)
+        if cambiadas:
+            self.version += 1
+            self.version_cierres += 1
+        return cambiadas
+    
+    def obtener_csr(self) -> Tuple[array, array, array]:
+        infinito = sys.maxsize // 2
+        inicio_fila, vecinos, pesos = array('q', [0]), array('q'), array('q')
+        for i, fila in enumerate(_aplicar_cierres(self.matriz, self.cierres)):
+            for j, peso in enumerate(fila):
+                if i != j and peso < infinito:
+                    vecinos.append(j)
+                    pesos.append(peso)
+            inicio_fila.append(len(vecinos))
+        return inicio_fila, vecinos, pesos
+    
+    def agregar_ruta(self, ruta: Ruta) -> bool:
+        infinito = sys.maxsize // 2
+        cantidad = len(self.ciudades)
+        self.rutas_originales.agregar(ruta)
+        self.ciudades = self.rutas_originales.ciudades
+        self.indice_ciudad = self.rutas_originales.indice_ciudad
+        # Se agranda la matriz sin reconstruirla para conservar los cambios previos
+        for n in range(cantidad + 1, len(self.ciudades) + 1):
+            for i in range(len(self.matriz)):
+                self._fila_propia(i).append(infinito)
+            self.matriz.append([infinito] * n)
+            self.matriz[-1][-1] = 0
+        ciudades_nuevas = len(self.ciudades) != cantidad
+        
+        self.version_rutas += 1
+        self._matrices_condicion.clear()
+        self.actualizar_ruta(ruta.ciudad1, ruta.ciudad2, ruta.tiempo_normal)
+        return ciudades_nuevas
+
+class GrafoDisperso:
+    def __init__(self, rutas):
+        self.rutas_originales = rutas if isinstance(rutas, RutaTabla) else RutaTabla.desde_rutas(rutas)
+        self.ciudades = self.rutas_originales.ciudades
+        self.indice_ciudad = self.rutas_originales.indice_ciudad
+        # Lista de adyacencia: por ciudad, un diccionario vecino -> tiempo
+        self.adyacencia: List[Dict[int, int]] = [{} for _ in self.ciudades]
+        self.infinito = sys.maxsize // 2
+        self.version = 0
+        self.version_rutas = 0
+        self._propias = None
+        self.cierres: Dict[int, FrozenSet[int]] = {}
+        self.version_cierres = 0
+        
+        tabla = self.rutas_originales
+        for i, j, tiempo in zip(tabla.origen, tabla.destino, tabla.tiempos["normal"]):
+            self.adyacencia[i][j] = tiempo
+            self.adyacencia[j][i] = tiempo
+    
+    def obtener_ciudades(self) -> List[str]:
+        return self.ciudades.copy()
+    
+    def obtener_rutas_originales(self) -> VistaRutas:
+        return self.rutas_originales.vista()
+    
+    def buscar_ruta(self, ciudad1: str, ciudad2: str) -> Optional[Ruta]:
+        k = self.rutas_originales.buscar(ciudad1, ciudad2)
+        return self.rutas_originales[k] if k != -1 else None
+    
+    def buscar_ciudades(self, prefijo: str, limite: Optional[int] = None) -> List[str]:
+        return self.rutas_originales.ciudades_con_prefijo(prefijo, limite)
+    
+    def _vecinos_propios(self, i: int) -> Dict[int, int]:
+        if self._propias is not None and i not in self._propias:
+            self.adyacencia[i] = dict(self.adyacencia[i])
+            self._propias.add(i)
+        return self.adyacencia[i]
+    
+    def actualizar_ruta(self, ciudad1: str, ciudad2: str, tiempo: int):
+        i = self.indice_ciudad[ciudad1]
+        j = self.indice_ciudad[ciudad2]
+        if tiempo >= self.infinito:
+            # Una ruta bloqueada simplemente deja de ser vecina
+            self._vecinos_propios(i).pop(j, None)
+            self._vecinos_propios(j).pop(i, None)
+        else:
+            self._vecinos_propios(i)[j] = tiempo
+            self._vecinos_propios(j)[i] = tiempo
+        self.version += 1
+    
+    def obtener_peso(self, ciudad1: str, ciudad2: str) -> int:
+        i = self.indice_ciudad[ciudad1]
+        j = self.indice_ciudad[ciudad2]
+        if i == j:
+            return 0
+        return self.adyacencia[i].get(j, self.infinito)
+    
+    def copiar(self) -> "GrafoDisperso":
+        copia = copy.copy(self)
+        copia.rutas_originales = self.rutas_originales.copiar()
+        copia.adyacencia = list(self.adyacencia)
+        self._propias = set()
+        copia._propias = set()
+        return copia
+    
+    def esta_cerrada(self, ciudad1: str, ciudad2: str) -> bool:
+        return self.indice_ciudad[ciudad2] in self.cierres.get(self.indice_ciudad[ciudad1], ())
+    
+    def cerrar_rutas(self, pares: List[Tuple[str, str]]) -> List[Tuple[int, int]]:
+        return self._cambiar_cierres(pares, True)
+    
+    def abrir_rutas(self, pares: List[Tuple[str, str]]) -> List[Tuple[int, int]]:
+        return self._cambiar_cierres(pares, False)
+    
+    def _cambiar_cierres(self, pares: List[Tuple[str, str]], cerrar: bool) -> List[Tuple[int, int]]:
+        indices = [(self.indice_ciudad[c1], self.indice_ciudad[c2]) for c1, c2 in pares]
+        self.cierres, cambiadas = _cambiar_cierres(self.cierres, indices, cerrar)
+        if cambiadas:
+            self.version += 1
+            self.version_cierres += 1
+        return cambiadas
+    
+    def obtener_csr(self) -> Tuple[array, array, array]:
+        inicio_fila, vecinos, pesos = array('q', [0]), array('q'), array('q')
+        for i, adyacentes in enumerate(self.adyacencia):
+            cerradas = self.cierres.get(i, ())
+            for j, peso in adyacentes.items():
+                if j not in cerradas:
+                    vecinos.append(j)
+                    pesos.append(peso)
+            inicio_fila.append(len(vecinos))
+        return inicio_fila, vecinos, pesos
+    
+    def agregar_ruta(self, ruta: Ruta) -> bool:
+        cantidad = len(self.ciudades)
+        self.rutas_originales.agregar(ruta)
+        self.ciudades = self.rutas_originales.ciudades
+        self.indice_ciudad = self.rutas_originales.indice_ciudad
+        self.adyacencia.extend({} for _ in range(len(self.ciudades) - cantidad))
+        i = self.indice_ciudad[ruta.ciudad1]
+        j = self.indice_ciudad[ruta.ciudad2]
+        self._vecinos_propios(i)[j] = ruta.tiempo_normal
+        self._vecinos_propios(j)[i] = ruta.tiempo_normal
+        self.version += 1
+        self.version_rutas += 1
+        return len(self.ciudades) != cantidad
+
+def _dijkstra_filas(inicio_fila, vecinos, pesos, n: int, origenes: range,
+                    distancias, siguiente, infinito: int, tipos: Tuple[str, str]):
+    # Escribe en las tablas planas (fila por origen) el resultado de cada Dijkstra
+    for origen in origenes:
+        distancia = [infinito] * n
+        primer_salto = [-1] * n
+        distancia[origen] = 0
+        cola = [(0, origen)]
+        while cola:
+            d, u = heapq.heappop(cola)
+            if d > distancia[u]:
+                continue
+            salto = -1 if u == origen else primer_salto[u]
+            for k in range(inicio_fila[u], inicio_fila[u + 1]):
+                v = vecinos[k]
+                nueva = d + pesos[k]
+                if nueva < distancia[v]:
+                    distancia[v] = nueva
+                    primer_salto[v] = v if salto == -1 else salto
+                    heapq.heappush(cola, (nueva, v))
+        distancias[origen * n:(origen + 1) * n] = array(tipos[0], distancia)
+        siguiente[origen * n:(origen + 1) * n] = array(tipos[1], primer_salto)
+
+
+_memoria_trabajador = {}
+
+
+def _adjuntar_memoria(nombres: Dict[str, str], n: int, infinito: int, tipos: Tuple[str, str]):
+    for clave, nombre in nombres.items():
+        _memoria_trabajador[clave] = shared_memory.SharedMemory(name=nombre)
+    _memoria_trabajador["n"] = n
+    _memoria_trabajador["infinito"] = infinito
+    _memoria_trabajador["tipos"] = tipos
+
+
+def _resolver_origenes(inicio: int, fin: int):
+    tipos = _memoria_trabajador["tipos"]
+    formatos = {"distancias": tipos[0], "siguiente": tipos[1]}
+    vistas = {clave: _memoria_trabajador[clave].buf.cast(formatos.get(clave, 'q'))
+              for clave in ("inicio_fila", "vecinos", "pesos", "distancias", "siguiente")}
+    try:
+        _dijkstra_filas(vistas["inicio_fila"], vistas["vecinos"], vistas["pesos"],
+                        _memoria_trabajador["n"], range(inicio, fin),
+                        vistas["distancias"], vistas["siguiente"], _memoria_trabajador["infinito"], tipos)
+    finally:
+        for vista in vistas.values():
+            vista.release()
+
+
+def _relajar_bloque(distancias, siguiente, filas: slice, columnas: slice, ks: range):
+    # Relaja el bloque distancias[filas, columnas] pasando por cada k de ks, en orden
+    bloque = distancias[filas, columnas]
+    bloque_siguiente = siguiente[filas, columnas]
+    candidato = np.empty_like(bloque)
+    mejora = np.empty(bloque.shape, dtype=bool)
+    metricas = _metricas
+    mejoras = 0
+    for k in ks:
+        np.add(distancias[filas, k, np.newaxis], distancias[np.newaxis, k, columnas], out=candidato)
+        np.less(candidato, bloque, out=mejora)
+        if mejora.any():
+            if metricas is not None:
+                mejoras += int(np.count_nonzero(mejora))
+            np.minimum(bloque, candidato, out=bloque)
+            np.copyto(bloque_siguiente, siguiente[filas, k, np.newaxis], where=mejora)
+    if metricas is not None:
+        metricas.contar("relajaciones", bloque.size * len(ks))
+        metricas.contar("relajaciones_con_mejora", mejoras)
+
+
+def _a_estrella(vecinos: List[List[Tuple[int, int]]], cota_destino, origen: int, destino: int,
+                nodos_excluidos: set, aristas_excluidas: set, infinito: int) -> Optional[Tuple[int, List[int]]]:
+    # cota_destino[v] es la distancia exacta de v al destino en el grafo completo: quitar
+    # nodos o aristas solo alarga caminos, así que sigue siendo una heurística admisible y consistente
+    distancia = {origen: 0}
+    previo = {origen: -1}
+    cola = [(cota_destino[origen], 0, origen)]
+    while cola:
+        _, d, u = heapq.heappop(cola)
+        if d > distancia[u]:
+            continue
+        if u == destino:
+            ruta = [u]
+            while previo[ruta[-1]] != -1:
+                ruta.append(previo[ruta[-1]])
+            ruta.reverse()
+            return d, ruta
+        for v, peso in vecinos[u]:
+            if v in nodos_excluidos or (u, v) in aristas_excluidas or cota_destino[v] >= infinito:
+                continue
+            nueva = d + peso
+            if nueva < distancia.get(v, infinito):
+                distancia[v] = nueva
+                previo[v] = u
+                heapq.heappush(cola, (nueva + cota_destino[v], nueva, v))
+    return None
+
+
+def _k_rutas_mas_cortas(vecinos: List[List[Tuple[int, int]]], cota_destino, primera: Tuple[int, List[int]],
+                        destino: int, k: int, infinito: int) -> List[Tuple[int, List[int]]]:
+    # Algoritmo de Yen: cada alternativa se desvía de la anterior en algún nodo (spur) y
+    # el tramo nuevo se busca con A* guiado por las distancias ya resueltas
+    pesos = [dict(adyacentes) for adyacentes in vecinos] if k > 1 else []
+    encontradas = [primera]
+    candidatas = []
+    vistas = {tuple(primera[1])}
+    while len(encontradas) < k:
+        _, anterior = encontradas[-1]
+        costo_raiz = 0
+        for i, desvio in enumerate(anterior[:-1]):
+            raiz = anterior[:i + 1]
+            aristas = {(ruta[i], ruta[i + 1]) for _, ruta in encontradas
+                       if len(ruta) > i + 1 and ruta[:i + 1] == raiz}
+            tramo = _a_estrella(vecinos, cota_destino, desvio, destino, set(raiz[:-1]), aristas, infinito)
+            if tramo is not None:
+                ruta = raiz[:-1] + tramo[1]
+                if tuple(ruta) not in vistas:
+                    vistas.add(tuple(ruta))
+                    heapq.heappush(candidatas, (costo_raiz + tramo[0], ruta))
+            costo_raiz += pesos[desvio][anterior[i + 1]]
+        if not candidatas:
+            break
+        encontradas.append(heapq.heappop(candidatas))
+    return encontradas
+
+
+class ArbolRutas:
+    # Los saltos de "siguiente" hacia un mismo destino forman un árbol: dos rutas que
+    # pasan por la misma ciudad comparten todo lo que sigue. Lo ya recorrido se guarda
+    # en tramos de hasta tam_tramo ciudades, enlazados entre sí, y cada ciudad apunta a
+    # (tramo, posición) para que la próxima ruta que llegue a ella no vuelva a caminar
+    def __init__(self, siguiente, destino: int, tam_tramo: int):
+        self.siguiente = siguiente
+        self.destino = destino
+        self.tam_tramo = tam_tramo
+        self._posicion: Dict[int, Tuple[tuple, int]] = {}
+    
+    def iterar(self, origen: int) -> Iterator[int]:
+        # Supone que hay ruta desde origen (siguiente[origen][destino] != -1)
+        posicion = self._posicion.get(origen)
+        if posicion is None:
+            posicion = self._recorrer(origen)
+        tramo, inicio = posicion
+        while tramo is not None:
+            ciudades, enlace = tramo
+            yield from ciudades[inicio:] if inicio else ciudades
+            tramo, inicio = enlace
+    
+    def _recorrer(self, origen: int) -> Tuple[tuple, int]:
+        nuevas = []
+        actual = origen
+        posicion = self._posicion
+        while actual not in posicion:
+            nuevas.append(actual)
+            if actual == self.destino:
+                break
+            actual = int(self.siguiente[actual][self.destino])
+        
+        # Los tramos se arman desde el final para que cada uno enlace con el que le sigue;
+        # si otro lector recorre lo mismo a la vez, ambos resultados son equivalentes
+        enlace = posicion.get(actual, (None, 0))
+        for inicio in reversed(range(0, len(nuevas), self.tam_tramo)):
+            tramo = (tuple(nuevas[inicio:inicio + self.tam_tramo]), enlace)
+            for k, ciudad in enumerate(tramo[0]):
+                posicion[ciudad] = (tramo, k)
+            enlace = (tramo, 0)
+        return enlace
+
+
+class AlgortimoFloyd:
+    def __init__(self, usar_numpy: Optional[bool] = None):
+        self.distancias = []
+        self.siguiente = []
+        self.pesos = []
+        self.infinito = sys.maxsize // 2
+        self.version = None
+        self.tam_cache_rutas = 1024
+        self._cache_rutas = OrderedDict()
+        # Pares por tramo al reconstruir rutas en lote con NumPy
+        self.tam_lote_rutas = 1 << 12
+        # Árboles de tramos por destino (ver ArbolRutas) para rutas muy largas y repetidas;
+        # con tam_tramo = 0 las rutas se recorren directamente sobre la tabla siguiente
+        self.tam_tramo = 0
+        self.tam_cache_arboles = 64
+        self._arboles = OrderedDict()
+        self._vecinos = None
+        # Las tablas se guardan en arreglos tipados (ver _preparar_tipos); dentro
+        # de ellas "sin ruta" se representa con infinito_tabla
+        self.tipo_distancia = 'q'
+        self.tipo_siguiente = 'i'
+        self.infinito_tabla = self.infinito
+        self.cota = 0
+        self._mapa = None
+        # Índice derivado para el centro: (excentricidades, orden) publicado de una vez;
+        # solo se recalculan las filas que cambiaron (None = todas pendientes)
+        self._centralidad = None
+        self._filas_sucias = None
+        # Filas propias de esta instancia; tras copiar() las demás se comparten con
+        # otra instantánea y se copian antes de escribirlas (None = todas propias)
+        self._propias = None
+        # Rutas cerradas con las que se resolvieron las tablas (ver Grafo.cierres)
+        self.cierres: Dict[int, FrozenSet[int]] = {}
+        # Con NumPy, un lote de cambios que toca más de n / divisor filas (o rutas) se
+        # resuelve completo: el Floyd-Warshall vectorizado sale más barato
+        self.divisor_recalculo = 16
+        # Floyd-Warshall por bloques (solo NumPy): lado de cada bloque y cantidad de hilos
+        # (None = uno por CPU); las matrices con n <= tam_bloque se resuelven de una pasada
+        self.tam_bloque = 256
+        self.hilos = None
+        # Por defecto se usa el motor vectorizado si NumPy está instalado
+        self.usar_numpy = np is not None if usar_numpy is None else usar_numpy
+        if self.usar_numpy and np is None:
+            raise ImportError("El motor vectorizado de Floyd-Warshall requiere NumPy")
+    
+    def calcular(self, matriz: List[List[int]], version: Optional[int] = None,
+                 cierres: Optional[Dict[int, FrozenSet[int]]] = None):
+        if version is not None and version == self.version and len(self.distancias) == len(matriz):
+            return
+        
+        self.cierres = cierres or {}
+        with _fase("resolver"):
+            matriz = _aplicar_cierres(matriz, self.cierres)
+            if self.usar_numpy:
+                self._calcular_numpy(matriz)
+            else:
+                self._calcular_python(matriz)
+        self._invalidar_excentricidades()
+        self._propias = None
+        self._marcar_version(version)
+    
+    def _marcar_version(self, version: Optional[int]):
+        self.version = version
+        self._cache_rutas = OrderedDict()
+        self._arboles = OrderedDict()
+        self._vecinos = None
+    
+    def _escribir_fila(self, a: int):
+        # Copia al escribir: la fila pasa a ser propia antes de modificarla
+        if self._propias is None:
+            return
+        if self.usar_numpy:
+            self.distancias = self.distancias.copy()
+            self.siguiente = self.siguiente.copy()
+            self.pesos = self.pesos.copy()
+            self._propias = None
+        elif a not in self._propias:
+            self.distancias[a] = array(self.tipo_distancia, self.distancias[a])
+            self.siguiente[a] = array(self.tipo_siguiente, self.siguiente[a])
+            self.pesos[a] = array(self.tipo_distancia, self.pesos[a])
+            self._propias.add(a)
+    
+    def _preparar_tipos(self, n: int, cota: int):
+        # La cota es la suma de todos los pesos finitos: ningún camino puede
+        # superarla, así que si cabe en int32 las distancias usan 4 bytes.
+        # Con int32 e int16 las tres tablas (distancias, siguiente y pesos) ocupan 10 bytes por celda
+        self.cota = cota
+        if cota < INFINITO_32:
+            self.tipo_distancia, self.infinito_tabla = 'i', INFINITO_32
+        else:
+            self.tipo_distancia, self.infinito_tabla = 'q', self.infinito
+        self.tipo_siguiente = 'h' if n < 2 ** 15 else 'i'
+    
+    def _a_tabla(self, peso: int) -> int:
+        return peso if peso < self.infinito_tabla else self.infinito_tabla
+    
+    def _calcular_python(self, matriz: List[List[int]]):
+        n = len(matriz)
+        self._preparar_tipos(n, sum(peso for fila in matriz for peso in fila if peso < self.infinito))
+        self.pesos = [array(self.tipo_distancia, map(self._a_tabla, fila)) for fila in matriz]
+        self.distancias = [fila[:] for fila in self.pesos]
+        self.siguiente = [array(self.tipo_siguiente, bytes(n * array(self.tipo_siguiente).itemsize))
+                          for _ in range(n)]
+        
+        for i in range(n):
+            for j in range(n):
+                if i != j and self.pesos[i][j] < self.infinito_tabla:
+                    self.siguiente[i][j] = j
+                else:
+                    self.siguiente[i][j] = -1
+        
+        # Algoritmo de Floyd-Warshall
+        mejoras = 0
+        for k in range(n):
+            for i in range(n):
+                for j in range(n):
+                    if self.distancias[i][k] + self.distancias[k][j] < self.distancias[i][j]:
+                        self.distancias[i][j] = self.distancias[i][k] + self.distancias[k][j]
+                        self.siguiente[i][j] = self.siguiente[i][k]
+                        mejoras += 1
+        _contar("relajaciones", n ** 3)
+        _contar("relajaciones_con_mejora", mejoras)
+    
+    def _calcular_numpy(self, matriz: List[List[int]]):
+        n = len(matriz)
+        cota = 0
+        for fila in matriz:
+            fila = np.asarray(fila, dtype=np.int64)
+            cota += int(fila[fila < self.infinito].sum())
+        self._preparar_tipos(n, cota)
+        
+        # Se llena fila por fila para no crear una copia intermedia en int64
+        pesos = np.empty((n, n), dtype=self.tipo_distancia)
+        for i, fila in enumerate(matriz):
+            pesos[i] = np.minimum(np.asarray(fila, dtype=np.int64), self.infinito_tabla)
+        distancias = pesos.copy()
+        
+        conectado = distancias < self.infinito_tabla
+        np.fill_diagonal(conectado, False)
+        siguiente = np.empty((n, n), dtype=self.tipo_siguiente)
+        siguiente[:] = np.arange(n, dtype=self.tipo_siguiente)
+        siguiente[~conectado] = -1
+        del conectado
         
-        self._construir_matriz()
+        if n > self.tam_bloque:
+            self._floyd_por_bloques(distancias, siguiente)
+        else:
+            # Floyd-Warshall: cada k relaja la matriz completa con una sola
+            # operación de broadcasting entre la columna k y la fila k
+            _relajar_bloque(distancias, siguiente, slice(0, n), slice(0, n), range(n))
+        
+        self.pesos = pesos
+        self.distancias = distancias
+        self.siguiente = siguiente
+    
+    def _floyd_por_bloques(self, distancias, siguiente):
+        # Para cada bloque diagonal: primero el propio bloque, después su fila y su columna
+        # de bloques y por último el resto. Dentro de cada fase los bloques no dependen entre
+        # sí y se reparten entre hilos (las operaciones de NumPy liberan el GIL)
+        n = len(distancias)
+        bloques = [slice(inicio, min(inicio + self.tam_bloque, n)) for inicio in range(0, n, self.tam_bloque)]
+        with ThreadPoolExecutor(max_workers=self.hilos or os.cpu_count() or 1) as ejecutor:
+            def fase(tareas):
+                for tarea in [ejecutor.submit(_relajar_bloque, distancias, siguiente, filas, columnas, ks)
+                              for filas, columnas, ks in tareas]:
+                    tarea.result()
+            
+            for kb in bloques:
+                ks = range(kb.start, kb.stop)
+                _relajar_bloque(distancias, siguiente, kb, kb, ks)
+                fase([(kb, b, ks) for b in bloques if b != kb] + [(b, kb, ks) for b in bloques if b != kb])
+                fase([(fb, cb, ks) for fb in bloques if fb != kb for cb in bloques if cb != kb])
+    
+    def calcular_dijkstra_paralelo(self, grafo, procesos: Optional[int] = None):
+        n = len(grafo.ciudades)
+        inicio_fila, vecinos, pesos = grafo.obtener_csr()
+        procesos = max(1, min(procesos or os.cpu_count() or 1, n))
+        self._preparar_tipos(n, sum(pesos))
+        tipos = (self.tipo_distancia, self.tipo_siguiente)
+        tamanos = [n * n * array(tipo).itemsize for tipo in tipos]
+        
+        if procesos == 1:
+            distancias, siguiente = (array(tipo, bytes(tamano)) for tipo, tamano in zip(tipos, tamanos))
+            _dijkstra_filas(inicio_fila, vecinos, pesos, n, range(n), distancias, siguiente,
+                            self.infinito_tabla, tipos)
+            self._cargar_tablas(grafo, n, distancias, siguiente)
+            return
+        
+        # El grafo y las tablas de salida viven en memoria compartida: ninguna
+        # tarea recibe copias, solo el rango de orígenes que le toca resolver
+        datos = {"inicio_fila": inicio_fila, "vecinos": vecinos, "pesos": pesos}
+        memorias = {}
+        try:
+            for clave, arreglo in datos.items():
+                memoria = shared_memory.SharedMemory(create=True, size=max(8, len(arreglo) * 8))
+                memoria.buf[:len(arreglo) * 8] = arreglo.tobytes()
+                memorias[clave] = memoria
+            for clave, tamano in zip(("distancias", "siguiente"), tamanos):
+                memorias[clave] = shared_memory.SharedMemory(create=True, size=max(8, tamano))
+            
+            tam_bloque = max(1, n // (procesos * 4))
+            nombres = {clave: memoria.name for clave, memoria in memorias.items()}
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_adjuntar_memoria,
+                                     initargs=(nombres, n, self.infinito_tabla, tipos)) as ejecutor:
+                tareas = [ejecutor.submit(_resolver_origenes, inicio, min(inicio + tam_bloque, n))
+                          for inicio in range(0, n, tam_bloque)]
+                for tarea in tareas:
+                    tarea.result()
+            
+            self._cargar_tablas(grafo, n, memorias["distancias"].buf[:tamanos[0]].cast(tipos[0]),
+                                memorias["siguiente"].buf[:tamanos[1]].cast(tipos[1]))
+        finally:
+            for memoria in memorias.values():
+                memoria.close()
+                memoria.unlink()
+    
+    def _cargar_tablas(self, grafo, n: int, distancias, siguiente):
+        if self.usar_numpy:
+            self.distancias = np.frombuffer(distancias, dtype=self.tipo_distancia).reshape(n, n).copy()
+            self.siguiente = np.frombuffer(siguiente, dtype=self.tipo_siguiente).reshape(n, n).copy()
+        else:
+            self.distancias = [array(self.tipo_distancia, distancias[i * n:(i + 1) * n]) for i in range(n)]
+            self.siguiente = [array(self.tipo_siguiente, siguiente[i * n:(i + 1) * n]) for i in range(n)]
+        if isinstance(distancias, memoryview):
+            distancias.release()
+            siguiente.release()
+        
+        # Los pesos densos se conservan para las actualizaciones incrementales
+        if isinstance(grafo, Grafo):
+            filas = grafo.obtener_matriz()
+        else:
+            filas = []
+            for i in range(n):
+                fila = [self.infinito_tabla] * n
+                fila[i] = 0
+                for j, peso in grafo.adyacencia[i].items():
+                    fila[j] = peso
+                filas.append(fila)
+        self.cierres = grafo.cierres
+        filas = _aplicar_cierres(filas, self.cierres)
+        self.pesos = [array(self.tipo_distancia, map(self._a_tabla, fila)) for fila in filas]
+        if self.usar_numpy:
+            self.pesos = np.array(self.pesos, dtype=self.tipo_distancia).reshape(n, n)
+        self._invalidar_excentricidades()
+        self._propias = None
+        self._marcar_version(grafo.version)
+    
+    def _ampliar_distancias(self):
+        # Un peso nuevo puede hacer que las distancias ya no quepan en int32
+        anterior = self.infinito_tabla
+        self.tipo_distancia, self.infinito_tabla = 'q', self.infinito
+        if self.usar_numpy:
+            for nombre in ("pesos", "distancias"):
+                tabla = getattr(self, nombre).astype(np.int64)
+                tabla[tabla >= anterior] = self.infinito
+                setattr(self, nombre, tabla)
+        else:
+            for tabla in (self.pesos, self.distancias):
+                for i, fila in enumerate(tabla):
+                    tabla[i] = array('q', (p if p < anterior else self.infinito for p in fila))
+    
+    def actualizar_arista(self, matriz: List[List[int]], i: int, j: int, peso_anterior: int,
+                          version: Optional[int] = None):
+        n = len(matriz)
+        if len(self.distancias) != n:
+            self.calcular(matriz, version, self.cierres)
+            return
+        
+        self._marcar_version(version)
+        if j in self.cierres.get(i, ()):
+            # Mientras la ruta siga cerrada el cambio de peso no afecta a las tablas
+            return
+        peso_nuevo = matriz[i][j]
+        for peso, signo in ((peso_nuevo, 2), (peso_anterior, -2)):
+            if peso < self.infinito:
+                self.cota += signo * peso
+        if self.tipo_distancia == 'i' and self.cota >= INFINITO_32:
+            self._ampliar_distancias()
+        self._escribir_fila(i)
+        self._escribir_fila(j)
+        self.pesos[i][j] = self._a_tabla(peso_nuevo)
+        self.pesos[j][i] = self._a_tabla(peso_nuevo)
+        
+        if peso_nuevo < peso_anterior:
+            # Una arista más barata solo puede mejorar caminos que pasen por ella
+            reducir = self._reducir_arista_numpy if self.usar_numpy else self._reducir_arista_python
+            self._invalidar_excentricidades(reducir(i, j, peso_nuevo))
+            self._invalidar_excentricidades(reducir(j, i, peso_nuevo))
+        elif peso_nuevo > peso_anterior:
+            # Solo se recalculan los orígenes cuyo camino más corto usaba la arista
+            if self.usar_numpy:
+                filas = self._filas_afectadas_numpy(i, j, peso_anterior)
+            else:
+                filas = self._filas_afectadas_python(i, j, peso_anterior)
+            if self._lote_grande(len(filas)):
+                self._resolver_completo(matriz, version)
+            elif filas:
+                vecinos = self._lista_vecinos()
+                for origen in filas:
+                    self._recalcular_fila(origen, vecinos)
+                self._invalidar_excentricidades(filas)
+    
+    def _lote_grande(self, cantidad: int) -> bool:
+        return self.usar_numpy and cantidad > len(self.distancias) // self.divisor_recalculo
+    
+    def _resolver_completo(self, matriz: List[List[int]], version: Optional[int]):
+        self.calcular(matriz, None, self.cierres)
+        self._marcar_version(version)
+    
+    def cerrar_rutas(self, matriz: List[List[int]], pares: List[Tuple[int, int]], version: Optional[int] = None):
+        # Cerrar es subir el peso a infinito; con muchos cierres a la vez primero se juntan
+        # todas las filas afectadas y después cada una se recalcula una sola vez
+        self.cierres, cerradas = _cambiar_cierres(self.cierres, pares, True)
+        if self._lote_grande(len(cerradas)):
+            self._resolver_completo(matriz, version)
+            return
+        self._marcar_version(version)
+        filas = set()
+        for i, j in cerradas:
+            peso_anterior = int(self.pesos[i][j])
+            if peso_anterior >= self.infinito_tabla:
+                continue
+            if self.usar_numpy:
+                filas.update(self._filas_afectadas_numpy(i, j, peso_anterior))
+            else:
+                filas.update(self._filas_afectadas_python(i, j, peso_anterior))
+            self.cota -= 2 * peso_anterior
+            self._escribir_fila(i)
+            self._escribir_fila(j)
+            self.pesos[i][j] = self.infinito_tabla
+            self.pesos[j][i] = self.infinito_tabla
+        
+        if self._lote_grande(len(filas)):
+            self._resolver_completo(matriz, version)
+        elif filas:
+            filas = sorted(filas)
+            vecinos = self._lista_vecinos()
+            for origen in filas:
+                self._recalcular_fila(origen, vecinos)
+            self._invalidar_excentricidades(filas)
+    
+    def abrir_rutas(self, matriz: List[List[int]], pares: List[Tuple[int, int]], version: Optional[int] = None):
+        # Reabrir es bajar el peso desde infinito al de la matriz: solo relajaciones
+        self.cierres, abiertas = _cambiar_cierres(self.cierres, pares, False)
+        if self._lote_grande(len(abiertas)):
+            self._resolver_completo(matriz, version)
+            return
+        self._marcar_version(version)
+        for i, j in abiertas:
+            self.actualizar_arista(matriz, i, j, self.infinito, version)
+    
+    def actualizar_aristas(self, matriz: List[List[int]], pares: List[Tuple[int, int]],
+                           version: Optional[int] = None):
+        # Varias rutas con peso nuevo en matriz a la vez: las filas afectadas por todas las
+        # subidas se juntan y se recalculan una sola vez; después se aplican las bajadas
+        if len(self.distancias) != len(matriz):
+            self.calcular(matriz, version, self.cierres)
+            return
+        subidas, bajadas, filas = [], [], set()
+        for i, j in pares:
+            if i == j or j in self.cierres.get(i, ()):
+                continue
+            peso_anterior = int(self.pesos[i][j])
+            peso_nuevo = self._a_tabla(matriz[i][j])
+            if peso_nuevo > peso_anterior:
+                subidas.append((i, j, peso_anterior))
+                if peso_anterior < self.infinito_tabla:
+                    if self.usar_numpy:
+                        filas.update(self._filas_afectadas_numpy(i, j, peso_anterior))
+                    else:
+                        filas.update(self._filas_afectadas_python(i, j, peso_anterior))
+            elif peso_nuevo < peso_anterior:
+                bajadas.append((i, j, peso_anterior))
+        if self._lote_grande(len(filas)):
+            self._resolver_completo(matriz, version)
+            return
+        
+        self._marcar_version(version)
+        for i, j, peso_anterior in subidas + bajadas:
+            for peso, signo in ((matriz[i][j], 2), (peso_anterior, -2)):
+                if peso < self.infinito_tabla:
+                    self.cota += signo * peso
+        if self.tipo_distancia == 'i' and self.cota >= INFINITO_32:
+            self._ampliar_distancias()
+        for i, j, _ in subidas + bajadas:
+            self._escribir_fila(i)
+            self._escribir_fila(j)
+            self.pesos[i][j] = self._a_tabla(matriz[i][j])
+            self.pesos[j][i] = self._a_tabla(matriz[i][j])
+        
+        if filas:
+            filas = sorted(filas)
+            vecinos = self._lista_vecinos()
+            for origen in filas:
+                self._recalcular_fila(origen, vecinos)
+            self._invalidar_excentricidades(filas)
+        reducir = self._reducir_arista_numpy if self.usar_numpy else self._reducir_arista_python
+        for i, j, _ in bajadas:
+            peso = int(self.pesos[i][j])
+            self._invalidar_excentricidades(reducir(i, j, peso))
+            self._invalidar_excentricidades(reducir(j, i, peso))
+    
+    def _reducir_arista_python(self, u: int, v: int, peso: int) -> List[int]:
+        n = len(self.distancias)
+        infinito = self.infinito_tabla
+        fila_v = self.distancias[v]
+        cambiadas = []
+        for a in range(n):
+            hasta_u = self.distancias[a][u]
+            if hasta_u >= infinito:
+                continue
+            salto = v if a == u else self.siguiente[a][u]
+            base = hasta_u + peso
+            fila = self.distancias[a]
+            cambio = False
+            for b in range(n):
+                if fila_v[b] < infinito and base + fila_v[b] < fila[b]:
+                    if not cambio:
+                        self._escribir_fila(a)
+                        fila, fila_siguiente = self.distancias[a], self.siguiente[a]
+                        cambio = True
+                    fila[b] = base + fila_v[b]
+                    fila_siguiente[b] = salto
+            if cambio:
+                cambiadas.append(a)
+        return cambiadas
+    
+    def _reducir_arista_numpy(self, u: int, v: int, peso: int) -> List[int]:
+        filas = np.flatnonzero(self.distancias[:, u] < self.infinito_tabla)
+        columnas = np.flatnonzero(self.distancias[v, :] < self.infinito_tabla)
+        if filas.size == 0 or columnas.size == 0:
+            return []
+        
+        candidato = (self.distancias[filas, u] + peso)[:, np.newaxis] + self.distancias[v, columnas][np.newaxis, :]
+        bloque = np.ix_(filas, columnas)
+        actual = self.distancias[bloque]
+        mejora = candidato < actual
+        if not mejora.any():
+            return []
+        
+        saltos = self.siguiente[filas, u].copy()
+        saltos[filas == u] = v
+        self._escribir_fila(u)
+        self.distancias[bloque] = np.where(mejora, candidato, actual)
+        self.siguiente[bloque] = np.where(mejora, saltos[:, np.newaxis], self.siguiente[bloque])
+        return filas[mejora.any(axis=1)].tolist()
+    
+    def _filas_afectadas_python(self, i: int, j: int, peso_anterior: int) -> List[int]:
+        infinito = self.infinito_tabla
+        filas = []
+        for a, fila in enumerate(self.distancias):
+            for u, v in ((i, j), (j, i)):
+                hasta_u = fila[u]
+                if hasta_u >= infinito:
+                    continue
+                base = hasta_u + peso_anterior
+                fila_v = self.distancias[v]
+                if any(fila_v[b] < infinito and base + fila_v[b] == fila[b] for b in range(len(fila))):
+                    filas.append(a)
+                    break
+        return filas
+    
+    def _filas_afectadas_numpy(self, i: int, j: int, peso_anterior: int) -> List[int]:
+        afectadas = np.zeros(len(self.distancias), dtype=bool)
+        for u, v in ((i, j), (j, i)):
+            filas = np.flatnonzero(self.distancias[:, u] < self.infinito_tabla)
+            columnas = np.flatnonzero(self.distancias[v, :] < self.infinito_tabla)
+            if filas.size == 0 or columnas.size == 0:
+                continue
+            candidato = (self.distancias[filas, u] + peso_anterior)[:, np.newaxis] + self.distancias[v, columnas][np.newaxis, :]
+            usa_arista = (candidato == self.distancias[np.ix_(filas, columnas)]).any(axis=1)
+            afectadas[filas[usa_arista]] = True
+        return np.flatnonzero(afectadas).tolist()
+    
+    def _lista_vecinos(self) -> List[List[Tuple[int, int]]]:
+        n = len(self.pesos)
+        if self.usar_numpy:
+            existe = self.pesos < self.infinito_tabla
+            np.fill_diagonal(existe, False)
+            filas, columnas = np.nonzero(existe)
+            pesos = self.pesos[filas, columnas].tolist()
+            vecinos = [[] for _ in range(n)]
+            for u, v, peso in zip(filas.tolist(), columnas.tolist(), pesos):
+                vecinos[u].append((v, peso))
+            return vecinos
+        return [[(v, peso) for v, peso in enumerate(fila) if v != u and peso < self.infinito_tabla]
+                for u, fila in enumerate(self.pesos)]
+    
+    def _recalcular_fila(self, origen: int, vecinos: List[List[Tuple[int, int]]]):
+        # Dijkstra desde el origen sobre los pesos actuales
+        n = len(self.distancias)
+        distancia = [self.infinito_tabla] * n
+        primer_salto = [-1] * n
+        distancia[origen] = 0
+        cola = [(0, origen)]
+        
+        while cola:
+            d, u = heapq.heappop(cola)
+            if d > distancia[u]:
+                continue
+            for v, peso in vecinos[u]:
+                nueva = d + peso
+                if nueva < distancia[v]:
+                    distancia[v] = nueva
+                    primer_salto[v] = v if u == origen else primer_salto[u]
+                    heapq.heappush(cola, (nueva, v))
+        
+        if self.usar_numpy:
+            self._escribir_fila(origen)
+            self.distancias[origen, :] = distancia
+            self.siguiente[origen, :] = primer_salto
+        else:
+            self.distancias[origen] = array(self.tipo_distancia, distancia)
+            self.siguiente[origen] = array(self.tipo_siguiente, primer_salto)
+    
+    def _invalidar_excentricidades(self, filas: Optional[List[int]] = None):
+        if filas is None:
+            self._filas_sucias = None
+        elif filas and self._filas_sucias is not None:
+            self._filas_sucias = self._filas_sucias | set(filas)
+    
+    def _centralidad_vigente(self):
+        # Los lectores nunca modifican el índice publicado: arman uno nuevo y lo reemplazan
+        centralidad, sucias = self._centralidad, self._filas_sucias
+        if centralidad is not None and sucias is not None and not sucias:
+            return centralidad
+        
+        n = len(self.distancias)
+        if centralidad is None or sucias is None or len(centralidad[0]) != n:
+            excentricidades = np.zeros(n, dtype=np.int64) if self.usar_numpy else array('q', bytes(8 * n))
+            filas = list(range(n))
+        else:
+            excentricidades = copy.copy(centralidad[0])
+            filas = sorted(sucias)
+        
+        # Excentricidad = mayor distancia finita desde la ciudad (las inalcanzables se ignoran)
+        if self.usar_numpy:
+            for inicio in range(0, len(filas), 1024):
+                bloque = filas[inicio:inicio + 1024]
+                distancias = self.distancias[bloque]
+                excentricidades[bloque] = np.where(distancias < self.infinito_tabla, distancias, 0).max(axis=1)
+            orden = np.argsort(excentricidades, kind="stable").tolist()
+        else:
+            for a in filas:
+                excentricidades[a] = max((d for d in self.distancias[a] if d < self.infinito_tabla), default=0)
+            orden = sorted(range(n), key=excentricidades.__getitem__)
+        
+        self._centralidad = (excentricidades, orden)
+        self._filas_sucias = set()
+        return self._centralidad
+    
+    def obtener_excentricidad(self, i: int) -> int:
+        excentricidades, _ = self._centralidad_vigente()
+        return int(excentricidades[i])
+    
+    def obtener_centro(self) -> Tuple[int, int]:
+        excentricidades, orden = self._centralidad_vigente()
+        if not orden:
+            return -1, 0
+        return orden[0], int(excentricidades[orden[0]])
+    
+    def obtener_mas_centrales(self, k: int) -> List[Tuple[int, int]]:
+        excentricidades, orden = self._centralidad_vigente()
+        return [(i, int(excentricidades[i])) for i in orden[:k]]
+    
+    def obtener_distancia(self, i: int, j: int) -> int:
+        distancia = int(self.distancias[i][j])
+        return self.infinito if distancia >= self.infinito_tabla else distancia
+    
+    def obtener_ruta_indices(self, origen: int, destino: int) -> List[int]:
+        if self.siguiente[origen][destino] == -1:
+            return []
+        if self.tam_tramo:
+            return list(self._arbol(destino).iterar(origen))
+        
+        ruta = []
+        actual = origen
+        while actual != destino:
+            ruta.append(actual)
+            actual = int(self.siguiente[actual][destino])
+        ruta.append(destino)
+        return ruta
+    
+    def iterar_ruta(self, origen: int, destino: int) -> Iterator[int]:
+        # Recorre la ruta a medida que se consume, sin armar la lista completa
+        if self.siguiente[origen][destino] == -1:
+            return iter(())
+        if self.tam_tramo:
+            return self._arbol(destino).iterar(origen)
+        return self._recorrer_siguiente(origen, destino)
+    
+    def iterar_ruta_ciudades(self, origen: int, destino: int, ciudades: List[str]) -> Iterator[str]:
+        return map(ciudades.__getitem__, self.iterar_ruta(origen, destino))
+    
+    def _recorrer_siguiente(self, origen: int, destino: int) -> Iterator[int]:
+        siguiente = self.siguiente
+        actual = origen
+        while actual != destino:
+            yield actual
+            actual = int(siguiente[actual][destino])
+        yield destino
+    
+    def _arbol(self, destino: int) -> ArbolRutas:
+        arboles = self._arboles
+        arbol = arboles.get(destino)
+        if arbol is not None:
+            _contar("arboles_rutas_aciertos")
+            try:
+                arboles.move_to_end(destino)
+            except KeyError:
+                pass
+            return arbol
+        
+        arbol = arboles[destino] = ArbolRutas(self.siguiente, destino, self.tam_tramo)
+        while len(arboles) > self.tam_cache_arboles:
+            try:
+                arboles.popitem(last=False)
+            except KeyError:
+                break
+        return arbol
+    
+    def obtener_k_rutas(self, origen: int, destino: int, k: int) -> List[Tuple[int, List[int]]]:
+        ruta = self.obtener_ruta_indices(origen, destino)
+        if k <= 0 or not ruta:
+            return []
+        vecinos = self._vecinos_vigentes()
+        # Grafo no dirigido: la fila del destino da la distancia de cada ciudad hasta él
+        cota_destino = self.distancias[destino].tolist() if self.usar_numpy else self.distancias[destino]
+        return _k_rutas_mas_cortas(vecinos, cota_destino, (self.obtener_distancia(origen, destino), ruta),
+                                   destino, k, self.infinito_tabla)
+    
+    def _vecinos_vigentes(self) -> List[List[Tuple[int, int]]]:
+        # Lista de adyacencia derivada de los pesos, reutilizada mientras las tablas no cambien
+        vecinos = self._vecinos
+        if vecinos is None:
+            vecinos = self._vecinos = self._lista_vecinos()
+        return vecinos
+    
+    def consultar_lote(self, origenes, destinos, con_rutas: bool = True) \
+            -> Tuple[List[int], Optional[List[List[int]]]]:
+        # Índices -1 (ciudad desconocida) se responden como "sin ruta"
+        with _fase("consultar_lote"):
+            return self._consultar_lote(origenes, destinos, con_rutas)
+    
+    def _consultar_lote(self, origenes, destinos, con_rutas: bool) \
+            -> Tuple[List[int], Optional[List[List[int]]]]:
+        if self.usar_numpy:
+            return self._consultar_lote_numpy(origenes, destinos, con_rutas)
+        
+        distancias = []
+        rutas = [] if con_rutas else None
+        vistas = {}
+        for origen, destino in zip(origenes, destinos):
+            if origen < 0 or destino < 0:
+                distancias.append(self.infinito)
+                if con_rutas:
+                    rutas.append([])
+                continue
+            distancias.append(self.obtener_distancia(origen, destino))
+            if con_rutas:
+                clave = (origen, destino)
+                if clave not in vistas:
+                    vistas[clave] = self.obtener_ruta_indices(origen, destino)
+                rutas.append(list(vistas[clave]))
+        return distancias, rutas
+    
+    def _consultar_lote_numpy(self, origenes, destinos, con_rutas: bool) \
+            -> Tuple[List[int], Optional[List[List[int]]]]:
+        origenes = np.asarray(origenes, dtype=np.intp).reshape(-1)
+        destinos = np.asarray(destinos, dtype=np.intp).reshape(-1)
+        validos = (origenes >= 0) & (destinos >= 0)
+        origenes = np.where(validos, origenes, 0)
+        destinos = np.where(validos, destinos, 0)
+        
+        distancias = self.distancias[origenes, destinos].astype(np.int64) if validos.size else np.zeros(0, np.int64)
+        sin_ruta = ~validos | (distancias >= self.infinito_tabla)
+        distancias[sin_ruta] = self.infinito
+        if not con_rutas:
+            return distancias.tolist(), None
+        
+        # Todas las rutas avanzan un salto por iteración sobre la tabla siguiente; los pares que
+        # llegan a su destino salen del tramo, así que cada paso guarda solo a los que siguen
+        # y la memoria queda proporcional a la suma de los largos, no a la ruta más larga
+        rutas = [[] for _ in range(len(origenes))]
+        con_camino = np.flatnonzero(~sin_ruta & (self.siguiente[origenes, destinos] != -1))
+        for inicio in range(0, con_camino.size, self.tam_lote_rutas):
+            pares = con_camino[inicio:inicio + self.tam_lote_rutas]
+            activos = np.arange(pares.size)
+            actual = origenes[pares]
+            destino = destinos[pares]
+            ids, nodos = [activos], [actual]
+            while activos.size:
+                sigue = actual != destino
+                activos, actual, destino = activos[sigue], actual[sigue], destino[sigue]
+                actual = self.siguiente[actual, destino].astype(np.intp)
+                ids.append(activos)
+                nodos.append(actual)
+            ids = np.concatenate(ids)
+            nodos = np.concatenate(nodos)[np.argsort(ids, kind="stable")]
+            cortes = np.cumsum(np.bincount(ids, minlength=pares.size))[:-1]
+            for k, ruta in zip(pares.tolist(), np.split(nodos, cortes)):
+                rutas[k] = ruta.tolist()
+        return distancias.tolist(), rutas
+    
+    def copiar(self) -> "AlgortimoFloyd":
+        # Las filas quedan compartidas entre ambas instancias hasta que alguna las modifique
+        copia = copy.copy(self)
+        if not self.usar_numpy:
+            copia.distancias = list(self.distancias)
+            copia.siguiente = list(self.siguiente)
+            copia.pesos = list(self.pesos)
+        self._propias = set()
+        copia._propias = set()
+        copia._cache_rutas = OrderedDict()
+        copia._arboles = OrderedDict()
+        return copia
+    
+    def guardar(self, ruta_archivo: str, ciudades: List[str], huella: bytes):
+        nombres = "\n".join(ciudades).encode("utf-8")
+        encabezado = struct.pack(FORMATO_TABLAS, MAGIA_TABLAS, sys.byteorder[0].encode(),
+                                 self.tipo_distancia.encode(), self.tipo_siguiente.encode(),
+                                 len(ciudades), self.infinito_tabla, self.cota, huella, len(nombres))
+        # Se escribe en un temporal y se renombra para no romper a quien ya tenga mapeado el archivo
+        temporal = f"{ruta_archivo}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(encabezado)
+            archivo.write(nombres)
+            for tabla in (self.distancias, self.siguiente):
+                archivo.write(bytes(-archivo.tell() % 8))
+                for fila in tabla:
+                    archivo.write(fila)
+        os.replace(temporal, ruta_archivo)
+    
+    def cargar(self, ruta_archivo: str, matriz: List[List[int]], ciudades: List[str], huella: bytes,
+               version: Optional[int] = None) -> bool:
+        try:
+            with open(ruta_archivo, "rb") as archivo:
+                # ACCESS_COPY: las páginas se comparten entre procesos mientras nadie las modifique
+                mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return False
+        
+        # Un archivo truncado, con tipos desconocidos o nombres ilegibles se trata como uno
+        # desactualizado: se devuelve False y main vuelve a resolver y a guardarlo
+        try:
+            tablas = self._leer_tablas(mapa, matriz, ciudades, huella)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            tablas = None
+        if tablas is None:
+            mapa.close()
+            return False
+        tipo_distancia, tipo_siguiente, infinito_tabla, cota, tablas = tablas
+        self.tipo_distancia = tipo_distancia
+        self.tipo_siguiente = tipo_siguiente
+        self.infinito_tabla = infinito_tabla
+        self.cota = cota
+        self.distancias, self.siguiente = tablas
+        self._mapa = mapa
+        self.cierres = {}
+        
+        self.pesos = [array(self.tipo_distancia, map(self._a_tabla, fila)) for fila in matriz]
+        if self.usar_numpy:
+            self.pesos = np.array(self.pesos, dtype=self.tipo_distancia).reshape(len(matriz), len(matriz))
+        self._invalidar_excentricidades()
+        self._propias = None
+        self._marcar_version(version)
+        return True
+    
+    def _leer_tablas(self, mapa, matriz: List[List[int]], ciudades: List[str], huella: bytes):
+        tam_encabezado = struct.calcsize(FORMATO_TABLAS)
+        if len(mapa) < tam_encabezado:
+            return None
+        (magia, orden, tipo_distancia, tipo_siguiente, n, infinito_tabla, cota, huella_guardada,
+         largo_nombres) = struct.unpack_from(FORMATO_TABLAS, mapa)
+        tipo_distancia, tipo_siguiente = tipo_distancia.decode(), tipo_siguiente.decode()
+        if (magia != MAGIA_TABLAS or orden != sys.byteorder[0].encode() or huella_guardada != huella
+                or n != len(ciudades) or n != len(matriz)
+                or tipo_distancia not in ('i', 'q') or tipo_siguiente not in ('h', 'i')):
+            return None
+        
+        # Encabezado, nombres y cada tabla alineada a 8 bytes, como en guardar
+        desplazamientos = []
+        desplazamiento = tam_encabezado + largo_nombres
+        for tipo in (tipo_distancia, tipo_siguiente):
+            desplazamiento += -desplazamiento % 8
+            desplazamientos.append(desplazamiento)
+            desplazamiento += n * n * array(tipo).itemsize
+        if len(mapa) < desplazamiento:
+            return None
+        nombres = mapa[tam_encabezado:tam_encabezado + largo_nombres].decode("utf-8")
+        if (nombres.split("\n") if n else []) != list(ciudades):
+            return None
+        
+        tablas = []
+        for tipo, desplazamiento in zip((tipo_distancia, tipo_siguiente), desplazamientos):
+            if self.usar_numpy:
+                tablas.append(np.frombuffer(mapa, dtype=tipo, count=n * n, offset=desplazamiento).reshape(n, n))
+            else:
+                vista = memoryview(mapa)[desplazamiento:desplazamiento + n * n * array(tipo).itemsize].cast(tipo)
+                tablas.append([vista[i * n:(i + 1) * n] for i in range(n)])
+        return tipo_distancia, tipo_siguiente, infinito_tabla, cota, tablas
+    
+    def obtener_ruta_ciudades(self, origen: int, destino: int, ciudades: List[str]) -> List[str]:
+        clave = (origen, destino)
+        cache = self._cache_rutas
+        ruta = cache.get(clave)
+        if ruta is not None:
+            _contar("cache_rutas_aciertos")
+            try:
+                cache.move_to_end(clave)
+            except KeyError:
+                # Otro lector la desalojó en el medio; la ruta leída sigue siendo válida
+                pass
+            return list(ruta)
+        
+        _contar("cache_rutas_fallos")
+        with _fase("reconstruir_rutas"):
+            ruta = tuple(ciudades[i] for i in self.obtener_ruta_indices(origen, destino))
+        cache[clave] = ruta
+        while len(cache) > self.tam_cache_rutas:
+            try:
+                cache.popitem(last=False)
+            except KeyError:
+                break
+        return list(ruta)
+
+# Nombre con el que el resto del proyecto (main y las pruebas) importa el solver
+AlgoritmoFloyd = AlgortimoFloyd
+
+
+class AlgoritmoDijkstra:
+    def __init__(self, grafo: GrafoDisperso):
+        self.grafo = grafo
+        self.infinito = sys.maxsize // 2
+        # Última fuente resuelta por completo, reutilizada mientras el grafo no cambie.
+        # Se guarda como una sola tupla para que un lector nunca vea mitades de dos búsquedas
+        self._ultima = (None, None, [], [])
+        # Última consulta puntual (origen, destino, versión, distancias, previos): la búsqueda se
+        # cortó al llegar al destino, así que solo la distancia a ese destino es definitiva
+        self._punto = (None, None, None, [], [])
+        self._centralidad = (None, [], [])
+    
+    def _buscar(self, origen: int, destino: Optional[int] = None) -> Tuple[List[int], List[int]]:
+        n = len(self.grafo.ciudades)
+        distancia = [self.infinito] * n
+        previo = [-1] * n
+        distancia[origen] = 0
+        cola = [(0, origen)]
+        
+        while cola:
+            d, u = heapq.heappop(cola)
+            if d > distancia[u]:
+                continue
+            if u == destino:
+                break
+            cerradas = self.grafo.cierres.get(u, ())
+            for v, peso in self.grafo.adyacencia[u].items():
+                if v in cerradas:
+                    continue
+                nueva = d + peso
+                if nueva < distancia[v]:
+                    distancia[v] = nueva
+                    previo[v] = u
+                    heapq.heappush(cola, (nueva, v))
+        return distancia, previo
+    
+    def calcular_desde(self, origen: int) -> Tuple[List[int], List[int]]:
+        ultimo_origen, version, distancias, previo = self._ultima
+        if ultimo_origen != origen or version != self.grafo.version:
+            distancias, previo = self._buscar(origen)
+            self._ultima = (origen, self.grafo.version, distancias, previo)
+        return distancias, previo
+    
+    def obtener_distancia(self, i: int, j: int) -> int:
+        punto = self._punto
+        if punto[:3] == (i, j, self.grafo.version):
+            return punto[3][j]
+        distancias, _ = self.calcular_desde(i)
+        return distancias[j]
+    
+    def obtener_ruta_indices(self, origen: int, destino: int) -> List[int]:
+        ultimo_origen, version, distancia, previo = self._ultima
+        if ultimo_origen != origen or version != self.grafo.version:
+            punto = self._punto
+            if punto[:3] == (origen, destino, self.grafo.version):
+                distancia, previo = punto[3], punto[4]
+            else:
+                distancia, previo = self._buscar(origen, destino)
+                self._punto = (origen, destino, self.grafo.version, distancia, previo)
+        
+        if origen == destino or distancia[destino] >= self.infinito:
+            return []
+        
+        ruta = [destino]
+        while ruta[-1] != origen:
+            ruta.append(previo[ruta[-1]])
+        ruta.reverse()
+        return ruta
+    
+    def iterar_ruta(self, origen: int, destino: int) -> Iterator[int]:
+        # La búsqueda arma la ruta de atrás hacia adelante, así que aquí no hay nada que diferir
+        return iter(self.obtener_ruta_indices(origen, destino))
+    
+    def iterar_ruta_ciudades(self, origen: int, destino: int, ciudades: List[str]) -> Iterator[str]:
+        return map(ciudades.__getitem__, self.iterar_ruta(origen, destino))
+    
+    def consultar_lote(self, origenes, destinos, con_rutas: bool = True) \
+            -> Tuple[List[int], Optional[List[List[int]]]]:
+        origenes = list(origenes)
+        destinos = list(destinos)
+        distancias = [self.infinito] * len(origenes)
+        rutas = [[] for _ in origenes] if con_rutas else None
+        # Agrupar por origen: una sola búsqueda completa por ciudad de partida
+        for k in sorted(range(len(origenes)), key=origenes.__getitem__):
+            origen, destino = origenes[k], destinos[k]
+            if origen < 0 or destino < 0:
+                continue
+            distancias[k] = self.obtener_distancia(origen, destino)
+            if con_rutas:
+                rutas[k] = self.obtener_ruta_indices(origen, destino)
+        return distancias, rutas
+    
+    def obtener_ruta_ciudades(self, origen: int, destino: int, ciudades: List[str]) -> List[str]:
+        return [ciudades[i] for i in self.obtener_ruta_indices(origen, destino)]
+    
+    def obtener_k_rutas(self, origen: int, destino: int, k: int) -> List[Tuple[int, List[int]]]:
+        if k <= 0 or origen == destino:
+            return []
+        # Sin tablas de todos los pares, la heurística sale de una sola búsqueda desde el destino
+        cota_destino, previo = self._buscar(destino)
+        if cota_destino[origen] >= self.infinito:
+            return []
+        ruta = [origen]
+        while ruta[-1] != destino:
+            ruta.append(previo[ruta[-1]])
+        vecinos = [[(v, peso) for v, peso in adyacentes.items() if v not in self.grafo.cierres.get(u, ())]
+                   for u, adyacentes in enumerate(self.grafo.adyacencia)]
+        return _k_rutas_mas_cortas(vecinos, cota_destino, (cota_destino[origen], ruta), destino, k, self.infinito)
+    
+    def _centralidad_vigente(self) -> Tuple[List[int], List[int]]:
+        # Sin tablas de todos los pares: una pasada de Dijkstra por ciudad, una vez por versión
+        version, excentricidades, orden = self._centralidad
+        if version != self.grafo.version:
+            excentricidades = [max((d for d in self._buscar(origen)[0] if d < self.infinito), default=0)
+                               for origen in range(len(self.grafo.ciudades))]
+            orden = sorted(range(len(excentricidades)), key=excentricidades.__getitem__)
+            self._centralidad = (self.grafo.version, excentricidades, orden)
+        return excentricidades, orden
+    
+    def obtener_centro(self) -> Tuple[int, int]:
+        excentricidades, orden = self._centralidad_vigente()
+        if not orden:
+            return -1, 0
+        return orden[0], excentricidades[orden[0]]
+    
+    def obtener_mas_centrales(self, k: int) -> List[Tuple[int, int]]:
+        excentricidades, orden = self._centralidad_vigente()
+        return [(i, excentricidades[i]) for i in orden[:k]]
+
+
+class JerarquiaContraccion:
+    # Jerarquía de contracción "personalizable": el orden de contracción y los atajos
+    # dependen solo de qué ciudades están unidas, no de los tiempos. Los pesos se
+    # calculan aparte (personalizar), así que un cambio de clima, de tiempos o de
+    # cierres vuelve a pesar los atajos sin repetir el preprocesamiento
+    def __init__(self, usar_numpy: Optional[bool] = None):
+        self.infinito = sys.maxsize // 2
+        self.n = 0
+        # Ciudades en orden de contracción y posición de cada una en ese orden
+        self.orden = array('i')
+        self.rango = array('i')
+        # Arcos hacia arriba en formato CSR: los de la ciudad v van de inicio[v] a inicio[v + 1],
+        # ordenados por rango; cada par (ciudad baja, ciudad alta) tiene un solo arco
+        self.inicio = array('q', [0])
+        self.cabeza = array('i')
+        self._indice_arco: Dict[Tuple[int, int], int] = {}
+        self._claves = None
+        # Métrica publicada de una vez para que los lectores no mezclen pesos de dos versiones:
+        # (peso, medio, grafo de consulta, versión). medio[a] es la ciudad por la que pasa el
+        # atajo a (-1 = ruta directa) y el grafo de consulta tiene solo los arcos necesarios
+        self._metrica = (array('q'), array('i'), (array('q', [0]), array('i'), array('q')), None)
+        self.version_rutas = None
+        self.rutas_topologia = 0
+        self.usar_numpy = np is not None if usar_numpy is None else usar_numpy
+        if self.usar_numpy and np is None:
+            raise ImportError("La personalización vectorizada requiere NumPy")
+    
+    def preprocesar(self, grafo):
+        tabla = grafo.rutas_originales
+        n = len(grafo.ciudades)
+        with _fase("contraer"):
+            vecinos = [set() for _ in range(n)]
+            for i, j in zip(tabla.origen, tabla.destino):
+                if i != j:
+                    vecinos[i].add(j)
+                    vecinos[j].add(i)
+            self._contraer(vecinos)
+        self.rutas_topologia = len(tabla)
+        self.version_rutas = grafo.version_rutas
+        self.personalizar_grafo(grafo)
+    
+    def _contraer(self, vecinos: List[set]):
+        # Orden de grado mínimo: se elimina siempre la ciudad con menos vecinos vigentes y
+        # sus vecinos quedan unidos entre sí (los atajos); las entradas viejas del montículo se descartan
+        n = len(vecinos)
+        monticulo = [(len(adyacentes), v) for v, adyacentes in enumerate(vecinos)]
+        heapq.heapify(monticulo)
+        eliminada = bytearray(n)
+        orden = array('i')
+        superiores = [None] * n
+        while monticulo:
+            grado, v = heapq.heappop(monticulo)
+            if eliminada[v] or grado != len(vecinos[v]):
+                continue
+            eliminada[v] = 1
+            orden.append(v)
+            superiores[v] = adyacentes = vecinos[v]
+            for u in adyacentes:
+                vecinos_u = vecinos[u]
+                vecinos_u.discard(v)
+                vecinos_u |= adyacentes
+                vecinos_u.discard(u)
+                heapq.heappush(monticulo, (len(vecinos_u), u))
+        
+        rango = array('i', bytes(4 * n))
+        for posicion, v in enumerate(orden):
+            rango[v] = posicion
+        inicio, cabeza = array('q', [0]), array('i')
+        for v in range(n):
+            cabeza.extend(sorted(superiores[v], key=rango.__getitem__))
+            inicio.append(len(cabeza))
+        self._instalar(n, orden, rango, inicio, cabeza)
+    
+    def _instalar(self, n: int, orden: array, rango: array, inicio: array, cabeza: array):
+        self.n = n
+        self.orden, self.rango, self.inicio, self.cabeza = orden, rango, inicio, cabeza
+        self._indice_arco = {(v, cabeza[a]): a for v in range(n) for a in range(inicio[v], inicio[v + 1])}
+        self.padre = array('i', (cabeza[inicio[v]] if inicio[v] < inicio[v + 1] else -1 for v in range(n)))
+        self._claves = None
+    
+    def _arco(self, u: int, w: int) -> int:
+        return self._indice_arco[(u, w) if self.rango[u] < self.rango[w] else (w, u)]
+    
+    def _buscar_arco(self, u: int, w: int) -> Optional[int]:
+        try:
+            return self._arco(u, w)
+        except KeyError:
+            return None
+    
+    def personalizar(self, origen, destino, pesos, version=None):
+        # Pesos de las rutas (i, j, peso); las que no aparecen quedan cerradas
+        with _fase("personalizar"):
+            peso = array('q', [self.infinito]) * len(self.cabeza)
+            medio = array('i', [-1]) * len(self.cabeza)
+            for i, j, p in zip(origen, destino, pesos):
+                if i != j:
+                    a = self._arco(i, j)
+                    if p < peso[a]:
+                        peso[a] = p
+            
+            if self.usar_numpy:
+                peso, medio, perfecto = self._personalizar_numpy(peso, medio)
+            else:
+                perfecto = self._personalizar_python(peso, medio)
+            consulta = self._grafo_consulta(peso, perfecto)
+        self._metrica = (peso, medio, consulta, version)
+    
+    def _personalizar_python(self, peso: array, medio: array) -> array:
+        # Triángulos inferiores en orden de contracción: cuando se procesa x, sus propios arcos
+        # ya tienen el peso final porque solo dependen de ciudades contraídas antes. Así cada
+        # arco queda con el mejor camino que pasa solo por ciudades más bajas que sus extremos
+        inicio, cabeza, indice_arco, infinito = self.inicio, self.cabeza, self._indice_arco, self.infinito
+        for x in self.orden:
+            arcos = range(inicio[x], inicio[x + 1])
+            for k, a in enumerate(arcos):
+                peso_a = peso[a]
+                if peso_a >= infinito:
+                    continue
+                u = cabeza[a]
+                for b in arcos[k + 1:]:
+                    candidato = peso_a + peso[b]
+                    arco = indice_arco[u, cabeza[b]]
+                    if candidato < peso[arco]:
+                        peso[arco] = candidato
+                        medio[arco] = x
+        
+        # Pasada perfecta, de arriba hacia abajo: se completa con los caminos que suben por
+        # encima de x. Los arcos que así mejoran no hacen falta en la búsqueda
+        perfecto = array('q', peso)
+        for x in reversed(self.orden):
+            arcos = range(inicio[x], inicio[x + 1])
+            for k, a in enumerate(arcos):
+                u = cabeza[a]
+                for b in arcos[k + 1:]:
+                    peso_t = perfecto[indice_arco[u, cabeza[b]]]
+                    if perfecto[b] + peso_t < perfecto[a]:
+                        perfecto[a] = perfecto[b] + peso_t
+                    if perfecto[a] + peso_t < perfecto[b]:
+                        perfecto[b] = perfecto[a] + peso_t
+        return perfecto
+    
+    def _personalizar_numpy(self, peso: array, medio: array) -> Tuple[array, array, array]:
+        # Mismas dos pasadas que en Python, pero la clique de arcos de cada x se procesa de una
+        # vez: los arcos entre sus vecinos se buscan con searchsorted sobre claves baja * n + alta
+        if self._claves is None:
+            colas = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(np.frombuffer(self.inicio, dtype=np.int64)))
+            claves = colas * self.n + np.frombuffer(self.cabeza, dtype=np.int32)
+            posiciones = np.argsort(claves, kind="stable")
+            self._claves = (claves[posiciones], posiciones)
+        claves, posiciones = self._claves
+        inicio = self.inicio
+        cabeza = np.frombuffer(self.cabeza, dtype=np.int32).astype(np.int64)
+        pesos = np.frombuffer(peso, dtype=np.int64).copy()
+        medios = np.frombuffer(medio, dtype=np.int32).copy()
+        
+        cliques = []
+        for x in self.orden:
+            arcos = np.arange(inicio[x], inicio[x + 1])
+            if arcos.size < 2:
+                cliques.append(None)
+                continue
+            bajo, alto = np.triu_indices(arcos.size, 1)
+            triangulos = posiciones[np.searchsorted(claves, cabeza[arcos[bajo]] * self.n + cabeza[arcos[alto]])]
+            cliques.append((x, arcos[bajo], arcos[alto], triangulos))
+            candidato = pesos[arcos[bajo]] + pesos[arcos[alto]]
+            mejora = candidato < pesos[triangulos]
+            if mejora.any():
+                pesos[triangulos[mejora]] = candidato[mejora]
+                medios[triangulos[mejora]] = x
+        
+        perfectos = pesos.copy()
+        for clique in reversed(cliques):
+            if clique is None:
+                continue
+            _, a, b, triangulos = clique
+            peso_t = perfectos[triangulos]
+            np.minimum.at(perfectos, a, perfectos[b] + peso_t)
+            np.minimum.at(perfectos, b, perfectos[a] + peso_t)
+        
+        return (array('q', pesos.tobytes()), array('i', medios.tobytes()),
+                array('q', np.minimum(perfectos, self.infinito).tobytes()))
+    
+    def _grafo_consulta(self, peso: array, perfecto: array) -> Tuple[array, array, array]:
+        # Un arco sigue siendo necesario si su mejor camino pasa solo por ciudades más bajas
+        inicio, cabeza, infinito = self.inicio, self.cabeza, self.infinito
+        consulta_inicio, consulta_cabeza, consulta_peso = array('q', [0]), array('i'), array('q')
+        for v in range(self.n):
+            for a in range(inicio[v], inicio[v + 1]):
+                if peso[a] < infinito and peso[a] == perfecto[a]:
+                    consulta_cabeza.append(cabeza[a])
+                    consulta_peso.append(peso[a])
+            consulta_inicio.append(len(consulta_cabeza))
+        return consulta_inicio, consulta_cabeza, consulta_peso
+    
+    def personalizar_grafo(self, grafo):
+        # Tiempos vigentes del grafo, ya con las rutas cerradas afuera
+        inicio_fila, vecinos, pesos = grafo.obtener_csr()
+        origen = array('q')
+        for i in range(len(inicio_fila) - 1):
+            origen.extend([i] * (inicio_fila[i + 1] - inicio_fila[i]))
+        self.personalizar(origen, vecinos, pesos, grafo.version)
+    
+    def personalizar_condicion(self, grafo, condicion: str):
+        # Tiempos de una condición climática según el archivo (sin ediciones manuales, como
+        # EscenariosClima); queda sin versión, así que actualizar vuelve a los del grafo
+        if condicion not in CONDICIONES:
+            raise ValueError(f"Condición climática desconocida: {condicion}")
+        tabla = grafo.rutas_originales
+        cierres = grafo.cierres
+        tiempos = tabla.tiempos[condicion]
+        pares = [(i, j, k) for (i, j), k in tabla.indice_rutas().items() if j not in cierres.get(i, ())]
+        self.personalizar([i for i, _, _ in pares], [j for _, j, _ in pares], [tiempos[k] for _, _, k in pares])
+    
+    def actualizar(self, grafo):
+        # Ciudades o rutas nuevas que no estaban en la topología obligan a preprocesar de nuevo
+        if self._metrica[3] == grafo.version and self.version_rutas == grafo.version_rutas:
+            return
+        tabla = grafo.rutas_originales
+        if len(grafo.ciudades) != self.n or any(
+                i != j and self._buscar_arco(i, j) is None
+                for i, j in zip(tabla.origen[self.rutas_topologia:], tabla.destino[self.rutas_topologia:])):
+            self.preprocesar(grafo)
+            return
+        self.rutas_topologia = len(tabla)
+        self.version_rutas = grafo.version_rutas
+        self.personalizar_grafo(grafo)
+    
+    def copiar(self) -> "JerarquiaContraccion":
+        # La topología es de solo lectura y se comparte; personalizar publica una métrica nueva
+        return copy.copy(self)
+    
+    def _buscar(self, origen: int, destino: int, consulta) -> Tuple[int, int, List[dict]]:
+        # Los arcos hacia arriba de una ciudad llegan solo a ancestros suyos en el árbol de
+        # eliminación (padre = su vecino superior más bajo), así que basta recorrer esa
+        # cadena en orden, sin montículo: al llegar a cada ciudad su distancia ya es final
+        inicio, cabeza, peso = consulta
+        infinito = self.infinito
+        padre = self.padre
+        distancias = ({origen: 0}, {destino: 0})
+        previos = ({origen: -1}, {destino: -1})
+        rango = self.rango
+        v, u = origen, destino
+        mejor, encuentro = infinito, -1
+        while v != -1 or u != -1:
+            # Avanza la cadena con la ciudad más baja; donde se juntan, avanzan las dos
+            if u == -1 or (v != -1 and rango[v] < rango[u]):
+                lados, actual = (0,), v
+            elif v == -1 or rango[u] < rango[v]:
+                lados, actual = (1,), u
+            else:
+                lados, actual = (0, 1), v
+            for lado in lados:
+                propias = distancias[lado]
+                distancia = propias.get(actual)
+                if distancia is None or distancia >= mejor:
+                    continue
+                previo = previos[lado]
+                for a in range(inicio[actual], inicio[actual + 1]):
+                    nueva = distancia + peso[a]
+                    w = cabeza[a]
+                    if nueva < propias.get(w, infinito):
+                        propias[w] = nueva
+                        previo[w] = actual
+            if len(lados) == 2:
+                ida, vuelta = distancias[0].get(actual), distancias[1].get(actual)
+                if ida is not None and vuelta is not None and ida + vuelta < mejor:
+                    mejor, encuentro = ida + vuelta, actual
+            if 0 in lados:
+                v = padre[v]
+            if 1 in lados:
+                u = padre[u]
+        return mejor, encuentro, previos
+    
+    def _expandir(self, u: int, w: int, medio, ruta: List[int]):
+        # Agrega a ruta las ciudades de u a w (sin u), abriendo cada atajo por su ciudad del medio
+        pila = [(u, w)]
+        while pila:
+            a, b = pila.pop()
+            x = medio[self._arco(a, b)]
+            if x < 0:
+                ruta.append(b)
+            else:
+                pila.append((x, b))
+                pila.append((a, x))
+    
+    def consultar(self, origen: int, destino: int, con_ruta: bool = True) -> Tuple[int, List[int]]:
+        # Misma convención que los otros motores: sin ruta para origen == destino
+        if origen == destino:
+            return 0, []
+        _, medio, consulta, _ = self._metrica
+        distancia, encuentro, previos = self._buscar(origen, destino, consulta)
+        if encuentro == -1 or not con_ruta:
+            return distancia, []
+        
+        subida = [encuentro]
+        while subida[-1] != origen:
+            subida.append(previos[0][subida[-1]])
+        subida.reverse()
+        bajada = [encuentro]
+        while bajada[-1] != destino:
+            bajada.append(previos[1][bajada[-1]])
+        
+        ruta = [origen]
+        for a, b in chain(zip(subida, subida[1:]), zip(bajada, bajada[1:])):
+            self._expandir(a, b, medio, ruta)
+        return distancia, ruta
+    
+    def obtener_distancia(self, i: int, j: int) -> int:
+        return self.consultar(i, j, con_ruta=False)[0]
+    
+    def obtener_ruta_indices(self, origen: int, destino: int) -> List[int]:
+        return self.consultar(origen, destino)[1]
+    
+    def iterar_ruta(self, origen: int, destino: int) -> Iterator[int]:
+        return iter(self.obtener_ruta_indices(origen, destino))
+    
+    def iterar_ruta_ciudades(self, origen: int, destino: int, ciudades: List[str]) -> Iterator[str]:
+        return map(ciudades.__getitem__, self.iterar_ruta(origen, destino))
     
-    def _construir_matriz(self):
-        n = len(self.ciudades)
-        infinito = sys.maxsize // 2
-        self.matriz = [[infinito] * n for _ in range(n)]
+    def obtener_ruta_ciudades(self, origen: int, destino: int, ciudades: List[str]) -> List[str]:
+        return [ciudades[i] for i in self.obtener_ruta_indices(origen, destino)]
+    
+    def consultar_lote(self, origenes, destinos, con_rutas: bool = True) \
+            -> Tuple[List[int], Optional[List[List[int]]]]:
+        distancias = []
+        rutas = [] if con_rutas else None
+        vistas = {}
+        for origen, destino in zip(origenes, destinos):
+            if origen < 0 or destino < 0:
+                distancias.append(self.infinito)
+                if con_rutas:
+                    rutas.append([])
+                continue
+            clave = (origen, destino)
+            if clave not in vistas:
+                vistas[clave] = self.consultar(origen, destino, con_rutas)
+            distancia, ruta = vistas[clave]
+            distancias.append(distancia)
+            if con_rutas:
+                rutas.append(list(ruta))
+        return distancias, rutas
+    
+    def guardar(self, ruta_archivo: str, ciudades: List[str], huella: bytes):
+        # Se guarda solo la topología: personalizar con los tiempos del archivo es barato
+        nombres = "\n".join(ciudades).encode("utf-8")
+        encabezado = struct.pack(FORMATO_JERARQUIA, MAGIA_JERARQUIA, sys.byteorder[0].encode(),
+                                 self.n, len(self.cabeza), huella, len(nombres))
+        temporal = f"{ruta_archivo}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(encabezado)
+            archivo.write(nombres)
+            for tabla in (self.orden, self.inicio, self.cabeza):
+                archivo.write(bytes(-archivo.tell() % 8))
+                archivo.write(tabla)
+        os.replace(temporal, ruta_archivo)
+    
+    def cargar(self, ruta_archivo: str, grafo, huella: bytes) -> bool:
+        try:
+            with open(ruta_archivo, "rb") as archivo:
+                datos = archivo.read()
+        except OSError:
+            return False
         
-        for i in range(n):
-            self.matriz[i][i] = 0
+        tam_encabezado = struct.calcsize(FORMATO_JERARQUIA)
+        if len(datos) < tam_encabezado:
+            return False
+        magia, orden_bytes, n, arcos, huella_guardada, largo_nombres = struct.unpack_from(FORMATO_JERARQUIA, datos)
+        if (magia != MAGIA_JERARQUIA or orden_bytes != sys.byteorder[0].encode() or huella_guardada != huella
+                or n != len(grafo.ciudades)):
+            return False
+        nombres = datos[tam_encabezado:tam_encabezado + largo_nombres].decode("utf-8")
+        if (nombres.split("\n") if n else []) != list(grafo.ciudades):
+            return False
+        
+        tablas = []
+        desplazamiento = tam_encabezado + largo_nombres
+        for tipo, cantidad in (('i', n), ('q', n + 1), ('i', arcos)):
+            desplazamiento += -desplazamiento % 8
+            tabla = array(tipo)
+            tabla.frombytes(datos[desplazamiento:desplazamiento + cantidad * tabla.itemsize])
+            if len(tabla) != cantidad:
+                return False
+            tablas.append(tabla)
+            desplazamiento += cantidad * tabla.itemsize
+        orden, inicio, cabeza = tablas
         
-        for ruta in self.rutas_originales:
-            i = self.indice_ciudad[ruta.ciudad1]
-            j = self.indice_ciudad[ruta.ciudad2]
-            self.matriz[i][j] = ruta.tiempo_normal
-            self.matriz[j][i] = ruta.tiempo_normal
+        rango = array('i', bytes(4 * n))
+        for posicion, v in enumerate(orden):
+            rango[v] = posicion
+        self._instalar(n, orden, rango, inicio, cabeza)
+        self.rutas_topologia = len(grafo.rutas_originales)
+        self.version_rutas = grafo.version_rutas
+        self.personalizar_grafo(grafo)
+        return True
+
+
+def _resolver_escenario(matriz: List[List[int]], usar_numpy: bool,
+                        cierres: Dict[int, FrozenSet[int]]) -> AlgortimoFloyd:
+    floyd = AlgortimoFloyd(usar_numpy)
+    floyd.calcular(matriz, cierres=cierres)
+    return floyd
+
+
+class EscenariosClima:
+    def __init__(self, grafo: Grafo, usar_numpy: Optional[bool] = None):
+        self.grafo = grafo
+        self.usar_numpy = np is not None if usar_numpy is None else usar_numpy
+        self.solvers: Dict[str, AlgortimoFloyd] = {}
     
-    def obtener_matriz(self) -> List[List[int]]:
-        return self.matriz
+    def _version(self) -> Tuple[int, int]:
+        # Los escenarios dependen de las rutas y de los cierres, no de las ediciones manuales
+        return self.grafo.version_rutas, self.grafo.version_cierres
     
-    def obtener_ciudades(self) -> List[str]:
-        return self.ciudades.copy()
+    def _vigente(self, condicion: str) -> bool:
+        floyd = self.solvers.get(condicion)
+        return floyd is not None and floyd.version == self._version()
     
-    def obtener_rutas_originales(self) -> List[Ruta]:
-        return self.rutas_originales.copy()
+    def obtener_solver(self, condicion: str) -> AlgortimoFloyd:
+        if condicion not in self.solvers:
+            self.solvers[condicion] = AlgortimoFloyd(self.usar_numpy)
+        floyd = self.solvers[condicion]
+        floyd.calcular(self.grafo.obtener_matriz_condicion(condicion), self._version(), self.grafo.cierres)
+        return floyd
     
-    def actualizar_ruta(self, ciudad1: str, ciudad2: str, tiempo: int):
-        i = self.indice_ciudad[ciudad1]
-        j = self.indice_ciudad[ciudad2]
-        self.matriz[i][j] = tiempo
-        self.matriz[j][i] = tiempo
+    def calcular_todos(self, procesos: Optional[int] = None):
+        pendientes = [c for c in Grafo.CONDICIONES if not self._vigente(c)]
+        if not pendientes:
+            return
+        
+        procesos = min(len(pendientes), procesos or os.cpu_count() or 1)
+        if procesos <= 1:
+            for condicion in pendientes:
+                self.obtener_solver(condicion)
+            return
+        
+        # Cada condición es independiente: se resuelven en procesos separados
+        matrices = [self.grafo.obtener_matriz_condicion(c) for c in pendientes]
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            resultados = ejecutor.map(_resolver_escenario, matrices, [self.usar_numpy] * len(pendientes),
+                                      [self.grafo.cierres] * len(pendientes))
+            for condicion, floyd in zip(pendientes, resultados):
+                floyd._marcar_version(self._version())
+                self.solvers[condicion] = floyd
     
-    def obtener_peso(self, ciudad1: str, ciudad2: str) -> int:
-        i = self.indice_ciudad[ciudad1]
-        j = self.indice_ciudad[ciudad2]
-        return self.matriz[i][j]
-class AlgortimoFloyd:
-    def __init__(self):
-        self.distancias = []
-        self.siguiente = []
-        self.infinito = sys.maxsize 
+    def ruta_mas_corta(self, condicion: str, origen: str, destino: str) -> Tuple[int, List[str]]:
+        floyd = self.obtener_solver(condicion)
+        i = self.grafo.indice_ciudad[origen]
+        j = self.grafo.indice_ciudad[destino]
+        return floyd.obtener_distancia(i, j), floyd.obtener_ruta_ciudades(i, j, self.grafo.ciudades)
+
+
+def _matriz_ventana(base: List[List[int]], cambios: Dict[Tuple[int, int], int]) -> List[List[int]]:
+    # Matriz base con los pesos de la ventana; solo se copian las filas que cambian
+    matriz = list(base)
+    copiadas = set()
+    for (i, j), peso in cambios.items():
+        for a, b in ((i, j), (j, i)):
+            if a not in copiadas:
+                matriz[a] = list(matriz[a])
+                copiadas.add(a)
+            matriz[a][b] = peso
+    return matriz
+
+
+def _resolver_ventanas(base: List[List[int]], cambios_ventanas: List[Dict[Tuple[int, int], int]],
+                       usar_numpy: bool, cierres: Dict[int, FrozenSet[int]]) -> List[AlgortimoFloyd]:
+    # Resuelve una secuencia de ventanas: la primera completa y cada siguiente a partir de
+    # una copia de la anterior, aplicando solo las rutas cuyo peso difiere entre ambas
+    solvers = []
+    anterior, cambios_anteriores = None, {}
+    for cambios in cambios_ventanas:
+        matriz = _matriz_ventana(base, cambios)
+        diferentes = [par for par in cambios.keys() | cambios_anteriores.keys()
+                      if cambios.get(par) != cambios_anteriores.get(par)]
+        if anterior is None or anterior._lote_grande(len(diferentes)):
+            floyd = AlgortimoFloyd(usar_numpy)
+            floyd.calcular(matriz, cierres=cierres)
+        else:
+            _contar("ventanas_incrementales")
+            floyd = anterior.copiar()
+            floyd.actualizar_aristas(matriz, diferentes)
+        floyd.obtener_centro()
+        solvers.append(floyd)
+        anterior, cambios_anteriores = floyd, cambios
+    return solvers
+
+
+class HorarioClima:
+    # Condición climática de cada ruta por ventana de tiempo (ver AnalizadorArchivo.analizar_horario);
+    # las rutas que una ventana no menciona tienen su tiempo normal
+    def __init__(self, grafo: Grafo, ventanas: Dict[str, Dict[Tuple[str, str], str]],
+                 usar_numpy: Optional[bool] = None):
+        self.grafo = grafo
+        self.ventanas = ventanas
+        self.usar_numpy = np is not None if usar_numpy is None else usar_numpy
+        self.solvers: Dict[str, AlgortimoFloyd] = {}
     
-    def calcular(self, matriz: List[List[int]]):
-        n = len(matriz)
-        self.distancias = [fila.copy() for fila in matriz]
-        self.siguiente = [[0] * n for _ in range(n)]
+    def _version(self) -> Tuple[int, int]:
+        return self.grafo.version_rutas, self.grafo.version_cierres
+    
+    def _cambios(self) -> List[Dict[Tuple[int, int], int]]:
+        # Por ventana, los pares de ciudades cuyo tiempo difiere del normal
+        tabla = self.grafo.rutas_originales
+        resultado = []
+        for ventana, condiciones in self.ventanas.items():
+            cambios = {}
+            for (ciudad1, ciudad2), condicion in condiciones.items():
+                k = tabla.buscar(ciudad1, ciudad2)
+                if k == -1:
+                    raise ValueError(f"Ruta desconocida en la ventana {ventana}: {ciudad1} - {ciudad2}")
+                if tabla.tiempos[condicion][k] != tabla.tiempos["normal"][k]:
+                    i, j = tabla.origen[k], tabla.destino[k]
+                    cambios[min(i, j), max(i, j)] = tabla.tiempos[condicion][k]
+            resultado.append(cambios)
+        return resultado
+    
+    def evaluar(self, procesos: Optional[int] = None):
+        if self.solvers and all(floyd.version == self._version() for floyd in self.solvers.values()):
+            return
+        nombres = list(self.ventanas)
+        cambios = self._cambios()
+        base = self.grafo.obtener_matriz_condicion("normal")
         
-        for i in range(n):
-            for j in range(n):
-                if i != j and matriz[i][j] < self.infinito:
-                    self.siguiente[i][j] = j
-                else:
-                    self.siguiente[i][j] = -1
+        # Las ventanas se reparten en tramos consecutivos, uno por proceso: dentro de cada
+        # tramo se reutiliza la ventana anterior y los tramos no dependen entre sí
+        procesos = max(1, min(len(nombres), procesos or os.cpu_count() or 1))
+        tam = -(-len(nombres) // procesos) if nombres else 1
+        tramos = [cambios[inicio:inicio + tam] for inicio in range(0, len(nombres), tam)]
+        if procesos <= 1:
+            resultados = [_resolver_ventanas(base, tramo, self.usar_numpy, self.grafo.cierres) for tramo in tramos]
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                resultados = list(ejecutor.map(_resolver_ventanas, [base] * len(tramos), tramos,
+                                               [self.usar_numpy] * len(tramos), [self.grafo.cierres] * len(tramos)))
         
-        # Algoritmo de Floyd-Warshall
-        for k in range(n):
-            for i in range(n):
-                for j in range(n):
-                    if self.distancias[i][k] + self.distancias[k][j] < self.distancias[i][j]:
-                        self.distancias[i][j] = self.distancias[i][k] + self.distancias[k][j]
-                        self.siguiente[i][j] = self.siguiente[i][k]
+        self.solvers = {}
+        for nombre, floyd in zip(nombres, (floyd for tramo in resultados for floyd in tramo)):
+            floyd._marcar_version(self._version())
+            self.solvers[nombre] = floyd
     
-    def obtener_distancia(self, i: int, j: int) -> int:
-        return self.distancias[i][j]
+    def obtener_solver(self, ventana: str) -> AlgortimoFloyd:
+        if ventana not in self.ventanas:
+            raise ValueError(f"Ventana desconocida: {ventana}")
+        self.evaluar()
+        return self.solvers[ventana]
     
-    def obtener_ruta_indices(self, origen: int, destino: int) -> List[int]:
-        if self.siguiente[origen][destino] == -1:
-            return []
-        
-        ruta = []
-        actual = origen
-        while actual != destino:
-            ruta.append(actual)
-            actual = self.siguiente[actual][destino]
-        ruta.append(destino)
-        return ruta
+    def ruta_mas_corta(self, ventana: str, origen: str, destino: str) -> Tuple[int, List[str]]:
+        floyd = self.obtener_solver(ventana)
+        i = self.grafo.indice_ciudad[origen]
+        j = self.grafo.indice_ciudad[destino]
+        return floyd.obtener_distancia(i, j), floyd.obtener_ruta_ciudades(i, j, self.grafo.ciudades)
     
+    def centro(self, ventana: str) -> Tuple[Optional[str], int]:
+        indice, excentricidad = self.obtener_solver(ventana).obtener_centro()
+        return (self.grafo.ciudades[indice] if indice != -1 else None), excentricidad
+    
+    def resumen(self, pares: List[Tuple[str, str]] = (), procesos: Optional[int] = None) -> Dict[str, dict]:
+        # Centro y rutas pedidas de todas las ventanas en una sola corrida
+        self.evaluar(procesos)
+        indice = self.grafo.indice_ciudad
+        origenes = [indice.get(origen, -1) for origen, _ in pares]
+        destinos = [indice.get(destino, -1) for _, destino in pares]
+        ciudades = self.grafo.ciudades
+        resultado = {}
+        for ventana, floyd in self.solvers.items():
+            centro, excentricidad = self.centro(ventana)
+            distancias, rutas = floyd.consultar_lote(origenes, destinos)
+            resultado[ventana] = {
+                "centro": centro,
+                "excentricidad": excentricidad if excentricidad < floyd.infinito else None,
+                "rutas": [{"origen": origen, "destino": destino,
+                           "distancia": distancia if distancia < floyd.infinito else None,
+                           "ruta": [ciudades[i] for i in ruta]}
+                          for (origen, destino), distancia, ruta in zip(pares, distancias, rutas)],
+            }
+        return resultado
+
+_LINEA_NO_VACIA = re.compile(r"^[ \t\r\f\v]*\S", re.MULTILINE)
+_LINEA_SEIS_CAMPOS = re.compile(r"^[ \t\r\f\v]*\S+(?:[ \t\r\f\v]+\S+){5}[ \t\r\f\v]*$", re.MULTILINE)
+
+
 class AnalizadorArchivo:
+    @staticmethod
+    def huella(nombre_archivo: str) -> bytes:
+        resumen = hashlib.sha256()
+        with open(nombre_archivo, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b""):
+                resumen.update(bloque)
+        return resumen.digest()
+    
     @staticmethod
     def analizar(nombre_archivo: str) -> List[Ruta]:
         rutas = []
-        with open(nombre_archivo, 'r') as archivo:
+        for ciudad1, ciudad2, tiempo_normal, tiempo_lluvia, tiempo_nieve, tiempo_tormenta in \
+                AnalizadorArchivo.iterar_registros(nombre_archivo):
+            rutas.append(Ruta(None, ciudad1, ciudad2, 
+                            tiempo_normal, tiempo_lluvia, 
+                            tiempo_nieve, tiempo_tormenta))
+        return rutas
+    
+    @staticmethod
+    def analizar_horario(nombre_archivo: str) -> Dict[str, Dict[Tuple[str, str], str]]:
+        # Líneas "ventana ciudad1 ciudad2 condición"; las ventanas quedan en el orden del archivo
+        ventanas: Dict[str, Dict[Tuple[str, str], str]] = {}
+        with open(nombre_archivo) as archivo:
             for linea in archivo:
-                linea = linea.strip()
-                if not linea:
-                    continue
-                
                 partes = linea.split()
+                if not partes:
+                    continue
+                if len(partes) != 4 or partes[3] not in CONDICIONES:
+                    raise ValueError(f"Línea mal formada: {linea.strip()}")
+                ventana, ciudad1, ciudad2, condicion = partes
+                ventanas.setdefault(ventana, {})[ciudad1, ciudad2] = condicion
+        return ventanas
+    
+    @staticmethod
+    def analizar_tabla(nombre_archivo: str) -> RutaTabla:
+        return RutaTabla.desde_columnas(*AnalizadorArchivo.analizar_columnas(nombre_archivo))
+    
+    @staticmethod
+    def iterar_registros(nombre_archivo: str, tam_bloque: int = 1 << 20) -> Iterator[Tuple[str, str, int, int, int, int]]:
+        for origenes, destinos, tiempos in AnalizadorArchivo._iterar_bloques(nombre_archivo, tam_bloque):
+            yield from zip(origenes, destinos, *tiempos)
+    
+    @staticmethod
+    def analizar_columnas(nombre_archivo: str, tam_bloque: int = 1 << 20) \
+            -> Tuple[List[str], Dict[str, int], array, array, List[array]]:
+        with _fase("analizar"):
+            return AnalizadorArchivo._leer_columnas(nombre_archivo, tam_bloque)
+    
+    @staticmethod
+    def _leer_columnas(nombre_archivo: str, tam_bloque: int) \
+            -> Tuple[List[str], Dict[str, int], array, array, List[array]]:
+        indice_ciudad = {}
+        origen, destino = array('i'), array('i')
+        tiempos = [array('q') for _ in CONDICIONES]
+        for origenes, destinos, tiempos_bloque in AnalizadorArchivo._iterar_bloques(nombre_archivo, tam_bloque):
+            # setdefault asigna el siguiente id a las ciudades que aparecen por primera vez,
+            # en el mismo orden (origen y luego destino de cada línea) que analizar
+            ids = [indice_ciudad.setdefault(ciudad, len(indice_ciudad))
+                   for par in zip(origenes, destinos) for ciudad in par]
+            origen.extend(ids[0::2])
+            destino.extend(ids[1::2])
+            for columna, valores in zip(tiempos, tiempos_bloque):
+                columna.extend(valores)
+        return list(indice_ciudad), indice_ciudad, origen, destino, tiempos
+    
+    @staticmethod
+    def _iterar_bloques(nombre_archivo: str, tam_bloque: int) -> Iterator[Tuple[List[str], List[str], List[List[int]]]]:
+        # Lee el archivo en bloques grandes de bytes; lo que queda después del
+        # último salto de línea de cada bloque se completa con el siguiente
+        with open(nombre_archivo, 'rb') as archivo:
+            resto = b""
+            while True:
+                bloque = archivo.read(tam_bloque)
+                if not bloque:
+                    break
+                bloque = AnalizadorArchivo._normalizar_saltos(resto + bloque)
+                corte = bloque.rfind(b"\n") + 1
+                resto = bloque[corte:]
+                if corte:
+                    yield AnalizadorArchivo._contar_lineas(AnalizadorArchivo._decodificar_bloque(bloque[:corte].decode()))
+            if resto:
+                resto = resto.replace(b"\r", b"\n")
+                yield AnalizadorArchivo._contar_lineas(AnalizadorArchivo._decodificar_bloque(resto.decode()))
+    
+    @staticmethod
+    def _normalizar_saltos(bloque: bytes) -> bytes:
+        # Como el modo texto, acepta "\r\n" y "\r" como fin de línea; un "\r" final puede ser
+        # la mitad de un "\r\n" partido entre bloques, así que queda para el siguiente
+        if b"\r" not in bloque:
+            return bloque
+        final = b"\r" if bloque.endswith(b"\r") else b""
+        bloque = bloque[:len(bloque) - len(final)]
+        return bloque.replace(b"\r\n", b"\n").replace(b"\r", b"\n") + final
+    
+    @staticmethod
+    def _contar_lineas(registros: Tuple[List[str], List[str], List[List[int]]]) \
+            -> Tuple[List[str], List[str], List[List[int]]]:
+        _contar("lineas_analizadas", len(registros[0]))
+        return registros
+    
+    @staticmethod
+    def _decodificar_bloque(texto: str) -> Tuple[List[str], List[str], List[List[int]]]:
+        # Camino rápido: un solo split para todo el bloque, validado contando
+        # con expresiones regulares que cada línea no vacía tenga seis campos
+        tokens = texto.split()
+        lineas = len(_LINEA_NO_VACIA.findall(texto))
+        if len(tokens) == 6 * lineas and len(_LINEA_SEIS_CAMPOS.findall(texto)) == lineas:
+            try:
+                tiempos = [list(map(int, tokens[k::6])) for k in range(2, 6)]
+                return tokens[0::6], tokens[1::6], tiempos
+            except ValueError:
+                pass
+        
+        # Si el camino rápido no sirve se analiza línea por línea, que además señala la culpable
+        origenes, destinos, tiempos = [], [], [[], [], [], []]
+        for linea in texto.split("\n"):
+            partes = linea.split()
+            if not partes:
+                continue
+            try:
                 if len(partes) != 6:
-                    raise ValueError(f"Línea mal formada: {linea}")
-                
-                ciudad1 = partes[0]
-                ciudad2 = partes[1]
-                tiempo_normal = int(partes[2])
-                tiempo_lluvia = int(partes[3])
-                tiempo_nieve = int(partes[4])
-                tiempo_tormenta = int(partes[5])
-                
-                nombre = f"{ciudad1}To{ciudad2}"
-                rutas.append(Ruta(nombre, ciudad1, ciudad2, 
-                                tiempo_normal, tiempo_lluvia, 
-                                tiempo_nieve, tiempo_tormenta))
-        return rutas
+                    raise ValueError
+                valores = [int(parte) for parte in partes[2:]]
+            except ValueError:
+                raise ValueError(f"Línea mal formada: {linea.strip()}") from None
+            origenes.append(partes[0])
+            destinos.append(partes[1])
+            for columna, valor in zip(tiempos, valores):
+                columna.append(valor)
+        return origenes, destinos, tiempos
 
 class main:
     def __init__(self):
         self.grafo = None
-        self.floyd = AlgortimoFloyd()
+        self.floyd = AlgoritmoFloyd()
+        self.dijkstra = None
         self.archivo_datos = "logistica.txt"
+        # Tablas resueltas guardadas junto al archivo de datos (por defecto, "<archivo_datos>.fw")
+        self.archivo_tablas = None
+        # A partir de este número de ciudades no se construye la matriz densa
+        self.umbral_disperso = 2000
+        self.ciudades_centrales = 5
+        # Los menús solo listan ciudades o rutas si no hay más que esto; si no, se eligen por nombre
+        self.max_listado = 50
+        # Modo opcional para redes grandes: las consultas puntuales se responden con una
+        # jerarquía de contracción guardada en "<archivo_datos>.ch" (ver JerarquiaContraccion)
+        self.usar_jerarquia = False
+        self.archivo_jerarquia = None
+        self.jerarquia = None
     
     def ejecutar(self):
         try:
-            rutas = AnalizadorArchivo.analizar(self.archivo_datos)
-            self.grafo = Grafo(rutas)
-            self.floyd.calcular(self.grafo.obtener_matriz())
+            self.preparar()
             
             salir = False
             while not salir:
@@ -165,84 +2442,117 @@ class main:
         except Exception as e:
             print(f"Error inesperado: {str(e)}")
     
-    def mostrar_menu(self):
-        print("\n=====================================")
-        print("\nSistema de Optimización de Rutas Logísticas\n")
-        print("1. Ruta más corta entre dos ciudades")
-        print("2. Centro del grafo")
-        print("3. Modificar grafo")
-        print("4. Salir")
-        print("\nElija una opción: ", end="")
+    def preparar(self):
+        rutas = AnalizadorArchivo.analizar_tabla(self.archivo_datos)
+        self.grafo = self.construir_grafo(rutas)
+        if self.dijkstra is None:
+            self.cargar_o_calcular_tablas()
+        if self.usar_jerarquia:
+            self.cargar_o_preprocesar_jerarquia()
     
-    def leer_opcion(self) -> int:
-        try:
-            return int(input().strip())
-        except ValueError:
-            return -1
+    def construir_grafo(self, rutas: RutaTabla):
+        if len(rutas.ciudades) >= self.umbral_disperso:
+            grafo = GrafoDisperso(rutas)
+            self.dijkstra = AlgoritmoDijkstra(grafo)
+            return grafo
+        self.dijkstra = None
+        return Grafo(rutas)
     
-    def ruta_mas_corta(self):
-        ciudades = self.grafo.obtener_ciudades()
-        print("\nCiudades disponibles:")
-        for idx, ciudad in enumerate(ciudades):
-            print(f"{idx}: {ciudad}")
+    def cargar_o_calcular_tablas(self):
+        archivo_tablas = self.archivo_tablas or f"{self.archivo_datos}.fw"
+        huella = AnalizadorArchivo.huella(self.archivo_datos)
+        if self.floyd.cargar(archivo_tablas, self.grafo.obtener_matriz(), self.grafo.ciudades,
+                             huella, self.grafo.version):
+            return
         
+        self.floyd.calcular(self.grafo.obtener_matriz(), self.grafo.version, self.grafo.cierres)
         try:
-            origen_idx = int(input("\nIngrese el índice de la ciudad origen: "))
-            destino_idx = int(input("Ingrese el índice de la ciudad destino: "))
-            
-            if origen_idx < 0 or origen_idx >= len(ciudades) or destino_idx < 0 or destino_idx >= len(ciudades):
-                print("\nÍndice de ciudad no válido.")
-                return
-            
-            self.floyd.calcular(self.grafo.obtener_matriz())
-            ruta_indices = self.floyd.obtener_ruta_indices(origen_idx, destino_idx)
-            
-            if not ruta_indices:
-                print(f"\nNo hay ruta entre {ciudades[origen_idx]} y {ciudades[destino_idx]}")
-                return
-            
-            distancia = self.floyd.obtener_distancia(origen_idx, destino_idx)
-            ruta_ciudades = [ciudades[i] for i in ruta_indices]
-            
-            print("\nRuta más corta:", " -> ".join(ruta_ciudades))
-            print(f"Distancia total: {distancia} horas")
-        
-        except ValueError:
-            print("\nEntrada no válida. Debe ingresar un número.")
-
-class main:
-    def __init__(self):
-        self.grafo = None
-        self.floyd = AlgoritmoFloyd()
-        self.archivo_datos = "logistica.txt"
+            self.floyd.guardar(archivo_tablas, self.grafo.ciudades, huella)
+        except OSError:
+            # Sin permiso de escritura simplemente se resolverá de nuevo la próxima vez
+            pass
     
-    def ejecutar(self):
-        try:
-            rutas = AnalizadorArchivo.analizar(self.archivo_datos)
-            self.grafo = Grafo(rutas)
-            self.floyd.calcular(self.grafo.obtener_matriz())
-            
-            salir = False
-            while not salir:
-                self.mostrar_menu()
-                opcion = self.leer_opcion()
-                
-                if opcion == 1:
-                    self.ruta_mas_corta()
-                elif opcion == 2:
-                    self.centro_grafo()
-                elif opcion == 3:
-                    self.modificar_grafo()
-                elif opcion == 4:
-                    print("\n¡Gracias por usar el programa de optimización de rutas!")
-                    salir = True
-                else:
-                    print("\nOpción no válida. Intente nuevamente.")
+    def cargar_o_preprocesar_jerarquia(self):
+        archivo_jerarquia = self.archivo_jerarquia or f"{self.archivo_datos}.ch"
+        huella = AnalizadorArchivo.huella(self.archivo_datos)
+        jerarquia = JerarquiaContraccion()
+        if not jerarquia.cargar(archivo_jerarquia, self.grafo, huella):
+            jerarquia.preprocesar(self.grafo)
+            try:
+                jerarquia.guardar(archivo_jerarquia, self.grafo.ciudades, huella)
+            except OSError:
+                pass
+        self.jerarquia = jerarquia
+    
+    def copiar(self) -> "main":
+        copia = copy.copy(self)
+        copia.grafo = self.grafo.copiar()
+        if self.jerarquia is not None:
+            copia.jerarquia = self.jerarquia.copiar()
+        if self.dijkstra is not None:
+            copia.dijkstra = AlgoritmoDijkstra(copia.grafo)
+        else:
+            copia.floyd = self.floyd.copiar()
+        return copia
+    
+    def motor_consultas(self):
+        if self.dijkstra is not None:
+            return self.dijkstra
+        self.floyd.calcular(self.grafo.obtener_matriz(), self.grafo.version, self.grafo.cierres)
+        return self.floyd
+    
+    def motor_rutas(self):
+        # Para consultas puntuales (origen, destino); el centro y las alternativas usan motor_consultas
+        if self.jerarquia is None:
+            return self.motor_consultas()
+        self.jerarquia.actualizar(self.grafo)
+        return self.jerarquia
+    
+    def consultar_lote(self, pares) -> List[Tuple[int, List[str]]]:
+        pares = list(pares)
+        indice = self.grafo.indice_ciudad
+        origenes = [indice.get(origen, -1) for origen, _ in pares]
+        destinos = [indice.get(destino, -1) for _, destino in pares]
+        distancias, rutas = self.motor_rutas().consultar_lote(origenes, destinos)
+        ciudades = self.grafo.ciudades
+        return [(distancia, [ciudades[i] for i in ruta]) for distancia, ruta in zip(distancias, rutas)]
+    
+    def rutas_alternativas(self, origen: str, destino: str, k: int) -> List[Tuple[int, List[str]]]:
+        ciudades = self.grafo.ciudades
+        rutas = self.motor_consultas().obtener_k_rutas(self.grafo.indice_ciudad[origen],
+                                                       self.grafo.indice_ciudad[destino], k)
+        return [(distancia, [ciudades[i] for i in ruta]) for distancia, ruta in rutas]
+    
+    def procesar_lote_csv(self, entrada, salida, tam_lote: int = 1 << 16):
+        lector = csv.reader(entrada)
+        escritor = csv.writer(salida, lineterminator="\n")
+        escritor.writerow(["origen", "destino", "distancia", "ruta"])
         
-        except FileNotFoundError:
-            print(f"Error: No se encontró el archivo {self.archivo_datos}")
-        except Exception as e:
-            print(f"Error inesperado: {str(e)}")
+        pares = []
+        for fila in lector:
+            if not fila or fila == ["origen", "destino"]:
+                continue
+            pares.append((fila[0].strip(), fila[1].strip() if len(fila) > 1 else ""))
+            if len(pares) >= tam_lote:
+                self._escribir_lote(escritor, pares)
+                pares = []
+        if pares:
+            self._escribir_lote(escritor, pares)
+    
+    def evaluar_horario(self, archivo_horario: str, pares: List[Tuple[str, str]] = (),
+                        procesos: Optional[int] = None) -> Dict[str, dict]:
+        if self.dijkstra is not None:
+            raise ValueError("Los horarios de clima requieren la matriz densa (menos de "
+                             f"{self.umbral_disperso} ciudades)")
+        horario = HorarioClima(self.grafo, AnalizadorArchivo.analizar_horario(archivo_horario))
+        return horario.resumen(list(pares), procesos)
+    
+    def _escribir_lote(self, escritor, pares: List[Tuple[str, str]]):
+        for (origen, destino), (distancia, ruta) in zip(pares, self.consultar_lote(pares)):
+            if ruta:
+                escritor.writerow([origen, destino, distancia, " -> ".join(ruta)])
+            else:
+                escritor.writerow([origen, destino, "", ""])
     
     def mostrar_menu(self):
         print("\n=====================================")
@@ -259,67 +2569,71 @@ class main:
         except ValueError:
             return -1
     
+    def elegir_ciudad(self, texto: str) -> int:
+        # Nombre exacto, índice o un prefijo que corresponda a una sola ciudad; -1 si no se pudo
+        texto = texto.strip()
+        if texto in self.grafo.indice_ciudad:
+            return self.grafo.indice_ciudad[texto]
+        if texto.isdigit():
+            if int(texto) < len(self.grafo.ciudades):
+                return int(texto)
+            print("\nÍndice de ciudad no válido.")
+            return -1
+        candidatas = self.grafo.buscar_ciudades(texto, self.max_listado + 1) if texto else []
+        if len(candidatas) == 1:
+            return self.grafo.indice_ciudad[candidatas[0]]
+        if not candidatas:
+            print(f"\nNo hay ciudades que comiencen con '{texto}'.")
+        else:
+            resto = ", ..." if len(candidatas) > self.max_listado else ""
+            print(f"\nVarias ciudades comienzan con '{texto}': {', '.join(candidatas[:self.max_listado])}{resto}")
+        return -1
+    
     def ruta_mas_corta(self):
-        ciudades = self.grafo.obtener_ciudades()
-        print("\nCiudades disponibles:")
-        for idx, ciudad in enumerate(ciudades):
-            print(f"{idx}: {ciudad}")
-        
-        try:
-            origen_idx = int(input("\nIngrese el índice de la ciudad origen: "))
-            destino_idx = int(input("Ingrese el índice de la ciudad destino: "))
-            
-            if origen_idx < 0 or origen_idx >= len(ciudades) or destino_idx < 0 or destino_idx >= len(ciudades):
-                print("\nÍndice de ciudad no válido.")
-                return
-            
-            self.floyd.calcular(self.grafo.obtener_matriz())
-            ruta_indices = self.floyd.obtener_ruta_indices(origen_idx, destino_idx)
-            
-            if not ruta_indices:
-                print(f"\nNo hay ruta entre {ciudades[origen_idx]} y {ciudades[destino_idx]}")
-                return
-            
-            distancia = self.floyd.obtener_distancia(origen_idx, destino_idx)
-            ruta_ciudades = [ciudades[i] for i in ruta_indices]
-            
-            print("\nRuta más corta:", " -> ".join(ruta_ciudades))
-            print(f"Distancia total: {distancia} horas")
+        ciudades = self.grafo.ciudades
+        if len(ciudades) <= self.max_listado:
+            print("\nCiudades disponibles:")
+            for idx, ciudad in enumerate(ciudades):
+                print(f"{idx}: {ciudad}")
+        else:
+            print(f"\n{len(ciudades)} ciudades disponibles; puede escribir solo el comienzo del nombre.")
         
-        except ValueError:
-            print("\nEntrada no válida. Debe ingresar un número.")
+        origen_idx = self.elegir_ciudad(input("\nIngrese la ciudad origen (nombre, prefijo o índice): "))
+        if origen_idx == -1:
+            return
+        destino_idx = self.elegir_ciudad(input("Ingrese la ciudad destino (nombre, prefijo o índice): "))
+        if destino_idx == -1:
+            return
         
-        def centro_grafo(self):
-            ciudades = self.grafo.obtener_ciudades()
-            n = len(ciudades)
+        motor = self.motor_rutas()
+        # La ruta se imprime entera: se pide armada para aprovechar la caché de rutas de Floyd
+        ruta_ciudades = motor.obtener_ruta_ciudades(origen_idx, destino_idx, ciudades)
         
-            if n == 0:
-                print("\nNo hay ciudades en el grafo.")
+        if not ruta_ciudades:
+            print(f"\nNo hay ruta entre {ciudades[origen_idx]} y {ciudades[destino_idx]}")
             return
         
-        self.floyd.calcular(self.grafo.obtener_matriz())
+        distancia = motor.obtener_distancia(origen_idx, destino_idx)
+        
+        print("\nRuta más corta:", " -> ".join(ruta_ciudades))
+        print(f"Distancia total: {distancia} horas")
+    
+    def centro_grafo(self):
+        ciudades = self.grafo.obtener_ciudades()
+        n = len(ciudades)
+        
+        if n == 0:
+            print("\nNo hay ciudades en el grafo.")
+            return
         
-        centro_idx = -1
-        minima_excentricidad = sys.maxsize
+        motor = self.motor_consultas()
+        centro_idx, minima_excentricidad = motor.obtener_centro()
         
         print("\nCalculando centro del grafo...")
-        print("\nExcentricidad para cada ciudad:")
+        print(f"\nExcentricidad de las {min(self.ciudades_centrales, n)} ciudades más centrales:")
         print("----------------------------------------")
-        
-        for i in range(n):
-            maxima_distancia = 0
-            
-            for j in range(n):
-                if i != j:
-                    distancia = self.floyd.obtener_distancia(i, j)
-                    if distancia < sys.maxsize // 2 and distancia > maxima_distancia:
-                        maxima_distancia = distancia
-            
-            print(f"{ciudades[i]}: {maxima_distancia}")
-            
-            if maxima_distancia < minima_excentricidad:
-                minima_excentricidad = maxima_distancia
-                centro_idx = i
+        for i, excentricidad in motor.obtener_mas_centrales(self.ciudades_centrales):
+            print(f"{ciudades[i]}: {excentricidad}")
         
         if centro_idx != -1:
             print("----------------------------------------")
@@ -330,7 +2644,7 @@ class main:
             print("------------------------------------------")
             for j in range(n):
                 if centro_idx != j:
-                    distancia = self.floyd.obtener_distancia(centro_idx, j)
+                    distancia = motor.obtener_distancia(centro_idx, j)
                     if distancia < sys.maxsize // 2:
                         print(f"{ciudades[centro_idx]} -> {ciudades[j]}: {distancia} horas")
                     else:
@@ -340,12 +2654,16 @@ class main:
     
     def modificar_grafo(self):
         rutas = self.grafo.obtener_rutas_originales()
-        print("\nRutas disponibles:")
-        for idx, ruta in enumerate(rutas):
-            print(f"{idx}: {ruta.ciudad1} - {ruta.ciudad2} (Normal: {ruta.tiempo_normal}, Lluvia: {ruta.tiempo_lluvia}, Nieve: {ruta.tiempo_nieve}, Tormenta: {ruta.tiempo_tormenta})")
+        if len(rutas) <= self.max_listado:
+            print("\nRutas disponibles:")
+            for idx, ruta in enumerate(rutas):
+                estado = " [bloqueada]" if self.grafo.esta_cerrada(ruta.ciudad1, ruta.ciudad2) else ""
+                print(f"{idx}: {ruta.ciudad1} - {ruta.ciudad2} (Normal: {ruta.tiempo_normal}, Lluvia: {ruta.tiempo_lluvia}, Nieve: {ruta.tiempo_nieve}, Tormenta: {ruta.tiempo_tormenta}){estado}")
+        else:
+            print(f"\n{len(rutas)} rutas disponibles; se eligen por sus dos ciudades.")
         
         try:
-            opcion = int(input("\nElija una opción:\n1. Modificar ruta existente\n2. Agregar nueva ruta\n3. Bloquear ruta\n4. Volver\n\nOpción: "))
+            opcion = int(input("\nElija una opción:\n1. Modificar ruta existente\n2. Agregar nueva ruta\n3. Bloquear ruta\n4. Reabrir ruta\n5. Volver\n\nOpción: "))
             
             if opcion == 1:
                 self.modificar_ruta_existente()
@@ -354,25 +2672,41 @@ class main:
             elif opcion == 3:
                 self.bloquear_ruta()
             elif opcion == 4:
+                self.reabrir_ruta()
+            elif opcion == 5:
                 return
             else:
                 print("\nOpción no válida.")
-            
-            # Recalcular Floyd después de modificar
-            self.floyd.calcular(self.grafo.obtener_matriz())
         
         except ValueError:
             print("\nEntrada no válida. Debe ingresar un número.")
     
+    def elegir_ruta(self, accion: str) -> Optional[Ruta]:
+        # Por índice o por sus dos ciudades ("ciudad1 ciudad2", nombres o prefijos)
+        partes = input(f"\nIngrese la ruta a {accion} (índice o 'ciudad1 ciudad2'): ").split()
+        if len(partes) == 1:
+            rutas = self.grafo.obtener_rutas_originales()
+            idx_ruta = int(partes[0])
+            if idx_ruta < 0 or idx_ruta >= len(rutas):
+                print("\nÍndice de ruta no válido.")
+                return None
+            return rutas[idx_ruta]
+        if len(partes) != 2:
+            print("\nIndique un índice o dos ciudades.")
+            return None
+        i = self.elegir_ciudad(partes[0])
+        j = self.elegir_ciudad(partes[1]) if i != -1 else -1
+        if j == -1:
+            return None
+        ruta = self.grafo.buscar_ruta(self.grafo.ciudades[i], self.grafo.ciudades[j])
+        if ruta is None:
+            print(f"\nNo hay ruta entre {self.grafo.ciudades[i]} y {self.grafo.ciudades[j]}.")
+        return ruta
+    
     def modificar_ruta_existente(self):
-        rutas = self.grafo.obtener_rutas_originales()
-        idx_ruta = int(input("\nIngrese el índice de la ruta a modificar: "))
-        
-        if idx_ruta < 0 or idx_ruta >= len(rutas):
-            print("\nÍndice de ruta no válido.")
+        ruta = self.elegir_ruta("modificar")
+        if ruta is None:
             return
-        
-        ruta = rutas[idx_ruta]
         print(f"\nModificando ruta: {ruta.ciudad1} - {ruta.ciudad2}")
         print("Seleccione condición climática:")
         print(f"1. Normal ({ruta.tiempo_normal})")
@@ -394,5 +2728,351 @@ class main:
             print("\nOpción no válida.")
             return
         
-        self.grafo.actualizar_ruta(ruta.ciudad1, ruta.ciudad2, nuevo_tiempo)
-        print(f"\nRuta actualizada: {ruta.ciudad1} - {ruta.ciudad2} con nuevo tiempo: {nuevo_tiempo}")
\ No newline at end of file
+        self.cambiar_peso_ruta(ruta.ciudad1, ruta.ciudad2, nuevo_tiempo)
+        print(f"\nRuta actualizada: {ruta.ciudad1} - {ruta.ciudad2} con nuevo tiempo: {nuevo_tiempo}")
+    
+    def agregar_nueva_ruta(self):
+        ciudad1 = input("\nIngrese la ciudad origen: ").strip()
+        ciudad2 = input("Ingrese la ciudad destino: ").strip()
+        tiempo_normal = int(input("Tiempo normal: "))
+        tiempo_lluvia = int(input("Tiempo con lluvia: "))
+        tiempo_nieve = int(input("Tiempo con nieve: "))
+        tiempo_tormenta = int(input("Tiempo con tormenta: "))
+        
+        ruta = Ruta(f"{ciudad1}To{ciudad2}", ciudad1, ciudad2,
+                    tiempo_normal, tiempo_lluvia, tiempo_nieve, tiempo_tormenta)
+        try:
+            self.agregar_ruta(ruta)
+        except ValueError as e:
+            print(f"\n{e}")
+            return
+        print(f"\nNueva ruta agregada: {ciudad1} - {ciudad2}")
+    
+    @staticmethod
+    def validar_ruta(ruta: Ruta):
+        # Una ruta de una ciudad a sí misma o con tiempo no positivo rompería la diagonal en cero
+        if not ruta.ciudad1 or not ruta.ciudad2 or ruta.ciudad1 == ruta.ciudad2:
+            raise ValueError("Ciudades no válidas.")
+        if any(getattr(ruta, f"tiempo_{condicion}") <= 0 for condicion in CONDICIONES):
+            raise ValueError("Los tiempos deben ser positivos.")
+    
+    def agregar_ruta(self, ruta: Ruta):
+        self.validar_ruta(ruta)
+        ciudad1, ciudad2 = ruta.ciudad1, ruta.ciudad2
+        if self.dijkstra is not None:
+            # Las consultas con Dijkstra leen el grafo actual, no hay tablas que mantener
+            self.grafo.agregar_ruta(ruta)
+        elif ciudad1 in self.grafo.indice_ciudad and ciudad2 in self.grafo.indice_ciudad:
+            peso_anterior = self.grafo.obtener_peso(ciudad1, ciudad2)
+            self.grafo.agregar_ruta(ruta)
+            self.floyd.actualizar_arista(self.grafo.obtener_matriz(),
+                                         self.grafo.indice_ciudad[ciudad1],
+                                         self.grafo.indice_ciudad[ciudad2], peso_anterior,
+                                         self.grafo.version)
+        else:
+            # Una ciudad nueva cambia el tamaño de la matriz: se recalcula completo
+            self.grafo.agregar_ruta(ruta)
+            self.floyd.calcular(self.grafo.obtener_matriz(), self.grafo.version, self.grafo.cierres)
+    
+    def bloquear_ruta(self):
+        ruta = self.elegir_ruta("bloquear")
+        if ruta is None:
+            return
+        self.cerrar_rutas([(ruta.ciudad1, ruta.ciudad2)])
+        print(f"\nRuta bloqueada: {ruta.ciudad1} - {ruta.ciudad2}")
+    
+    def reabrir_ruta(self):
+        ruta = self.elegir_ruta("reabrir")
+        if ruta is None:
+            return
+        if not self.grafo.esta_cerrada(ruta.ciudad1, ruta.ciudad2):
+            print(f"\nLa ruta {ruta.ciudad1} - {ruta.ciudad2} no está bloqueada.")
+            return
+        self.abrir_rutas([(ruta.ciudad1, ruta.ciudad2)])
+        print(f"\nRuta reabierta: {ruta.ciudad1} - {ruta.ciudad2}")
+    
+    def cerrar_rutas(self, pares: List[Tuple[str, str]]):
+        cerradas = self.grafo.cerrar_rutas(pares)
+        if self.dijkstra is None and cerradas:
+            self.floyd.cerrar_rutas(self.grafo.obtener_matriz(), cerradas, self.grafo.version)
+    
+    def abrir_rutas(self, pares: List[Tuple[str, str]]):
+        abiertas = self.grafo.abrir_rutas(pares)
+        if self.dijkstra is None and abiertas:
+            self.floyd.abrir_rutas(self.grafo.obtener_matriz(), abiertas, self.grafo.version)
+    
+    def cambiar_peso_ruta(self, ciudad1: str, ciudad2: str, tiempo: int):
+        peso_anterior = self.grafo.obtener_peso(ciudad1, ciudad2)
+        self.grafo.actualizar_ruta(ciudad1, ciudad2, tiempo)
+        if self.dijkstra is not None:
+            return
+        self.floyd.actualizar_arista(self.grafo.obtener_matriz(),
+                                     self.grafo.indice_ciudad[ciudad1],
+                                     self.grafo.indice_ciudad[ciudad2], peso_anterior,
+                                     self.grafo.version)
+
+
+class GestorInstantaneas:
+    # Cada instantánea es un main resuelto que no se vuelve a modificar una vez publicado.
+    # Leer es tomar la referencia vigente (sin bloqueo); los escritores se turnan para
+    # derivar la siguiente versión, que comparte con la anterior todas las filas que no cambió
+    def __init__(self, programa: main):
+        self._preparar(programa)
+        self.actual = programa
+        self._escritura = threading.Lock()
+    
+    @staticmethod
+    def _preparar(programa: main):
+        # Deja resuelto todo lo que se calcula al leer, para que los lectores no escriban;
+        # con Dijkstra el centro son n búsquedas completas, que así corren en el escritor
+        motor = programa.motor_consultas()
+        motor.obtener_centro()
+        programa.motor_rutas()
+    
+    def leer(self) -> main:
+        return self.actual
+    
+    def modificar(self, metodo: str, *argumentos) -> main:
+        with self._escritura:
+            nueva = self.actual.copiar()
+            getattr(nueva, metodo)(*argumentos)
+            self._preparar(nueva)
+            self.actual = nueva
+            return nueva
+
+
+class ServicioRutas:
+    # Las consultas leen siempre la instantánea vigente; los cambios pasan por un único
+    # escritor que la reemplaza cuando termina de resolver la siguiente
+    def __init__(self, programa: main, host: str = "127.0.0.1", puerto: int = 8010):
+        self.gestor = GestorInstantaneas(programa)
+        self.host = host
+        self.puerto = puerto
+        # Tope del parámetro k de /alternativas y /centro: un k mayor se recorta a este valor
+        # (cada ruta alternativa es una búsqueda más) y uno no positivo responde 400
+        self.max_k = 20
+        self._cambios = None
+        self._escritor = None
+    
+    @property
+    def instantanea(self) -> main:
+        return self.gestor.leer()
+    
+    async def iniciar(self):
+        self._cambios = asyncio.Queue()
+        self._escritor = asyncio.get_running_loop().create_task(self._aplicar_cambios())
+        servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = servidor.sockets[0].getsockname()[1]
+        return servidor
+    
+    async def detener(self, servidor):
+        servidor.close()
+        await servidor.wait_closed()
+        self._escritor.cancel()
+    
+    async def servir(self):
+        servidor = await self.iniciar()
+        print(f"Sirviendo rutas en http://{self.host}:{self.puerto}")
+        async with servidor:
+            await servidor.serve_forever()
+    
+    async def _aplicar_cambios(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            metodo, argumentos, futuro = await self._cambios.get()
+            try:
+                # El recálculo corre fuera del bucle de eventos; mientras tanto se sigue leyendo la instantánea vieja
+                nueva = await loop.run_in_executor(None, self.gestor.modificar, metodo, *argumentos)
+            except Exception as e:
+                if not futuro.cancelled():
+                    futuro.set_exception(e)
+                continue
+            if not futuro.cancelled():
+                futuro.set_result(nueva.grafo.version)
+    
+    async def modificar(self, metodo: str, *argumentos) -> int:
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cambios.put((metodo, argumentos, futuro))
+        return await futuro
+    
+    async def despachar(self, metodo: str, destino: str, cuerpo: bytes) -> Tuple[int, dict]:
+        partes = urlsplit(destino)
+        consulta = {clave: valores[0] for clave, valores in parse_qs(partes.query).items()}
+        instantanea = self.instantanea
+        try:
+            if metodo == "GET" and partes.path in ("/ruta", "/distancia", "/alternativas", "/centro"):
+                # Las lecturas corren en hilos aparte: una consulta lenta no frena a las demás
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, self._leer, instantanea, partes.path, consulta)
+            if metodo == "POST" and partes.path in ("/peso", "/bloquear", "/abrir", "/rutas"):
+                datos = json.loads(cuerpo or b"{}")
+                if not isinstance(datos, dict):
+                    raise ValueError("El cuerpo debe ser un objeto JSON")
+                pares = self._leer_pares(datos)
+                if partes.path == "/rutas":
+                    ciudad1, ciudad2 = pares[0]
+                    ruta = Ruta(None, ciudad1, ciudad2, *(int(datos[f"tiempo_{c}"]) for c in CONDICIONES))
+                    main.validar_ruta(ruta)
+                    return 200, {"version": await self.modificar("agregar_ruta", ruta)}
+                
+                for ciudad in (c for par in pares for c in par):
+                    if ciudad not in instantanea.grafo.indice_ciudad:
+                        return 404, {"error": f"Ciudad desconocida: {ciudad}"}
+                if partes.path == "/peso":
+                    tiempo = int(datos["tiempo"])
+                    if tiempo <= 0 or pares[0][0] == pares[0][1]:
+                        raise ValueError("El tiempo debe ser positivo y unir dos ciudades distintas")
+                    version = await self.modificar("cambiar_peso_ruta", *pares[0], tiempo)
+                else:
+                    version = await self.modificar("cerrar_rutas" if partes.path == "/bloquear" else "abrir_rutas", pares)
+                return 200, {"version": version}
+        except KeyError as e:
+            return 400, {"error": f"Falta el parámetro {e}"}
+        except (ValueError, TypeError, IndexError) as e:
+            return 400, {"error": str(e)}
+        return 404, {"error": f"Recurso no encontrado: {metodo} {partes.path}"}
+    
+    def _leer_k(self, consulta: Dict[str, str], por_defecto: int) -> int:
+        k = int(consulta.get("k", por_defecto))
+        if k <= 0:
+            raise ValueError("k debe ser positivo")
+        return min(k, self.max_k)
+    
+    def _leer(self, instantanea: main, recurso: str, consulta: Dict[str, str]) -> Tuple[int, dict]:
+        if recurso in ("/ruta", "/distancia"):
+            (distancia, ruta), = instantanea.consultar_lote([(consulta["origen"], consulta["destino"])])
+            respuesta = {"origen": consulta["origen"], "destino": consulta["destino"],
+                         "distancia": distancia if distancia < sys.maxsize // 2 else None, "version": instantanea.grafo.version}
+            if recurso == "/ruta":
+                respuesta["ruta"] = ruta
+            return 200, respuesta
+        if recurso == "/alternativas":
+            for ciudad in (consulta["origen"], consulta["destino"]):
+                if ciudad not in instantanea.grafo.indice_ciudad:
+                    return 404, {"error": f"Ciudad desconocida: {ciudad}"}
+            rutas = instantanea.rutas_alternativas(consulta["origen"], consulta["destino"], self._leer_k(consulta, 3))
+            return 200, {"origen": consulta["origen"], "destino": consulta["destino"],
+                         "rutas": [{"distancia": distancia, "ruta": ruta} for distancia, ruta in rutas],
+                         "version": instantanea.grafo.version}
+        motor = instantanea.motor_consultas()
+        ciudades = instantanea.grafo.ciudades
+        centro, excentricidad = motor.obtener_centro()
+        if centro == -1:
+            return 404, {"error": "No hay ciudades en el grafo"}
+        return 200, {"centro": ciudades[centro], "excentricidad": excentricidad,
+                     "mas_centrales": [{"ciudad": ciudades[i], "excentricidad": e}
+                                       for i, e in motor.obtener_mas_centrales(self._leer_k(consulta, 5))],
+                     "version": instantanea.grafo.version}
+    
+    @staticmethod
+    def _leer_pares(datos: dict) -> List[Tuple[str, str]]:
+        # Una ruta (ciudad1, ciudad2) o varias en "rutas"; /bloquear y /abrir usan todas
+        pares = datos["rutas"] if "rutas" in datos else [[datos["ciudad1"], datos["ciudad2"]]]
+        if not isinstance(pares, list) or not pares or not all(
+                isinstance(par, list) and len(par) == 2 and all(isinstance(ciudad, str) for ciudad in par)
+                for par in pares):
+            raise ValueError("Se esperaba ciudad1 y ciudad2, o en \"rutas\" una lista no vacía de pares de ciudades")
+        return [tuple(par) for par in pares]
+    
+    async def _atender(self, lector, escritor):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea.strip():
+                    break
+                metodo, destino, _ = linea.decode("latin-1").split(" ", 2)
+                encabezados = {}
+                while True:
+                    encabezado = await lector.readline()
+                    if not encabezado.strip():
+                        break
+                    clave, _, valor = encabezado.decode("latin-1").partition(":")
+                    encabezados[clave.strip().lower()] = valor.strip()
+                cuerpo = await lector.readexactly(int(encabezados.get("content-length", 0)))
+                
+                estado, respuesta = await self.despachar(metodo, destino, cuerpo)
+                datos = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                cerrar = encabezados.get("connection", "").lower() == "close"
+                escritor.write(f"HTTP/1.1 {estado} {HTTPStatus(estado).phrase}\r\n"
+                               f"Content-Type: application/json; charset=utf-8\r\n"
+                               f"Content-Length: {len(datos)}\r\n"
+                               f"{'Connection: close' if cerrar else 'Connection: keep-alive'}\r\n\r\n".encode("latin-1") + datos)
+                await escritor.drain()
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+
+def _linea_de_comandos(argumentos: Optional[List[str]] = None):
+    analizador = argparse.ArgumentParser(description="Sistema de Optimización de Rutas Logísticas")
+    analizador.add_argument("--datos", default="logistica.txt", help="archivo de rutas")
+    analizador.add_argument("--jerarquia", action="store_true",
+                            help="responde las rutas con una jerarquía de contracción (redes muy grandes)")
+    subcomandos = analizador.add_subparsers(dest="comando")
+    lote = subcomandos.add_parser("lote", help="lee pares origen,destino (CSV) de stdin y escribe distancia y ruta en stdout")
+    lote.add_argument("--tam-lote", type=int, default=1 << 16, help="pares resueltos por llamada al motor")
+    horario = subcomandos.add_parser("horario", help="centro y rutas de cada ventana de un horario de clima (JSON)")
+    horario.add_argument("archivo", help="líneas 'ventana ciudad1 ciudad2 condición'")
+    horario.add_argument("--pares", help="CSV de pares origen,destino a resolver en cada ventana")
+    horario.add_argument("--procesos", type=int, help="procesos para ventanas independientes (por defecto, uno por CPU)")
+    servir = subcomandos.add_parser("servir", help="atiende consultas de rutas por HTTP en localhost")
+    servir.add_argument("--host", default="127.0.0.1")
+    servir.add_argument("--puerto", type=int, default=8010)
+    analizador.add_argument("--metricas", action="store_true",
+                            help="al terminar, registra contadores y tiempos por fase como JSON en stderr")
+    analizador.add_argument("--perfilar", choices=("cprofile", "tracemalloc"),
+                            help="ejecuta bajo cProfile o tracemalloc y muestra el resumen en stderr")
+    argumentos = analizador.parse_args(argumentos)
+    
+    metricas = activar_metricas() if argumentos.metricas else None
+    try:
+        if argumentos.perfilar:
+            perfilar(argumentos.perfilar, _ejecutar_comando, analizador, argumentos)
+        else:
+            _ejecutar_comando(analizador, argumentos)
+    finally:
+        if metricas is not None:
+            desactivar_metricas()
+            if not logging.getLogger("HDT10.metricas").hasHandlers():
+                logging.basicConfig(level=logging.INFO, format="%(message)s")
+            metricas.registrar()
+
+
+def _ejecutar_comando(analizador: argparse.ArgumentParser, argumentos: argparse.Namespace):
+    programa = main()
+    programa.archivo_datos = argumentos.datos
+    programa.usar_jerarquia = argumentos.jerarquia
+    if argumentos.comando in ("lote", "servir", "horario"):
+        try:
+            programa.preparar()
+        except FileNotFoundError:
+            analizador.exit(1, f"Error: No se encontró el archivo {argumentos.datos}\n")
+    
+    if argumentos.comando == "lote":
+        programa.procesar_lote_csv(sys.stdin, sys.stdout, argumentos.tam_lote)
+    elif argumentos.comando == "horario":
+        pares = []
+        if argumentos.pares:
+            with open(argumentos.pares, newline="") as archivo:
+                pares = [(fila[0].strip(), fila[1].strip()) for fila in csv.reader(archivo)
+                         if len(fila) >= 2 and fila != ["origen", "destino"]]
+        try:
+            resultado = programa.evaluar_horario(argumentos.archivo, pares, argumentos.procesos)
+        except (OSError, ValueError) as error:
+            analizador.exit(1, f"Error: {error}\n")
+        json.dump(resultado, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif argumentos.comando == "servir":
+        try:
+            asyncio.run(ServicioRutas(programa, argumentos.host, argumentos.puerto).servir())
+        except KeyboardInterrupt:
+            pass
+    else:
+        programa.ejecutar()
+
+
+if __name__ == "__main__":
+    _linea_de_comandos()
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from typing import List, Dict, Tuple, Optional, Callable
+
+from HDT10 import AnalizadorArchivo, main, np
+
+REDES = ("grilla", "geometrica", "libre-escala")
+
+
+def _tiempos_clima(generador: random.Random, normal: int) -> Tuple[int, int, int, int]:
+    # Cada condición es al menos tan lenta como la anterior, como en logistica.txt
+    lluvia = normal + generador.randint(0, normal // 2 + 1)
+    nieve = lluvia + generador.randint(0, normal // 2 + 1)
+    tormenta = nieve + generador.randint(0, normal + 1)
+    return normal, lluvia, nieve, tormenta
+
+
+def generar_grilla(n: int, generador: random.Random) -> List[Tuple[int, int, int]]:
+    lado = math.ceil(math.sqrt(n))
+    aristas = []
+    for i in range(n):
+        columna = i % lado
+        if columna + 1 < lado and i + 1 < n:
+            aristas.append((i, i + 1, generador.randint(1, 50)))
+        if i + lado < n:
+            aristas.append((i, i + lado, generador.randint(1, 50)))
+    return aristas
+
+
+def generar_geometrica(n: int, generador: random.Random) -> List[Tuple[int, int, int]]:
+    # Puntos al azar en el cuadrado unitario unidos si están a menos de "radio";
+    # las celdas de lado "radio" evitan comparar todos contra todos
+    radio = math.sqrt(2.5 * math.log(max(n, 2)) / (math.pi * n))
+    puntos = [(generador.random(), generador.random()) for _ in range(n)]
+    celdas: Dict[Tuple[int, int], List[int]] = {}
+    for i, (x, y) in enumerate(puntos):
+        celdas.setdefault((int(x / radio), int(y / radio)), []).append(i)
+
+    aristas = []
+    for (cx, cy), miembros in celdas.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in celdas.get((cx + dx, cy + dy), ()):
+                    for i in miembros:
+                        if i < j and math.dist(puntos[i], puntos[j]) < radio:
+                            aristas.append((i, j, 1 + int(math.dist(puntos[i], puntos[j]) * 1000)))
+    return aristas
+
+
+def generar_libre_escala(n: int, generador: random.Random, m: int = 2) -> List[Tuple[int, int, int]]:
+    # Barabási-Albert: cada ciudad nueva se une a m existentes con probabilidad
+    # proporcional a su grado (la lista "extremos" repite cada ciudad una vez por arista)
+    aristas = []
+    extremos = []
+    for i in range(min(m + 1, n)):
+        for j in range(i):
+            aristas.append((j, i, generador.randint(1, 50)))
+            extremos += [i, j]
+    for i in range(m + 1, n):
+        destinos = set()
+        while len(destinos) < m:
+            destinos.add(generador.choice(extremos))
+        for j in destinos:
+            aristas.append((j, i, generador.randint(1, 50)))
+            extremos += [i, j]
+    return aristas
+
+
+GENERADORES: Dict[str, Callable[[int, random.Random], List[Tuple[int, int, int]]]] = {
+    "grilla": generar_grilla,
+    "geometrica": generar_geometrica,
+    "libre-escala": generar_libre_escala,
+}
+
+
+def escribir_red(nombre_archivo: str, red: str, n: int, semilla: int) -> int:
+    generador = random.Random(f"{red}-{n}-{semilla}")
+    aristas = GENERADORES[red](n, generador)
+    with open(nombre_archivo, 'w') as archivo:
+        for i, j, normal in aristas:
+            tiempos = " ".join(map(str, _tiempos_clima(generador, normal)))
+            archivo.write(f"Ciudad{i:05d} Ciudad{j:05d} {tiempos}\n")
+    return len(aristas)
+
+
+class Medidor:
+    def __init__(self, memoria: bool = True):
+        self.memoria = memoria
+        self.etapas: Dict[str, Dict[str, float]] = {}
+
+    def medir(self, etapa: str, funcion: Callable, *argumentos):
+        if self.memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            return funcion(*argumentos)
+        finally:
+            segundos = time.perf_counter() - inicio
+            self.etapas[etapa] = {"segundos": round(segundos, 6)}
+            if self.memoria:
+                self.etapas[etapa]["pico_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def omitir(self, etapa: str, motivo: str):
+        self.etapas[etapa] = {"omitida": motivo}
+
+
+def medir_red(red: str, n: int, semilla: int, consultas: int, actualizaciones: int,
+              max_centro: int, memoria: bool, directorio: str) -> dict:
+    archivo = os.path.join(directorio, f"{red}-{n}.txt")
+    rutas = escribir_red(archivo, red, n, semilla)
+    medidor = Medidor(memoria)
+    generador = random.Random(semilla)
+
+    programa = main()
+    programa.archivo_datos = archivo
+    tabla = medidor.medir("analizar", AnalizadorArchivo.analizar_tabla, archivo)
+    programa.grafo = medidor.medir("construir", programa.construir_grafo, tabla)
+    ciudades = programa.grafo.ciudades
+    motor = "dijkstra" if programa.dijkstra is not None else "floyd"
+    if programa.dijkstra is None:
+        medidor.medir("resolver", programa.floyd.calcular, programa.grafo.obtener_matriz(),
+                      programa.grafo.version, programa.grafo.cierres)
+    else:
+        medidor.omitir("resolver", "Dijkstra resuelve por consulta")
+
+    pares = [(generador.randrange(len(ciudades)), generador.randrange(len(ciudades))) for _ in range(consultas)]
+    consultor = programa.motor_consultas()
+    medidor.medir("consultar", lambda: [consultor.obtener_ruta_indices(i, j) for i, j in pares])
+    medidor.medir("consultar_lote", programa.consultar_lote, [(ciudades[i], ciudades[j]) for i, j in pares])
+
+    if len(ciudades) <= max_centro:
+        medidor.medir("centro", consultor.obtener_centro)
+    else:
+        medidor.omitir("centro", f"más de {max_centro} ciudades")
+
+    vista = programa.grafo.obtener_rutas_originales()
+    cambios = [vista[generador.randrange(len(vista))] for _ in range(actualizaciones)]
+    medidor.medir("actualizar", lambda: [programa.cambiar_peso_ruta(ruta.ciudad1, ruta.ciudad2,
+                                                                    generador.randint(1, 60))
+                                         for ruta in cambios])
+    os.remove(archivo)
+    return {"red": red, "ciudades": len(ciudades), "rutas": rutas, "motor": motor, "etapas": medidor.etapas}
+
+
+def _commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(tamanos: List[int], redes: List[str], semilla: int = 1, consultas: int = 1000,
+             actualizaciones: int = 20, max_centro: int = 2000, memoria: bool = True) -> dict:
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for red in redes:
+            for n in tamanos:
+                resultados.append(medir_red(red, n, semilla, consultas, actualizaciones,
+                                            max_centro, memoria, directorio))
+    return {
+        "metadatos": {
+            "commit": _commit_actual(),
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__ if np is not None else None,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "semilla": semilla,
+            "memoria": memoria,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(anterior: dict, actual: dict, tolerancia: float) -> List[str]:
+    # Lista las etapas que tardan más de (1 + tolerancia) veces lo que tardaban antes
+    base = {(r["red"], r["ciudades"], etapa): datos.get("segundos")
+            for r in anterior["resultados"] for etapa, datos in r["etapas"].items()}
+    regresiones = []
+    for r in actual["resultados"]:
+        for etapa, datos in r["etapas"].items():
+            antes = base.get((r["red"], r["ciudades"], etapa))
+            ahora = datos.get("segundos")
+            if antes and ahora and ahora > antes * (1 + tolerancia):
+                regresiones.append(f"{r['red']} n={r['ciudades']} {etapa}: {antes:.4f}s -> {ahora:.4f}s "
+                                   f"(+{(ahora / antes - 1) * 100:.0f}%)")
+    return regresiones
+
+
+def _linea_de_comandos(argumentos: Optional[List[str]] = None) -> int:
+    analizador = argparse.ArgumentParser(description="Mediciones de HDT10 sobre redes sintéticas")
+    analizador.add_argument("--tamanos", type=int, nargs="+", default=[100, 1000],
+                            help="cantidades de ciudades (p. ej. 100 1000 5000 20000)")
+    analizador.add_argument("--redes", nargs="+", choices=REDES, default=list(REDES))
+    analizador.add_argument("--semilla", type=int, default=1)
+    analizador.add_argument("--consultas", type=int, default=1000)
+    analizador.add_argument("--actualizaciones", type=int, default=20)
+    analizador.add_argument("--max-centro", type=int, default=2000,
+                            help="no medir el centro por encima de esta cantidad de ciudades")
+    analizador.add_argument("--sin-memoria", action="store_true",
+                            help="no usar tracemalloc (tiempos sin su sobrecarga)")
+    analizador.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    analizador.add_argument("--comparar", help="JSON de una corrida anterior contra la cual comparar")
+    analizador.add_argument("--tolerancia", type=float, default=0.2,
+                            help="fracción de lentitud aceptada antes de reportar una regresión")
+    argumentos = analizador.parse_args(argumentos)
+
+    resultados = ejecutar(argumentos.tamanos, argumentos.redes, argumentos.semilla, argumentos.consultas,
+                          argumentos.actualizaciones, argumentos.max_centro, not argumentos.sin_memoria)
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+    if argumentos.salida:
+        with open(argumentos.salida, 'w') as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if argumentos.comparar:
+        with open(argumentos.comparar) as archivo:
+            regresiones = comparar(json.load(archivo), resultados, argumentos.tolerancia)
+        for regresion in regresiones:
+            print(f"Regresión: {regresion}", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_linea_de_comandos())
@@ -3,7 +3,31 @@ import sys
 import os
 from io import StringIO
 from unittest.mock import patch
-from HDT10 import Ruta, Grafo, AlgoritmoFloyd, AnalizadorArchivo, main
+import random
+import asyncio
+import threading
+import json
+import tracemalloc
+from HDT10 import (Ruta, RutaTabla, Grafo, GrafoDisperso, AlgoritmoFloyd, AlgoritmoDijkstra,
+                   AnalizadorArchivo, EscenariosClima, main, np, GestorInstantaneas, ServicioRutas,
+                   _linea_de_comandos, activar_metricas, desactivar_metricas, JerarquiaContraccion,
+                   HorarioClima)
+
+# Motores de Floyd disponibles: Python siempre, NumPy si está instalado
+MOTORES = [False] + ([True] if np is not None else [])
+
+
+def _rutas_aleatorias(generador, n_ciudades, n_rutas, tiempo_maximo=30, tiempo_minimo=1, clima=None):
+    # Rutas entre ciudades "Ciudad{i}" elegidas al azar; clima(generador, normal) da los otros tres
+    # tiempos (por defecto 0), así que cada prueba sigue consumiendo el generador en el mismo orden
+    ciudades = [f"Ciudad{i}" for i in range(n_ciudades)]
+    rutas = []
+    for _ in range(n_rutas):
+        c1, c2 = generador.sample(ciudades, 2)
+        normal = generador.randint(tiempo_minimo, tiempo_maximo)
+        rutas.append(Ruta(None, c1, c2, normal, *(clima(generador, normal) if clima else (0, 0, 0))))
+    return rutas
+
 
 class TestRuta(unittest.TestCase):
     def test_creacion_ruta(self):
@@ -16,6 +40,73 @@ class TestRuta(unittest.TestCase):
         self.assertEqual(ruta.tiempo_nieve, 20)
         self.assertEqual(ruta.tiempo_tormenta, 50)
 
+class TestRutaTabla(unittest.TestCase):
+    def setUp(self):
+        self.rutas = [
+            Ruta(None, "BuenosAires", "SaoPaulo", 10, 15, 20, 50),
+            Ruta(None, "Lima", "Quito", 10, 12, 15, 20),
+            Ruta(None, "BuenosAires", "Lima", 15, 20, 30, 70)
+        ]
+        self.tabla = RutaTabla.desde_rutas(self.rutas)
+    
+    def test_ruta_compacta(self):
+        self.assertFalse(hasattr(self.rutas[0], "__dict__"))
+        self.assertEqual(self.rutas[0].nombre, "BuenosAiresToSaoPaulo")
+    
+    def test_columnas(self):
+        self.assertEqual(len(self.tabla), 3)
+        self.assertEqual(self.tabla.ciudades, ["BuenosAires", "SaoPaulo", "Lima", "Quito"])
+        self.assertEqual(list(self.tabla.origen), [0, 2, 0])
+        self.assertEqual(list(self.tabla.destino), [1, 3, 2])
+        ruta = self.tabla[-1]
+        self.assertEqual((ruta.ciudad1, ruta.ciudad2, ruta.tiempo_nieve), ("BuenosAires", "Lima", 30))
+        self.assertEqual([r.nombre for r in self.tabla[:2]], ["BuenosAiresToSaoPaulo", "LimaToQuito"])
+    
+    def test_vista_de_solo_lectura(self):
+        grafo = Grafo(self.tabla)
+        vista = grafo.obtener_rutas_originales()
+        self.assertEqual(len(vista), 3)
+        self.assertFalse(hasattr(vista, "agregar"))
+        grafo.agregar_ruta(Ruta(None, "Quito", "SaoPaulo", 20, 25, 30, 60))
+        self.assertEqual(len(vista), 4)
+        self.assertEqual(grafo.obtener_peso("Quito", "SaoPaulo"), 20)
+    
+    def test_mismo_orden_que_analizar(self):
+        archivo = "test_tabla.txt"
+        self.addCleanup(os.remove, archivo)
+        with open(archivo, 'w') as f:
+            for ruta in self.rutas:
+                f.write(f"{ruta.ciudad1} {ruta.ciudad2} {ruta.tiempo_normal} {ruta.tiempo_lluvia} "
+                        f"{ruta.tiempo_nieve} {ruta.tiempo_tormenta}\n")
+        tabla = AnalizadorArchivo.analizar_tabla(archivo)
+        self.assertEqual(tabla.ciudades, Grafo(AnalizadorArchivo.analizar(archivo)).obtener_ciudades())
+        self.assertEqual(list(tabla.tiempos["tormenta"]), [50, 20, 70])
+    
+    def test_busqueda_por_par_y_prefijo(self):
+        self.assertEqual(self.tabla.buscar("Lima", "BuenosAires"), 2)
+        self.assertEqual(self.tabla.buscar("Quito", "SaoPaulo"), -1)
+        self.assertEqual(self.tabla.buscar("Atlantida", "Lima"), -1)
+        self.assertEqual(self.tabla.ciudades_con_prefijo("B"), ["BuenosAires"])
+        self.assertEqual(self.tabla.ciudades_con_prefijo(""), ["BuenosAires", "Lima", "Quito", "SaoPaulo"])
+        
+        # Los índices ya armados siguen vigentes tras agregar, sin alterar la copia
+        copia = self.tabla.copiar()
+        self.tabla.agregar(Ruta(None, "Bogota", "Lima", 5, 5, 5, 5))
+        self.tabla.agregar(Ruta(None, "SaoPaulo", "BuenosAires", 9, 9, 9, 9))
+        self.assertEqual(self.tabla.ciudades_con_prefijo("B"), ["Bogota", "BuenosAires"])
+        self.assertEqual(self.tabla.ciudades_con_prefijo("B", limite=1), ["Bogota"])
+        self.assertEqual(self.tabla.buscar("Lima", "Bogota"), 3)
+        self.assertEqual(self.tabla.buscar("BuenosAires", "SaoPaulo"), 4)
+        self.assertEqual(copia.ciudades_con_prefijo("B"), ["BuenosAires"])
+        self.assertEqual(copia.buscar("BuenosAires", "SaoPaulo"), 0)
+        self.assertEqual(copia.buscar("Lima", "Bogota"), -1)
+        
+        for grafo in (Grafo(self.tabla), GrafoDisperso(self.tabla)):
+            self.assertEqual(grafo.buscar_ruta("SaoPaulo", "BuenosAires").tiempo_normal, 9)
+            self.assertIsNone(grafo.buscar_ruta("Quito", "Bogota"))
+            self.assertEqual(grafo.buscar_ciudades("Qu"), ["Quito"])
+
+
 class TestGrafo(unittest.TestCase):
     def setUp(self):
         rutas = [
@@ -47,12 +138,161 @@ class TestGrafo(unittest.TestCase):
         self.assertEqual(matriz[0][1], 20)
         self.assertEqual(matriz[1][0], 20)
     
+    def test_version_cambia_con_cada_modificacion(self):
+        version = self.grafo.version
+        self.grafo.actualizar_ruta("BuenosAires", "SaoPaulo", 20)
+        self.assertGreater(self.grafo.version, version)
+        version = self.grafo.version
+        self.grafo.agregar_ruta(Ruta("LimaToQuito", "Lima", "Quito", 10, 12, 15, 20))
+        self.assertGreater(self.grafo.version, version)
+    
+    def test_copiar_comparte_filas_sin_cambios(self):
+        copia = self.grafo.copiar()
+        copia.actualizar_ruta("BuenosAires", "SaoPaulo", 5)
+        copia.agregar_ruta(Ruta("LimaToQuito", "Lima", "Quito", 10, 12, 15, 20))
+        self.assertEqual(self.grafo.obtener_peso("BuenosAires", "SaoPaulo"), 10)
+        self.assertEqual(copia.obtener_peso("BuenosAires", "SaoPaulo"), 5)
+        self.assertEqual(self.grafo.obtener_ciudades(), ["BuenosAires", "SaoPaulo", "Lima"])
+        self.assertEqual(len(self.grafo.obtener_rutas_originales()), 2)
+        self.assertEqual(len(copia.obtener_rutas_originales()), 3)
+        
+        copia = self.grafo.copiar()
+        copia.actualizar_ruta("BuenosAires", "SaoPaulo", 7)
+        self.assertIs(copia.obtener_matriz()[2], self.grafo.obtener_matriz()[2])
+        self.assertIsNot(copia.obtener_matriz()[0], self.grafo.obtener_matriz()[0])
+    
+    def test_cierres_separados_de_los_pesos(self):
+        version = self.grafo.version
+        self.assertEqual(self.grafo.cerrar_rutas([("BuenosAires", "SaoPaulo")]), [(0, 1)])
+        self.assertEqual(self.grafo.cerrar_rutas([("SaoPaulo", "BuenosAires")]), [])
+        self.assertTrue(self.grafo.esta_cerrada("SaoPaulo", "BuenosAires"))
+        self.assertEqual(self.grafo.obtener_peso("BuenosAires", "SaoPaulo"), 10)
+        self.assertEqual(self.grafo.version, version + 1)
+        self.assertEqual(self.grafo.abrir_rutas([("BuenosAires", "SaoPaulo")]), [(0, 1)])
+        self.assertFalse(self.grafo.esta_cerrada("BuenosAires", "SaoPaulo"))
+        self.assertEqual(self.grafo.cierres, {})
+    
     def test_obtener_peso(self):
         peso = self.grafo.obtener_peso("BuenosAires", "SaoPaulo")
         self.assertEqual(peso, 10)
         peso = self.grafo.obtener_peso("SaoPaulo", "Lima")
         self.assertEqual(peso, sys.maxsize // 2)
 
+class TestGrafoDisperso(unittest.TestCase):
+    def setUp(self):
+        rutas = [
+            Ruta("BuenosAiresToSaoPaulo", "BuenosAires", "SaoPaulo", 10, 15, 20, 50),
+            Ruta("BuenosAiresToLima", "BuenosAires", "Lima", 15, 20, 30, 70)
+        ]
+        self.grafo = GrafoDisperso(rutas)
+    
+    def test_misma_api_que_grafo(self):
+        self.assertEqual(self.grafo.obtener_ciudades(), ["BuenosAires", "SaoPaulo", "Lima"])
+        self.assertEqual(self.grafo.obtener_peso("BuenosAires", "SaoPaulo"), 10)
+        self.assertEqual(self.grafo.obtener_peso("SaoPaulo", "Lima"), sys.maxsize // 2)
+        self.assertEqual(self.grafo.obtener_peso("Lima", "Lima"), 0)
+        self.grafo.actualizar_ruta("BuenosAires", "SaoPaulo", 20)
+        self.assertEqual(self.grafo.obtener_peso("SaoPaulo", "BuenosAires"), 20)
+    
+    def test_bloquear_elimina_vecino(self):
+        self.grafo.actualizar_ruta("BuenosAires", "SaoPaulo", sys.maxsize // 2)
+        self.assertNotIn(1, self.grafo.adyacencia[0])
+        self.assertEqual(self.grafo.obtener_peso("BuenosAires", "SaoPaulo"), sys.maxsize // 2)
+
+
+class TestAlgoritmoDijkstra(unittest.TestCase):
+    def test_coincide_con_floyd(self):
+        generador = random.Random(5)
+        rutas = _rutas_aleatorias(generador, 30, 45, 40)
+        
+        floyd = AlgoritmoFloyd(usar_numpy=False)
+        floyd.calcular(Grafo(rutas).obtener_matriz())
+        disperso = GrafoDisperso(rutas)
+        dijkstra = AlgoritmoDijkstra(disperso)
+        n = len(disperso.obtener_ciudades())
+        for i in range(n):
+            for j in range(n):
+                ruta = dijkstra.obtener_ruta_indices(i, j)
+                self.assertEqual(dijkstra.obtener_distancia(i, j), floyd.obtener_distancia(i, j))
+                self.assertEqual(len(ruta) > 0, len(floyd.obtener_ruta_indices(i, j)) > 0)
+                if ruta:
+                    self.assertEqual((ruta[0], ruta[-1]), (i, j))
+                    total = sum(disperso.obtener_peso(disperso.ciudades[a], disperso.ciudades[b])
+                                for a, b in zip(ruta, ruta[1:]))
+                    self.assertEqual(total, floyd.obtener_distancia(i, j))
+        self.assertEqual(dijkstra.obtener_centro(), floyd.obtener_centro())
+        self.assertEqual(dijkstra.obtener_mas_centrales(5), floyd.obtener_mas_centrales(5))
+
+
+class TestJerarquiaContraccion(unittest.TestCase):
+    def setUp(self):
+        generador = random.Random(21)
+        self.rutas = _rutas_aleatorias(generador, 40, 80, 40,
+                                       clima=lambda generador, normal: (generador.randint(40, 90), 0, 0))
+    
+    def comparar_con_floyd(self, jerarquia, matriz):
+        floyd = AlgoritmoFloyd(usar_numpy=False)
+        floyd.calcular(matriz)
+        for i in range(len(matriz)):
+            for j in range(len(matriz)):
+                distancia, ruta = jerarquia.consultar(i, j)
+                self.assertEqual(distancia, floyd.obtener_distancia(i, j))
+                if ruta:
+                    self.assertEqual((ruta[0], ruta[-1]), (i, j))
+                    self.assertEqual(sum(matriz[a][b] for a, b in zip(ruta, ruta[1:])), distancia)
+                else:
+                    self.assertTrue(i == j or distancia >= sys.maxsize // 2)
+    
+    def test_coincide_con_floyd_y_se_personaliza(self):
+        for usar_numpy in MOTORES:
+            grafo = Grafo(self.rutas)
+            jerarquia = JerarquiaContraccion(usar_numpy=usar_numpy)
+            jerarquia.preprocesar(grafo)
+            self.comparar_con_floyd(jerarquia, grafo.obtener_matriz())
+            
+            # Pesos y cierres nuevos: se vuelve a personalizar sobre la misma topología
+            orden = jerarquia.orden
+            grafo.actualizar_ruta(self.rutas[0].ciudad1, self.rutas[0].ciudad2, 1)
+            grafo.cerrar_rutas([(self.rutas[1].ciudad1, self.rutas[1].ciudad2)])
+            jerarquia.actualizar(grafo)
+            self.assertIs(jerarquia.orden, orden)
+            self.comparar_con_floyd(jerarquia, self._matriz_con_cierres(grafo))
+            
+            jerarquia.personalizar_condicion(grafo, "lluvia")
+            self.assertIs(jerarquia.orden, orden)
+            self.comparar_con_floyd(jerarquia, self._matriz_con_cierres(grafo, "lluvia"))
+            
+            # Una ruta entre ciudades que no eran vecinas cambia la topología
+            grafo.agregar_ruta(Ruta(None, "Ciudad0", "Atlantida", 3, 3, 3, 3))
+            jerarquia.actualizar(grafo)
+            self.assertIsNot(jerarquia.orden, orden)
+            self.comparar_con_floyd(jerarquia, self._matriz_con_cierres(grafo))
+    
+    def _matriz_con_cierres(self, grafo, condicion=None):
+        matriz = grafo.obtener_matriz_condicion(condicion) if condicion else grafo.obtener_matriz()
+        matriz = [list(fila) for fila in matriz]
+        for i, cerradas in grafo.cierres.items():
+            for j in cerradas:
+                matriz[i][j] = sys.maxsize // 2
+        return matriz
+    
+    def test_guardar_y_cargar(self):
+        archivo = "test_jerarquia.ch"
+        self.addCleanup(lambda: os.path.exists(archivo) and os.remove(archivo))
+        grafo = GrafoDisperso(self.rutas)
+        jerarquia = JerarquiaContraccion()
+        jerarquia.preprocesar(grafo)
+        jerarquia.guardar(archivo, grafo.ciudades, b"h" * 32)
+        
+        cargada = JerarquiaContraccion()
+        self.assertFalse(cargada.cargar(archivo, grafo, b"x" * 32))
+        self.assertTrue(cargada.cargar(archivo, grafo, b"h" * 32))
+        self.assertEqual(list(cargada.orden), list(jerarquia.orden))
+        n = len(grafo.ciudades)
+        self.assertEqual(cargada.consultar_lote(range(n), reversed(range(n))),
+                         jerarquia.consultar_lote(range(n), reversed(range(n))))
+
+
 class TestAlgoritmoFloyd(unittest.TestCase):
     def setUp(self):
         rutas = [
@@ -88,11 +328,548 @@ class TestAlgoritmoFloyd(unittest.TestCase):
         self.assertEqual(ruta_ba_qu[1], idx_li)
         self.assertEqual(ruta_ba_qu[2], idx_qu)
         
+        # SaoPaulo solo se conecta con BuenosAires: la ruta pasa por 4 ciudades
         ruta_sp_qu = self.floyd.obtener_ruta_indices(idx_sp, idx_qu)
-        self.assertEqual(len(ruta_sp_qu), 3)
+        self.assertEqual(len(ruta_sp_qu), 4)
         self.assertEqual(ruta_sp_qu[0], idx_sp)
         self.assertEqual(ruta_sp_qu[1], idx_ba)
         self.assertEqual(ruta_sp_qu[2], idx_li)
+        self.assertEqual(ruta_sp_qu[3], idx_qu)
+    
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_motor_numpy_igual_a_python(self):
+        generador = random.Random(10)
+        rutas = _rutas_aleatorias(generador, 25, 60, 50)
+        grafo = Grafo(rutas)
+        
+        python = AlgoritmoFloyd(usar_numpy=False)
+        vectorizado = AlgoritmoFloyd(usar_numpy=True)
+        python.calcular(grafo.obtener_matriz())
+        vectorizado.calcular(grafo.obtener_matriz())
+        
+        n = len(grafo.obtener_ciudades())
+        for i in range(n):
+            for j in range(n):
+                self.assertEqual(vectorizado.obtener_distancia(i, j), python.obtener_distancia(i, j))
+                self.assertEqual(vectorizado.obtener_ruta_indices(i, j), python.obtener_ruta_indices(i, j))
+    
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_floyd_por_bloques_igual_a_una_pasada(self):
+        generador = random.Random(12)
+        rutas = _rutas_aleatorias(generador, 45, 90, 40)
+        matriz = Grafo(rutas).obtener_matriz()
+        n = len(matriz)
+        
+        referencia = AlgoritmoFloyd(usar_numpy=True)
+        referencia.calcular(matriz)
+        for tam_bloque, hilos in ((7, 1), (7, 4), (16, 3)):
+            bloques = AlgoritmoFloyd(usar_numpy=True)
+            bloques.tam_bloque, bloques.hilos = tam_bloque, hilos
+            bloques.calcular(matriz)
+            for i in range(n):
+                for j in range(n):
+                    distancia = referencia.obtener_distancia(i, j)
+                    self.assertEqual(bloques.obtener_distancia(i, j), distancia)
+                    ruta = bloques.obtener_ruta_indices(i, j)
+                    if ruta:
+                        self.assertEqual(sum(matriz[a][b] for a, b in zip(ruta, ruta[1:])), distancia)
+                    else:
+                        self.assertTrue(i == j or distancia >= sys.maxsize // 2)
+    
+    def test_rutas_perezosas_y_tramos(self):
+        generador = random.Random(8)
+        ciudades = [f"Ciudad{i}" for i in range(30)]
+        rutas = [Ruta(None, ciudades[i], ciudades[i + 1], generador.randint(1, 9), 0, 0, 0) for i in range(29)]
+        rutas += _rutas_aleatorias(generador, 30, 15, 40, tiempo_minimo=5)
+        grafo = Grafo(rutas)
+        
+        for usar_numpy in MOTORES:
+            floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            floyd.calcular(grafo.obtener_matriz())
+            n = len(grafo.ciudades)
+            esperadas = {(i, j): floyd.obtener_ruta_indices(i, j) for i in range(n) for j in range(n)}
+            for (i, j), ruta in esperadas.items():
+                self.assertEqual(list(floyd.iterar_ruta(i, j)), ruta)
+            
+            floyd.tam_tramo = 4
+            for (i, j), ruta in esperadas.items():
+                self.assertEqual(floyd.obtener_ruta_indices(i, j), ruta)
+                self.assertEqual(list(floyd.iterar_ruta_ciudades(i, j, grafo.ciudades)),
+                                 [grafo.ciudades[k] for k in ruta])
+            # Cada ciudad quedó guardada una sola vez en el árbol de su destino
+            self.assertLessEqual(len(floyd._arbol(0)._posicion), n)
+            
+            floyd.calcular(grafo.obtener_matriz(), version=1)
+            self.assertEqual(len(floyd._arboles), 0)
+    
+    def test_metricas_de_relajacion_y_cache(self):
+        generador = random.Random(5)
+        rutas = _rutas_aleatorias(generador, 20, 40, 40)
+        
+        contadores = []
+        for usar_numpy in MOTORES:
+            metricas = activar_metricas()
+            try:
+                grafo = Grafo(rutas)
+                floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+                floyd.calcular(grafo.obtener_matriz())
+                for _ in range(2):
+                    floyd.obtener_ruta_ciudades(0, 1, grafo.ciudades)
+            finally:
+                self.assertIs(desactivar_metricas(), metricas)
+            datos = metricas.como_dict()
+            n = len(grafo.ciudades)
+            self.assertEqual(datos["contadores"]["relajaciones"], n ** 3)
+            self.assertEqual(datos["contadores"]["cache_rutas_aciertos"], 1)
+            self.assertEqual(datos["contadores"]["cache_rutas_fallos"], 1)
+            self.assertIn("resolver", datos["tiempos"])
+            self.assertIn("construir_matriz", datos["tiempos"])
+            contadores.append(datos["contadores"]["relajaciones_con_mejora"])
+        # Ambos motores relajan cada celda con los mismos k y en el mismo orden
+        self.assertEqual(len(set(contadores)), 1)
+        
+        # Desactivadas no se acumula nada
+        floyd.calcular(grafo.obtener_matriz())
+        self.assertEqual(metricas.como_dict()["contadores"]["relajaciones"], n ** 3)
+    
+    def test_no_recalcula_si_la_version_no_cambio(self):
+        rutas = [
+            Ruta("BuenosAiresToSaoPaulo", "BuenosAires", "SaoPaulo", 10, 15, 20, 50),
+            Ruta("BuenosAiresToLima", "BuenosAires", "Lima", 15, 20, 30, 70)
+        ]
+        grafo = Grafo(rutas)
+        floyd = AlgoritmoFloyd()
+        floyd.calcular(grafo.obtener_matriz(), grafo.version)
+        ciudades = grafo.obtener_ciudades()
+        self.assertEqual(floyd.obtener_ruta_ciudades(1, 2, ciudades), ["SaoPaulo", "BuenosAires", "Lima"])
+        
+        with patch.object(floyd, "_calcular_python") as python, patch.object(floyd, "_calcular_numpy") as vectorizado:
+            floyd.calcular(grafo.obtener_matriz(), grafo.version)
+            self.assertFalse(python.called or vectorizado.called)
+        
+        grafo.actualizar_ruta("BuenosAires", "SaoPaulo", 40)
+        floyd.calcular(grafo.obtener_matriz(), grafo.version)
+        self.assertEqual(floyd.obtener_distancia(1, 2), 55)
+        self.assertEqual(len(floyd._cache_rutas), 0)
+    
+    def test_dijkstra_paralelo_igual_a_floyd(self):
+        generador = random.Random(6)
+        rutas = _rutas_aleatorias(generador, 20, 35, 40)
+        grafo = Grafo(rutas)
+        esperado = AlgoritmoFloyd(usar_numpy=False)
+        esperado.calcular(grafo.obtener_matriz())
+        
+        for grafo_base, procesos in ((grafo, 1), (GrafoDisperso(rutas), 2)):
+            floyd = AlgoritmoFloyd()
+            floyd.calcular_dijkstra_paralelo(grafo_base, procesos)
+            self.assertEqual(floyd.version, grafo_base.version)
+            n = len(grafo_base.ciudades)
+            for i in range(n):
+                for j in range(n):
+                    self.assertEqual(floyd.obtener_distancia(i, j), esperado.obtener_distancia(i, j))
+                    ruta = floyd.obtener_ruta_indices(i, j)
+                    if ruta:
+                        total = sum(grafo.obtener_matriz()[a][b] for a, b in zip(ruta, ruta[1:]))
+                        self.assertEqual(total, esperado.obtener_distancia(i, j))
+    
+    def test_tablas_compactas(self):
+        self.assertEqual(self.floyd.tipo_distancia, 'i')
+        self.assertEqual(self.floyd.tipo_siguiente, 'h')
+        self.assertEqual(self.floyd.obtener_distancia(0, 0), 0)
+        
+        rutas = [
+            Ruta("AToB", "A", "B", 10, 0, 0, 0),
+            Ruta("CToD", "C", "D", 5, 0, 0, 0)
+        ]
+        for usar_numpy in MOTORES:
+            grafo = Grafo(rutas)
+            floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            floyd.calcular(grafo.obtener_matriz())
+            self.assertEqual(floyd.obtener_distancia(0, 2), sys.maxsize // 2)
+            
+            # Un peso que no cabe en int32 obliga a ampliar las distancias
+            anterior = grafo.obtener_peso("B", "C")
+            grafo.actualizar_ruta("B", "C", 2 ** 31)
+            floyd.actualizar_arista(grafo.obtener_matriz(), 1, 2, anterior)
+            self.assertEqual(floyd.tipo_distancia, 'q')
+            self.assertEqual(floyd.obtener_distancia(0, 3), 2 ** 31 + 15)
+            self.assertEqual(floyd.obtener_ruta_indices(0, 3), [0, 1, 2, 3])
+    
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_memoria_por_celda(self):
+        # Pico de memoria de una resolución completa, temporales incluidos: con int32/int16 son
+        # 10 bytes por celda en tablas; listas anidadas de int de Python ocupan de 16 a 80
+        generador = random.Random(3)
+        n = 500
+        rutas = [Ruta(None, f"C{i}", f"C{i + 1}", generador.randint(1, 50), 0, 0, 0) for i in range(n - 1)]
+        matriz = Grafo(rutas).obtener_matriz()
+        floyd = AlgoritmoFloyd(usar_numpy=True)
+        tracemalloc.start()
+        try:
+            floyd.calcular(matriz)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual((floyd.tipo_distancia, floyd.tipo_siguiente), ('i', 'h'))
+        self.assertLess(pico, 16 * n * n)
+    
+    def test_guardar_y_cargar_tablas(self):
+        archivo = "test_tablas.fw"
+        self.addCleanup(lambda: os.path.exists(archivo) and os.remove(archivo))
+        rutas = [
+            Ruta("BuenosAiresToSaoPaulo", "BuenosAires", "SaoPaulo", 10, 15, 20, 50),
+            Ruta("BuenosAiresToLima", "BuenosAires", "Lima", 15, 20, 30, 70),
+            Ruta("LimaToQuito", "Lima", "Quito", 10, 12, 15, 20)
+        ]
+        grafo = Grafo(rutas)
+        self.floyd.guardar(archivo, self.ciudades, b"x" * 32)
+        
+        for usar_numpy in MOTORES:
+            cargado = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            self.assertFalse(cargado.cargar(archivo, grafo.obtener_matriz(), self.ciudades, b"y" * 32))
+            self.assertTrue(cargado.cargar(archivo, grafo.obtener_matriz(), self.ciudades, b"x" * 32))
+            self.assertEqual(cargado.obtener_distancia(0, 3), 25)
+            self.assertEqual(cargado.obtener_ruta_indices(0, 3), [0, 2, 3])
+            
+            anterior = grafo.obtener_peso("BuenosAires", "Lima")
+            grafo.actualizar_ruta("BuenosAires", "Lima", 5)
+            cargado.actualizar_arista(grafo.obtener_matriz(), 0, 2, anterior)
+            self.assertEqual(cargado.obtener_distancia(0, 3), 15)
+            grafo.actualizar_ruta("BuenosAires", "Lima", anterior)
+    
+    def test_actualizacion_incremental(self):
+        generador = random.Random(2)
+        rutas = _rutas_aleatorias(generador, 15, 30)
+        
+        for usar_numpy in MOTORES:
+            grafo = Grafo(rutas)
+            incremental = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            incremental.calcular(grafo.obtener_matriz())
+            
+            for _ in range(40):
+                ruta = generador.choice(rutas)
+                i = grafo.indice_ciudad[ruta.ciudad1]
+                j = grafo.indice_ciudad[ruta.ciudad2]
+                nuevo = generador.choice([generador.randint(1, 30), sys.maxsize // 2])
+                anterior = grafo.obtener_peso(ruta.ciudad1, ruta.ciudad2)
+                grafo.actualizar_ruta(ruta.ciudad1, ruta.ciudad2, nuevo)
+                incremental.actualizar_arista(grafo.obtener_matriz(), i, j, anterior)
+                
+                completo = AlgoritmoFloyd(usar_numpy=False)
+                completo.calcular(grafo.obtener_matriz())
+                matriz = grafo.obtener_matriz()
+                n = len(matriz)
+                for a in range(n):
+                    for b in range(n):
+                        distancia = completo.obtener_distancia(a, b)
+                        self.assertEqual(incremental.obtener_distancia(a, b), distancia)
+                        ruta_indices = incremental.obtener_ruta_indices(a, b)
+                        if distancia >= sys.maxsize // 2:
+                            self.assertEqual(ruta_indices, [])
+                        else:
+                            total = sum(matriz[x][y] for x, y in zip(ruta_indices, ruta_indices[1:]))
+                            self.assertEqual(total, distancia)
+
+    def test_centro_incremental(self):
+        generador = random.Random(5)
+        rutas = _rutas_aleatorias(generador, 12, 25)
+
+        for usar_numpy in MOTORES:
+            grafo = Grafo(rutas)
+            incremental = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            incremental.calcular(grafo.obtener_matriz())
+            incremental.obtener_centro()
+
+            for _ in range(20):
+                ruta = generador.choice(rutas)
+                i = grafo.indice_ciudad[ruta.ciudad1]
+                j = grafo.indice_ciudad[ruta.ciudad2]
+                anterior = grafo.obtener_peso(ruta.ciudad1, ruta.ciudad2)
+                grafo.actualizar_ruta(ruta.ciudad1, ruta.ciudad2, generador.randint(1, 30))
+                incremental.actualizar_arista(grafo.obtener_matriz(), i, j, anterior)
+
+                completo = AlgoritmoFloyd(usar_numpy=False)
+                completo.calcular(grafo.obtener_matriz())
+                n = len(grafo.ciudades)
+                excentricidades = [max((completo.obtener_distancia(a, b) for b in range(n)
+                                        if completo.obtener_distancia(a, b) < sys.maxsize // 2), default=0)
+                                   for a in range(n)]
+                centro = min(range(n), key=excentricidades.__getitem__)
+                self.assertEqual(incremental.obtener_centro(), (centro, excentricidades[centro]))
+                self.assertEqual(incremental.obtener_mas_centrales(3), completo.obtener_mas_centrales(3))
+
+    def test_consultar_lote(self):
+        generador = random.Random(9)
+        rutas = _rutas_aleatorias(generador, 20, 25)
+        grafo = Grafo(rutas)
+        n = len(grafo.ciudades)
+        origenes = [generador.randrange(-1, n) for _ in range(300)]
+        destinos = [generador.randrange(-1, n) for _ in range(300)]
+        
+        for usar_numpy in MOTORES:
+            floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            floyd.calcular(grafo.obtener_matriz())
+            distancias, rutas_lote = floyd.consultar_lote(origenes, destinos)
+            for origen, destino, distancia, ruta in zip(origenes, destinos, distancias, rutas_lote):
+                if origen < 0 or destino < 0:
+                    self.assertEqual((distancia, ruta), (sys.maxsize // 2, []))
+                else:
+                    self.assertEqual(distancia, floyd.obtener_distancia(origen, destino))
+                    self.assertEqual(ruta, floyd.obtener_ruta_indices(origen, destino))
+            self.assertEqual(floyd.consultar_lote(origenes, destinos, con_rutas=False), (distancias, None))
+        
+        dijkstra = AlgoritmoDijkstra(GrafoDisperso(rutas))
+        self.assertEqual(dijkstra.consultar_lote(origenes, destinos, con_rutas=False)[0], distancias)
+
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_lote_con_una_ruta_larga(self):
+        # Muchos pares cortos y uno que recorre toda la cadena: la memoria no debe crecer
+        # como pares x ruta más larga (eso serían ~250 MB acá)
+        n = 400
+        grafo = Grafo([Ruta(None, f"C{i}", f"C{i + 1}", 1, 1, 1, 1) for i in range(n - 1)])
+        floyd = AlgoritmoFloyd(usar_numpy=True)
+        floyd.calcular(grafo.obtener_matriz())
+        origenes = [i % (n - 1) for i in range(40000)] + [0]
+        destinos = [i % (n - 1) + 1 for i in range(40000)] + [n - 1]
+        tracemalloc.start()
+        try:
+            distancias, rutas = floyd.consultar_lote(origenes, destinos)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(pico, 40 * 2 ** 20)
+        self.assertEqual((distancias[-1], rutas[-1]), (n - 1, list(range(n))))
+        self.assertEqual(rutas[:3], [[0, 1], [1, 2], [2, 3]])
+        
+        floyd.tam_lote_rutas = 7
+        self.assertEqual(floyd.consultar_lote(origenes[-50:], destinos[-50:]), (distancias[-50:], rutas[-50:]))
+    
+    def test_copiar_no_altera_la_instantanea_original(self):
+        generador = random.Random(4)
+        rutas = _rutas_aleatorias(generador, 15, 30)
+        
+        for usar_numpy in MOTORES:
+            grafo = Grafo(rutas)
+            original = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            original.calcular(grafo.obtener_matriz(), grafo.version)
+            n = len(grafo.ciudades)
+            antes = [[original.obtener_distancia(a, b) for b in range(n)] for a in range(n)]
+            centro = original.obtener_centro()
+            
+            copia_grafo, copia = grafo.copiar(), original.copiar()
+            for _ in range(10):
+                ruta = generador.choice(rutas)
+                anterior = copia_grafo.obtener_peso(ruta.ciudad1, ruta.ciudad2)
+                copia_grafo.actualizar_ruta(ruta.ciudad1, ruta.ciudad2, generador.randint(1, 30))
+                copia.actualizar_arista(copia_grafo.obtener_matriz(), copia_grafo.indice_ciudad[ruta.ciudad1],
+                                        copia_grafo.indice_ciudad[ruta.ciudad2], anterior, copia_grafo.version)
+            
+            completo = AlgoritmoFloyd(usar_numpy=False)
+            completo.calcular(copia_grafo.obtener_matriz())
+            for a in range(n):
+                for b in range(n):
+                    self.assertEqual(original.obtener_distancia(a, b), antes[a][b])
+                    self.assertEqual(copia.obtener_distancia(a, b), completo.obtener_distancia(a, b))
+            self.assertEqual(original.obtener_centro(), centro)
+            self.assertEqual(copia.obtener_centro(), completo.obtener_centro())
+            
+            # Un cambio en una componente aislada solo copia las dos filas que toca
+            grafo.agregar_ruta(Ruta("AisladaAToAisladaB", "AisladaA", "AisladaB", 5, 0, 0, 0))
+            original.calcular(grafo.obtener_matriz(), grafo.version)
+            copia_grafo, copia = grafo.copiar(), original.copiar()
+            copia_grafo.actualizar_ruta("AisladaA", "AisladaB", 2)
+            copia.actualizar_arista(copia_grafo.obtener_matriz(), n, n + 1, 5, copia_grafo.version)
+            self.assertEqual((original.obtener_distancia(n, n + 1), copia.obtener_distancia(n, n + 1)), (5, 2))
+            if not usar_numpy:
+                compartidas = sum(x is y for x, y in zip(copia.distancias, original.distancias))
+                self.assertEqual(compartidas, n)
+
+    def test_cierres_en_lote_y_reapertura(self):
+        generador = random.Random(6)
+        rutas = _rutas_aleatorias(generador, 25, 60)
+        
+        for usar_numpy in MOTORES:
+            grafo = Grafo(rutas)
+            floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            floyd.calcular(grafo.obtener_matriz(), grafo.version)
+            for _ in range(4):
+                tormenta = [(r.ciudad1, r.ciudad2) for r in generador.sample(rutas, 15)]
+                floyd.cerrar_rutas(grafo.obtener_matriz(), grafo.cerrar_rutas(tormenta), grafo.version)
+                reabiertas = generador.sample(tormenta, 8)
+                floyd.abrir_rutas(grafo.obtener_matriz(), grafo.abrir_rutas(reabiertas), grafo.version)
+                
+                completo = AlgoritmoFloyd(usar_numpy=False)
+                completo.calcular(grafo.obtener_matriz(), cierres=grafo.cierres)
+                dijkstra = AlgoritmoDijkstra(GrafoDisperso(rutas))
+                dijkstra.grafo.cierres = grafo.cierres
+                n = len(grafo.ciudades)
+                for a in range(n):
+                    for b in range(n):
+                        distancia = completo.obtener_distancia(a, b)
+                        self.assertEqual(floyd.obtener_distancia(a, b), distancia)
+                        self.assertEqual(dijkstra.obtener_distancia(a, b), distancia)
+                        ruta = floyd.obtener_ruta_indices(a, b)
+                        for x, y in zip(ruta, ruta[1:]):
+                            self.assertNotIn(y, grafo.cierres.get(x, ()))
+            self.assertEqual(grafo.obtener_matriz(), Grafo(rutas).obtener_matriz())
+
+    def test_k_rutas_mas_cortas(self):
+        generador = random.Random(8)
+        rutas = _rutas_aleatorias(generador, 9, 18, 20)
+        grafo = Grafo(rutas)
+        grafo.cerrar_rutas([(rutas[0].ciudad1, rutas[0].ciudad2)])
+        matriz = [fila[:] for fila in grafo.obtener_matriz()]
+        for i, cerradas in grafo.cierres.items():
+            for j in cerradas:
+                matriz[i][j] = sys.maxsize // 2
+        n = len(matriz)
+        
+        def todas_las_rutas(origen, destino):
+            encontradas = []
+            pila = [(origen, [origen], 0)]
+            while pila:
+                u, ruta, costo = pila.pop()
+                if u == destino:
+                    encontradas.append(costo)
+                    continue
+                for v in range(n):
+                    if v not in ruta and matriz[u][v] < sys.maxsize // 2:
+                        pila.append((v, ruta + [v], costo + matriz[u][v]))
+            return sorted(encontradas)
+        
+        motores = [AlgoritmoFloyd(usar_numpy=usar_numpy) for usar_numpy in MOTORES]
+        for floyd in motores:
+            floyd.calcular(grafo.obtener_matriz(), grafo.version, grafo.cierres)
+        disperso = GrafoDisperso(rutas)
+        disperso.cerrar_rutas([(rutas[0].ciudad1, rutas[0].ciudad2)])
+        motores.append(AlgoritmoDijkstra(disperso))
+        
+        for origen, destino in [(0, 5), (2, 7), (3, 1)]:
+            esperado = todas_las_rutas(origen, destino)[:6]
+            for motor in motores:
+                alternativas = motor.obtener_k_rutas(origen, destino, 6)
+                self.assertEqual([distancia for distancia, _ in alternativas], esperado)
+                self.assertEqual(len({tuple(ruta) for _, ruta in alternativas}), len(alternativas))
+                for distancia, ruta in alternativas:
+                    self.assertEqual((ruta[0], ruta[-1]), (origen, destino))
+                    self.assertEqual(len(set(ruta)), len(ruta))
+                    self.assertEqual(sum(matriz[a][b] for a, b in zip(ruta, ruta[1:])), distancia)
+
+
+class TestEscenariosClima(unittest.TestCase):
+    def setUp(self):
+        self.rutas = [
+            Ruta("BuenosAiresToSaoPaulo", "BuenosAires", "SaoPaulo", 10, 15, 20, 50),
+            Ruta("BuenosAiresToLima", "BuenosAires", "Lima", 15, 20, 30, 70),
+            Ruta("LimaToQuito", "Lima", "Quito", 10, 12, 15, 20),
+            Ruta("SaoPauloToQuito", "SaoPaulo", "Quito", 25, 30, 40, 80)
+        ]
+        self.grafo = Grafo(self.rutas)
+        self.escenarios = EscenariosClima(self.grafo)
+    
+    def test_matriz_por_condicion(self):
+        matriz = self.grafo.obtener_matriz_condicion("nieve")
+        i = self.grafo.indice_ciudad["BuenosAires"]
+        j = self.grafo.indice_ciudad["SaoPaulo"]
+        self.assertEqual(matriz[i][j], 20)
+        self.assertEqual(matriz[j][i], 20)
+        self.assertEqual(self.grafo.obtener_matriz()[i][j], 10)
+        with self.assertRaises(ValueError):
+            self.grafo.obtener_matriz_condicion("granizo")
+    
+    def test_ruta_mas_corta_por_condicion(self):
+        distancia, ruta = self.escenarios.ruta_mas_corta("tormenta", "SaoPaulo", "Quito")
+        self.assertEqual(distancia, 80)
+        self.assertEqual(ruta, ["SaoPaulo", "Quito"])
+        distancia, ruta = self.escenarios.ruta_mas_corta("nieve", "SaoPaulo", "Lima")
+        self.assertEqual(distancia, 50)
+        self.assertEqual(ruta, ["SaoPaulo", "BuenosAires", "Lima"])
+    
+    def test_calcular_todos_en_paralelo(self):
+        self.escenarios.calcular_todos(procesos=2)
+        for condicion in Grafo.CONDICIONES:
+            esperado = AlgoritmoFloyd(usar_numpy=False)
+            esperado.calcular(self.grafo.obtener_matriz_condicion(condicion))
+            floyd = self.escenarios.obtener_solver(condicion)
+            for i in range(4):
+                for j in range(4):
+                    self.assertEqual(floyd.obtener_distancia(i, j), esperado.obtener_distancia(i, j))
+    
+    def test_cierre_aplica_a_todas_las_condiciones(self):
+        self.escenarios.calcular_todos(procesos=1)
+        self.grafo.cerrar_rutas([("BuenosAires", "SaoPaulo")])
+        self.assertEqual(self.escenarios.ruta_mas_corta("nieve", "SaoPaulo", "Lima"), (55, ["SaoPaulo", "Quito", "Lima"]))
+        self.grafo.abrir_rutas([("BuenosAires", "SaoPaulo")])
+        self.assertEqual(self.escenarios.ruta_mas_corta("nieve", "SaoPaulo", "Lima")[0], 50)
+    
+    def test_nueva_ruta_invalida_escenarios(self):
+        self.escenarios.calcular_todos(procesos=1)
+        self.grafo.agregar_ruta(Ruta("SaoPauloToLima", "SaoPaulo", "Lima", 5, 5, 5, 5))
+        distancia, _ = self.escenarios.ruta_mas_corta("tormenta", "SaoPaulo", "Lima")
+        self.assertEqual(distancia, 5)
+
+
+class TestHorarioClima(unittest.TestCase):
+    def test_ventanas_iguales_a_resolver_cada_una(self):
+        generador = random.Random(9)
+        rutas = _rutas_aleatorias(generador, 20, 40,
+                                  clima=lambda generador, normal: (normal + 5, normal + 10, normal + 40))
+        grafo = Grafo(rutas)
+        grafo.cerrar_rutas([(rutas[0].ciudad1, rutas[0].ciudad2)])
+        
+        # Ventanas que difieren poco (incrementales) y una que cambia todo (completa)
+        ventanas, actual = {}, {}
+        for hora in range(6):
+            for ruta in generador.sample(rutas, 2):
+                actual[ruta.ciudad1, ruta.ciudad2] = generador.choice(Grafo.CONDICIONES)
+            ventanas[f"{hora:02d}00"] = dict(actual)
+        ventanas["0600"] = {(ruta.ciudad1, ruta.ciudad2): "tormenta" for ruta in rutas}
+        
+        esperados = {}
+        for ventana, condiciones in ventanas.items():
+            copia = grafo.copiar()
+            for (ciudad1, ciudad2), condicion in condiciones.items():
+                ruta = next(r for r in reversed(rutas) if {r.ciudad1, r.ciudad2} == {ciudad1, ciudad2})
+                copia.actualizar_ruta(ciudad1, ciudad2, getattr(ruta, f"tiempo_{condicion}"))
+            esperado = AlgoritmoFloyd(usar_numpy=False)
+            esperado.calcular(copia.obtener_matriz(), cierres=copia.cierres)
+            esperados[ventana] = esperado
+        
+        for usar_numpy in MOTORES:
+            for procesos in (1, 2):
+                horario = HorarioClima(grafo, ventanas, usar_numpy=usar_numpy)
+                horario.evaluar(procesos)
+                for ventana, esperado in esperados.items():
+                    floyd = horario.obtener_solver(ventana)
+                    for i in range(len(grafo.ciudades)):
+                        for j in range(len(grafo.ciudades)):
+                            self.assertEqual(floyd.obtener_distancia(i, j), esperado.obtener_distancia(i, j))
+                    self.assertEqual(floyd.obtener_centro(), esperado.obtener_centro())
+    
+    def test_resumen_y_errores(self):
+        rutas = [
+            Ruta("BuenosAiresToSaoPaulo", "BuenosAires", "SaoPaulo", 10, 15, 20, 50),
+            Ruta("BuenosAiresToLima", "BuenosAires", "Lima", 15, 20, 30, 70),
+            Ruta("LimaToQuito", "Lima", "Quito", 10, 12, 15, 20),
+            Ruta("SaoPauloToQuito", "SaoPaulo", "Quito", 25, 30, 40, 80)
+        ]
+        grafo = Grafo(rutas)
+        horario = HorarioClima(grafo, {"0800": {}, "1800": {("Quito", "Lima"): "tormenta"}}, usar_numpy=False)
+        resumen = horario.resumen([("SaoPaulo", "Lima"), ("Lima", "Atlantida")], procesos=1)
+        self.assertEqual(list(resumen), ["0800", "1800"])
+        self.assertEqual(resumen["0800"]["rutas"][0]["distancia"], 25)
+        self.assertEqual(resumen["1800"]["rutas"][0]["ruta"], ["SaoPaulo", "BuenosAires", "Lima"])
+        self.assertIsNone(resumen["1800"]["rutas"][1]["distancia"])
+        self.assertEqual(horario.ruta_mas_corta("1800", "SaoPaulo", "Quito"), (25, ["SaoPaulo", "Quito"]))
+        self.assertEqual(horario.centro("0800"), ("BuenosAires", 25))
+        
+        # Una ruta nueva invalida todas las ventanas
+        grafo.agregar_ruta(Ruta("SaoPauloToLima", "SaoPaulo", "Lima", 5, 5, 5, 5))
+        self.assertEqual(horario.ruta_mas_corta("0800", "SaoPaulo", "Quito"), (15, ["SaoPaulo", "Lima", "Quito"]))
+        with self.assertRaisesRegex(ValueError, "Ventana desconocida"):
+            horario.obtener_solver("2300")
+        with self.assertRaisesRegex(ValueError, "Ruta desconocida en la ventana 0800"):
+            HorarioClima(grafo, {"0800": {("Quito", "BuenosAires"): "nieve"}}).evaluar(procesos=1)
 
 
 class TestAnalizadorArchivo(unittest.TestCase):
@@ -116,6 +893,61 @@ class TestAnalizadorArchivo(unittest.TestCase):
         self.assertEqual(rutas[1].ciudad2, "Lima")
         self.assertEqual(rutas[1].tiempo_normal, 15)
     
+    def test_lectura_por_bloques(self):
+        with open(self.archivo_test, 'a') as f:
+            f.write("\n")
+            f.write("Lima Quito 10 12 15 20")
+        completos = list(AnalizadorArchivo.iterar_registros(self.archivo_test))
+        for tam_bloque in (1, 7, 64):
+            self.assertEqual(list(AnalizadorArchivo.iterar_registros(self.archivo_test, tam_bloque)), completos)
+        self.assertEqual(completos[2], ("Lima", "Quito", 10, 12, 15, 20))
+        
+        # Fin de línea "\r" (solo) y "\r\n", también partidos entre bloques
+        for salto in ("\r", "\r\n"):
+            with open(self.archivo_test, 'w', newline="") as f:
+                f.write(f"BuenosAires SaoPaulo 10 15 20 50{salto}{salto}BuenosAires Lima 15 20 30 70{salto}"
+                        f"Lima Quito 10 12 15 20")
+            for tam_bloque in (1, 2, 7, 33, 64):
+                self.assertEqual(list(AnalizadorArchivo.iterar_registros(self.archivo_test, tam_bloque)), completos)
+            self.assertEqual(len(AnalizadorArchivo.analizar(self.archivo_test)), 3)
+            with open(self.archivo_test, 'a', newline="") as f:
+                f.write(f"{salto}Lima Quito 10 12{salto}")
+            with self.assertRaisesRegex(ValueError, "Línea mal formada: Lima Quito 10 12$"):
+                AnalizadorArchivo.analizar(self.archivo_test)
+    
+    def test_analizar_columnas(self):
+        ciudades, indice, origen, destino, tiempos = AnalizadorArchivo.analizar_columnas(self.archivo_test)
+        self.assertEqual(ciudades, ["BuenosAires", "SaoPaulo", "Lima"])
+        self.assertEqual(indice["Lima"], 2)
+        self.assertEqual(list(origen), [0, 0])
+        self.assertEqual(list(destino), [1, 2])
+        self.assertEqual([list(columna) for columna in tiempos], [[10, 15], [15, 20], [20, 30], [50, 70]])
+    
+    def test_linea_mal_formada(self):
+        with open(self.archivo_test, 'a') as f:
+            f.write("Lima Quito 10 doce 15 20\n")
+        with self.assertRaisesRegex(ValueError, "Línea mal formada: Lima Quito 10 doce 15 20"):
+            AnalizadorArchivo.analizar(self.archivo_test)
+        with open(self.archivo_test, 'w') as f:
+            f.write("Lima Quito 10 12\n")
+        with self.assertRaisesRegex(ValueError, "Línea mal formada: Lima Quito 10 12"):
+            AnalizadorArchivo.analizar(self.archivo_test)
+    
+    def test_analizar_horario(self):
+        with open(self.archivo_test, 'w') as f:
+            f.write("0800 BuenosAires SaoPaulo lluvia\n\n")
+            f.write("1800 Lima Quito tormenta\n")
+            f.write("0800 Lima BuenosAires nieve\n")
+            f.write("0800 BuenosAires SaoPaulo normal\n")
+        self.assertEqual(AnalizadorArchivo.analizar_horario(self.archivo_test), {
+            "0800": {("BuenosAires", "SaoPaulo"): "normal", ("Lima", "BuenosAires"): "nieve"},
+            "1800": {("Lima", "Quito"): "tormenta"},
+        })
+        with open(self.archivo_test, 'a') as f:
+            f.write("2000 Lima Quito granizo\n")
+        with self.assertRaisesRegex(ValueError, "Línea mal formada: 2000 Lima Quito granizo"):
+            AnalizadorArchivo.analizar_horario(self.archivo_test)
+    
     def test_archivo_no_existe(self):
         with self.assertRaises(FileNotFoundError):
             AnalizadorArchivo.analizar("archivo_inexistente.txt")
@@ -131,8 +963,9 @@ class TestMain(unittest.TestCase):
             f.write("Lima Quito 10 12 15 20\n")
     
     def tearDown(self):
-        if os.path.exists(self.app.archivo_datos):
-            os.remove(self.app.archivo_datos)
+        for archivo in (self.app.archivo_datos, self.app.archivo_datos + ".fw", self.app.archivo_datos + ".ch"):
+            if os.path.exists(archivo):
+                os.remove(archivo)
     
     @patch('builtins.input', side_effect=['1', '0', '1', '4'])
     def test_ruta_mas_corta(self, mock_input):
@@ -142,6 +975,106 @@ class TestMain(unittest.TestCase):
             self.assertIn("Ruta más corta: BuenosAires -> SaoPaulo", output)
             self.assertIn("Distancia total: 10 horas", output)
     
+    @patch('builtins.input', side_effect=['1', '0', '1', '1', '0', '1', '4'])
+    def test_ruta_repetida_usa_cache(self, mock_input):
+        metricas = activar_metricas()
+        try:
+            with patch('sys.stdout', new=StringIO()):
+                self.app.ejecutar()
+        finally:
+            desactivar_metricas()
+        contadores = metricas.como_dict()["contadores"]
+        self.assertEqual((contadores["cache_rutas_fallos"], contadores["cache_rutas_aciertos"]), (1, 1))
+    
+    @patch('builtins.input', side_effect=['1', 'Sao', 'Quito', '1', 'Lim', 'Atl', '3', '3', 'Lima Buenos', '4'])
+    def test_ciudades_y_rutas_por_nombre(self, mock_input):
+        self.app.max_listado = 2
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self.app.ejecutar()
+            output = fake_out.getvalue()
+            self.assertIn("4 ciudades disponibles", output)
+            self.assertNotIn("0: BuenosAires", output)
+            self.assertIn("Ruta más corta: SaoPaulo -> BuenosAires -> Lima -> Quito", output)
+            self.assertIn("No hay ciudades que comiencen con 'Atl'", output)
+            self.assertIn("3 rutas disponibles", output)
+            self.assertIn("Ruta bloqueada: BuenosAires - Lima", output)
+        self.assertTrue(self.app.grafo.esta_cerrada("Lima", "BuenosAires"))
+    
+    @patch('builtins.input', side_effect=['1', '1', '3', '4'])
+    def test_ruta_mas_corta_grafo_disperso(self, mock_input):
+        self.app.umbral_disperso = 1
+        # Una consulta puntual usa solo la búsqueda cortada en el destino, nunca una fuente completa
+        with patch('sys.stdout', new=StringIO()) as fake_out, \
+                patch.object(AlgoritmoDijkstra, "calcular_desde", autospec=True) as calcular_desde:
+            self.app.ejecutar()
+            output = fake_out.getvalue()
+            self.assertFalse(calcular_desde.called)
+            self.assertIsInstance(self.app.grafo, GrafoDisperso)
+            self.assertIn("Ruta más corta: SaoPaulo -> BuenosAires -> Lima -> Quito", output)
+            self.assertIn("Distancia total: 35 horas", output)
+    
+    def test_modo_jerarquia(self):
+        self.app.usar_jerarquia = True
+        self.app.preparar()
+        self.assertTrue(os.path.exists(self.app.archivo_datos + ".ch"))
+        self.assertIs(self.app.motor_rutas(), self.app.jerarquia)
+        resultado = self.app.consultar_lote([("SaoPaulo", "Quito"), ("Quito", "Atlantida")])
+        self.assertEqual(resultado[0], (35, ["SaoPaulo", "BuenosAires", "Lima", "Quito"]))
+        self.assertEqual(resultado[1], (sys.maxsize // 2, []))
+        
+        self.app.cambiar_peso_ruta("BuenosAires", "Lima", 5)
+        self.assertEqual(self.app.consultar_lote([("SaoPaulo", "Quito")])[0][0], 25)
+        
+        segunda = main()
+        segunda.archivo_datos = self.app.archivo_datos
+        segunda.usar_jerarquia = True
+        with patch.object(JerarquiaContraccion, "_contraer") as contraer:
+            segunda.preparar()
+            self.assertFalse(contraer.called)
+        self.assertEqual(segunda.consultar_lote([("SaoPaulo", "Quito")])[0][0], 35)
+    
+    def test_consultar_lote(self):
+        self.app.preparar()
+        resultado = self.app.consultar_lote([("SaoPaulo", "Quito"), ("Quito", "Atlantida")])
+        self.assertEqual(resultado[0], (35, ["SaoPaulo", "BuenosAires", "Lima", "Quito"]))
+        self.assertEqual(resultado[1], (sys.maxsize // 2, []))
+    
+    def test_lote_csv_por_linea_de_comandos(self):
+        entrada = StringIO("origen,destino\nBuenosAires,Lima\nLima,Atlantida\nSaoPaulo,Quito\n")
+        with patch('sys.stdin', new=entrada), patch('sys.stdout', new=StringIO()) as fake_out:
+            _linea_de_comandos(["--datos", self.app.archivo_datos, "lote", "--tam-lote", "2"])
+            salida = fake_out.getvalue().splitlines()
+        self.assertEqual(salida, ["origen,destino,distancia,ruta",
+                                  "BuenosAires,Lima,15,BuenosAires -> Lima",
+                                  "Lima,Atlantida,,",
+                                  "SaoPaulo,Quito,35,SaoPaulo -> BuenosAires -> Lima -> Quito"])
+    
+    def test_horario_por_linea_de_comandos(self):
+        archivo_horario = self.app.archivo_datos + ".horario"
+        with open(archivo_horario, 'w') as f:
+            f.write("0800 BuenosAires Lima normal\n")
+            f.write("1800 BuenosAires Lima tormenta\n")
+        archivo_pares = self.app.archivo_datos + ".pares"
+        with open(archivo_pares, 'w') as f:
+            f.write("origen,destino\nSaoPaulo,Quito\n")
+        try:
+            with patch('sys.stdout', new=StringIO()) as fake_out:
+                _linea_de_comandos(["--datos", self.app.archivo_datos, "horario", archivo_horario,
+                                    "--pares", archivo_pares, "--procesos", "1"])
+                resultado = json.loads(fake_out.getvalue())
+        finally:
+            os.remove(archivo_horario)
+            os.remove(archivo_pares)
+        self.assertEqual(resultado["0800"]["rutas"][0]["distancia"], 35)
+        self.assertEqual(resultado["1800"]["rutas"][0]["distancia"], 90)
+        self.assertEqual(resultado["1800"]["excentricidad"], 80)
+    
+    def test_rutas_alternativas(self):
+        self.app.preparar()
+        self.app.agregar_ruta(Ruta(None, "SaoPaulo", "Quito", 40, 40, 40, 40))
+        self.assertEqual(self.app.rutas_alternativas("SaoPaulo", "Quito", 3),
+                         [(35, ["SaoPaulo", "BuenosAires", "Lima", "Quito"]), (40, ["SaoPaulo", "Quito"])])
+    
     @patch('builtins.input', side_effect=['2', '4'])
     def test_centro_grafo(self, mock_input):
         with patch('sys.stdout', new=StringIO()) as fake_out:
@@ -164,6 +1097,17 @@ class TestMain(unittest.TestCase):
             output = fake_out.getvalue()
             self.assertIn("Nueva ruta agregada: Quito - SaoPaulo", output)
     
+    @patch('builtins.input', side_effect=['3', '2', 'Lima', 'Lima', '1', '1', '1', '1',
+                                          '3', '2', 'Lima', 'Bogota', '5', '0', '5', '5', '4'])
+    def test_agregar_ruta_invalida(self, mock_input):
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self.app.ejecutar()
+            output = fake_out.getvalue()
+            self.assertIn("Ciudades no válidas.", output)
+            self.assertIn("Los tiempos deben ser positivos.", output)
+        self.assertNotIn("Bogota", self.app.grafo.indice_ciudad)
+        self.assertEqual(self.app.grafo.obtener_peso("Lima", "Lima"), 0)
+    
     @patch('builtins.input', side_effect=['3', '3', '0', '4'])
     def test_bloquear_ruta(self, mock_input):
         with patch('sys.stdout', new=StringIO()) as fake_out:
@@ -171,6 +1115,70 @@ class TestMain(unittest.TestCase):
             output = fake_out.getvalue()
             self.assertIn("Ruta bloqueada: BuenosAires - SaoPaulo", output)
     
+    @patch('builtins.input', side_effect=['3', '3', '0', '1', '0', '1', '3', '4', '0', '1', '0', '1', '4'])
+    def test_bloquear_y_reabrir_ruta(self, mock_input):
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self.app.ejecutar()
+            output = fake_out.getvalue()
+            self.assertIn("No hay ruta entre BuenosAires y SaoPaulo", output)
+            self.assertIn("0: BuenosAires - SaoPaulo (Normal: 10, Lluvia: 15, Nieve: 20, Tormenta: 50) [bloqueada]", output)
+            self.assertIn("Ruta reabierta: BuenosAires - SaoPaulo", output)
+            self.assertIn("Distancia total: 10 horas", output)
+    
+    @patch('builtins.input', side_effect=['4', '1', '0', '1', '4'])
+    def test_reutiliza_tablas_guardadas(self, mock_input):
+        with patch('sys.stdout', new=StringIO()):
+            self.app.ejecutar()
+        self.assertTrue(os.path.exists(self.app.archivo_datos + ".fw"))
+        
+        segunda = main()
+        segunda.archivo_datos = self.app.archivo_datos
+        with patch('sys.stdout', new=StringIO()) as fake_out, \
+                patch.object(segunda.floyd, "_calcular_python") as python, \
+                patch.object(segunda.floyd, "_calcular_numpy") as vectorizado:
+            segunda.ejecutar()
+            self.assertFalse(python.called or vectorizado.called)
+            self.assertIn("Ruta más corta: BuenosAires -> SaoPaulo", fake_out.getvalue())
+    
+    def test_tablas_guardadas_invalidas_si_cambia_el_archivo(self):
+        self.app.grafo = Grafo(AnalizadorArchivo.analizar(self.app.archivo_datos))
+        self.app.cargar_o_calcular_tablas()
+        with open(self.app.archivo_datos, 'a') as f:
+            f.write("SaoPaulo Quito 25 30 40 80\n")
+        
+        segunda = main()
+        segunda.archivo_datos = self.app.archivo_datos
+        segunda.grafo = Grafo(AnalizadorArchivo.analizar(segunda.archivo_datos))
+        segunda.cargar_o_calcular_tablas()
+        idx_sp = segunda.grafo.indice_ciudad["SaoPaulo"]
+        idx_qu = segunda.grafo.indice_ciudad["Quito"]
+        self.assertEqual(segunda.floyd.obtener_distancia(idx_sp, idx_qu), 25)
+    
+    def test_tablas_guardadas_truncadas_o_con_tipos_invalidos(self):
+        archivo_tablas = self.app.archivo_datos + ".fw"
+        for usar_numpy in MOTORES:
+            self.app.floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+            self.app.grafo = Grafo(AnalizadorArchivo.analizar(self.app.archivo_datos))
+            self.app.cargar_o_calcular_tablas()
+            with open(archivo_tablas, 'rb') as f:
+                completo = f.read()
+            # Tipo de distancia desconocido (byte 9 del encabezado) y archivos cortados
+            danados = [completo[:9] + b"x" + completo[10:], completo[:-20], completo[:-1], completo[:40]]
+            for contenido in danados:
+                with open(archivo_tablas, 'wb') as f:
+                    f.write(contenido)
+                segunda = main()
+                segunda.archivo_datos = self.app.archivo_datos
+                segunda.floyd = AlgoritmoFloyd(usar_numpy=usar_numpy)
+                segunda.grafo = Grafo(AnalizadorArchivo.analizar(segunda.archivo_datos))
+                segunda.cargar_o_calcular_tablas()
+                idx_qu = segunda.grafo.indice_ciudad["Quito"]
+                idx_sp = segunda.grafo.indice_ciudad["SaoPaulo"]
+                self.assertEqual(segunda.floyd.obtener_ruta_indices(idx_qu, idx_sp), [idx_qu, 2, 0, idx_sp])
+                # Se resolvió de nuevo y el archivo quedó reescrito completo
+                with open(archivo_tablas, 'rb') as f:
+                    self.assertEqual(f.read(), completo)
+    
     @patch('builtins.input', side_effect=['5', '4'])  # Opción inválida
     def test_opcion_invalida(self, mock_input):
         with patch('sys.stdout', new=StringIO()) as fake_out:
@@ -178,5 +1186,183 @@ class TestMain(unittest.TestCase):
             output = fake_out.getvalue()
             self.assertIn("Opción no válida", output)
 
+class TestServicioRutas(unittest.TestCase):
+    def setUp(self):
+        self.archivo = "test_servicio.txt"
+        with open(self.archivo, 'w') as f:
+            f.write("BuenosAires SaoPaulo 10 15 20 50\n")
+            f.write("BuenosAires Lima 15 20 30 70\n")
+            f.write("Lima Quito 10 12 15 20\n")
+        self.programa = main()
+        self.programa.archivo_datos = self.archivo
+        self.programa.preparar()
+    
+    def tearDown(self):
+        for archivo in (self.archivo, self.archivo + ".fw"):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+    
+    def test_lectores_concurrentes_ven_instantaneas_consistentes(self):
+        gestor = GestorInstantaneas(self.programa)
+        errores = []
+        
+        def leer():
+            for _ in range(200):
+                instantanea = gestor.leer()
+                distancia, ruta = instantanea.consultar_lote([("SaoPaulo", "Quito")])[0]
+                total = sum(instantanea.grafo.obtener_peso(a, b) for a, b in zip(ruta, ruta[1:]))
+                if total != distancia:
+                    errores.append((distancia, ruta))
+        
+        lectores = [threading.Thread(target=leer) for _ in range(4)]
+        for lector in lectores:
+            lector.start()
+        for tiempo in range(1, 30):
+            gestor.modificar("cambiar_peso_ruta", "BuenosAires", "Lima", tiempo)
+        for lector in lectores:
+            lector.join()
+        
+        self.assertEqual(errores, [])
+        self.assertEqual(gestor.leer().consultar_lote([("BuenosAires", "Lima")])[0][0], 29)
+        self.assertEqual(self.programa.consultar_lote([("BuenosAires", "Lima")])[0][0], 15)
+    
+    def test_lectura_lenta_no_bloquea_a_las_demas(self):
+        liberar = threading.Event()
+        original = main.rutas_alternativas
+        
+        def alternativas_lentas(programa, origen, destino, k):
+            liberar.wait(5)
+            return original(programa, origen, destino, k)
+        
+        async def escenario():
+            servicio = ServicioRutas(self.programa, puerto=0)
+            servidor = await servicio.iniciar()
+            try:
+                lenta = asyncio.ensure_future(
+                    self._pedir(servicio.puerto, "GET", "/alternativas?origen=SaoPaulo&destino=Quito&k=2"))
+                await asyncio.sleep(0.05)
+                estado, respuesta = await asyncio.wait_for(
+                    self._pedir(servicio.puerto, "GET", "/ruta?origen=SaoPaulo&destino=Quito"), 2)
+                self.assertEqual((estado, respuesta["distancia"]), (200, 35))
+                self.assertFalse(lenta.done())
+                liberar.set()
+                estado, respuesta = await lenta
+                self.assertEqual((estado, len(respuesta["rutas"])), (200, 1))
+            finally:
+                liberar.set()
+                await servicio.detener(servidor)
+        
+        with patch.object(main, "rutas_alternativas", alternativas_lentas):
+            asyncio.run(escenario())
+    
+    def test_centro_con_dijkstra_resuelto_antes_de_publicar(self):
+        self.programa.umbral_disperso = 1
+        self.programa.preparar()
+        gestor = GestorInstantaneas(self.programa)
+        gestor.modificar("cambiar_peso_ruta", "BuenosAires", "Lima", 5)
+        instantanea = gestor.leer()
+        with patch.object(AlgoritmoDijkstra, "_buscar", autospec=True) as buscar:
+            self.assertEqual(instantanea.dijkstra.obtener_centro(), (instantanea.grafo.indice_ciudad["BuenosAires"], 15))
+            self.assertFalse(buscar.called)
+    
+    async def _pedir(self, puerto, metodo, destino, cuerpo=None):
+        lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+        escritor.write(f"{metodo} {destino} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                       f"Content-Length: {len(datos)}\r\n\r\n".encode() + datos)
+        respuesta = await lector.read()
+        escritor.close()
+        encabezado, _, cuerpo = respuesta.partition(b"\r\n\r\n")
+        return int(encabezado.split()[1]), json.loads(cuerpo)
+    
+    def test_consultas_y_cambios_por_http(self):
+        async def escenario():
+            servicio = ServicioRutas(self.programa, puerto=0)
+            servidor = await servicio.iniciar()
+            try:
+                consultas = await asyncio.gather(*(
+                    self._pedir(servicio.puerto, "GET", "/ruta?origen=SaoPaulo&destino=Quito") for _ in range(5)))
+                for estado, respuesta in consultas:
+                    self.assertEqual(estado, 200)
+                    self.assertEqual(respuesta["distancia"], 35)
+                    self.assertEqual(respuesta["ruta"], ["SaoPaulo", "BuenosAires", "Lima", "Quito"])
+                
+                anterior = servicio.instantanea
+                estado, _ = await self._pedir(servicio.puerto, "POST", "/rutas",
+                                              {"ciudad1": "SaoPaulo", "ciudad2": "Quito", "tiempo_normal": 5,
+                                               "tiempo_lluvia": 6, "tiempo_nieve": 7, "tiempo_tormenta": 8})
+                self.assertEqual(estado, 200)
+                # La instantánea anterior no se modifica: solo se reemplaza
+                self.assertEqual(anterior.consultar_lote([("SaoPaulo", "Quito")])[0][0], 35)
+                _, respuesta = await self._pedir(servicio.puerto, "GET", "/distancia?origen=SaoPaulo&destino=Quito")
+                self.assertEqual(respuesta["distancia"], 5)
+                
+                await self._pedir(servicio.puerto, "POST", "/bloquear", {"ciudad1": "SaoPaulo", "ciudad2": "Quito"})
+                _, respuesta = await self._pedir(servicio.puerto, "GET", "/ruta?origen=SaoPaulo&destino=Quito")
+                self.assertEqual(respuesta["distancia"], 35)
+                
+                estado, respuesta = await self._pedir(servicio.puerto, "GET", "/centro?k=2")
+                self.assertEqual((estado, respuesta["centro"]), (200, "BuenosAires"))
+                self.assertEqual(len(respuesta["mas_centrales"]), 2)
+                
+                estado, _ = await self._pedir(servicio.puerto, "POST", "/peso",
+                                              {"ciudad1": "Atlantida", "ciudad2": "Lima", "tiempo": 3})
+                self.assertEqual(estado, 404)
+                estado, _ = await self._pedir(servicio.puerto, "GET", "/ruta?origen=Lima")
+                self.assertEqual(estado, 400)
+                
+                # k fuera de rango: no positivo es un error, uno enorme se recorta a max_k
+                for destino in ("/alternativas?origen=Lima&destino=Quito&k=0", "/centro?k=-1", "/centro?k=dos"):
+                    estado, _ = await self._pedir(servicio.puerto, "GET", destino)
+                    self.assertEqual(estado, 400, destino)
+                servicio.max_k = 2
+                estado, respuesta = await self._pedir(servicio.puerto, "GET", "/centro?k=100000")
+                self.assertEqual((estado, len(respuesta["mas_centrales"])), (200, 2))
+                with patch.object(main, "rutas_alternativas", autospec=True, return_value=[]) as alternativas:
+                    await self._pedir(servicio.puerto, "GET", "/alternativas?origen=Lima&destino=Quito&k=100000")
+                    self.assertEqual(alternativas.call_args.args[-1], 2)
+                
+                # Cuerpos mal formados o rutas inválidas responden 400 sin cortar la conexión
+                tiempos = {"tiempo_normal": 5, "tiempo_lluvia": 6, "tiempo_nieve": 7, "tiempo_tormenta": 8}
+                for destino, cuerpo in [("/peso", {"rutas": [], "tiempo": 3}), ("/rutas", {"rutas": [], **tiempos}),
+                                        ("/bloquear", {"rutas": 5}), ("/abrir", {"rutas": [1]}),
+                                        ("/bloquear", {"rutas": [["Lima"]]}), ("/peso", [1, 2]),
+                                        ("/peso", {"ciudad1": "Lima", "ciudad2": "Quito", "tiempo": [3]}),
+                                        ("/peso", {"ciudad1": "Lima", "ciudad2": "Quito", "tiempo": 0}),
+                                        ("/rutas", {"ciudad1": "Lima", "ciudad2": "Lima", **tiempos}),
+                                        ("/rutas", {"ciudad1": "Lima", "ciudad2": "Bogota", **tiempos,
+                                                    "tiempo_nieve": -1})]:
+                    estado, respuesta = await self._pedir(servicio.puerto, "POST", destino, cuerpo)
+                    self.assertEqual(estado, 400, (destino, cuerpo))
+                    self.assertIn("error", respuesta)
+                lima = servicio.instantanea.grafo.indice_ciudad["Lima"]
+                self.assertEqual(servicio.instantanea.grafo.obtener_matriz()[lima][lima], 0)
+                self.assertNotIn("Bogota", servicio.instantanea.grafo.indice_ciudad)
+            finally:
+                await servicio.detener(servidor)
+        
+        asyncio.run(escenario())
+
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_redes_sinteticas_y_etapas(self):
+        from HDT10_bench import ejecutar, comparar
+        resultados = ejecutar([40], ["grilla", "geometrica", "libre-escala"], consultas=20, actualizaciones=3)
+        self.assertEqual(len(resultados["resultados"]), 3)
+        for resultado in resultados["resultados"]:
+            self.assertEqual(resultado["ciudades"], 40)
+            self.assertGreater(resultado["etapas"]["resolver"]["segundos"], 0)
+            self.assertIn("pico_bytes", resultado["etapas"]["analizar"])
+        
+        # La misma semilla genera las mismas redes
+        otra = ejecutar([40], ["libre-escala"], consultas=20, actualizaciones=3, memoria=False)
+        self.assertEqual(otra["resultados"][0]["rutas"], resultados["resultados"][2]["rutas"])
+        
+        lenta = json.loads(json.dumps(otra))
+        lenta["resultados"][0]["etapas"]["resolver"]["segundos"] *= 10
+        self.assertEqual(len(comparar(otra, lenta, 0.2)), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file